@@ -0,0 +1,122 @@
+"""
+Codecs de serialización y compresión para los valores de la caché.
+
+Un codec se identifica como "<serializador>" o "<serializador>+<compresor>"
+(ej. "json", "pickle+zlib", "msgpack+zstd"). El identificador se guarda con
+cada entrada, de modo que las entradas se pueden leer aunque cambie la
+configuración. msgpack y zstandard son opcionales: si no están instalados se
+usan pickle y zlib en su lugar.
+"""
+
+import json
+import pickle
+import zlib
+import logging
+from typing import Any, Callable, Dict, Optional, Tuple
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+logger = logging.getLogger("cache_codecs")
+
+# Tamaño (bytes) a partir del cual se comprime un valor serializado
+COMPRESSION_MIN_BYTES = 4096
+
+# Serializadores: nombre -> (serializar, deserializar)
+SERIALIZERS: Dict[str, Tuple[Callable[[Any], bytes], Callable[[bytes], Any]]] = {
+    "json": (
+        lambda value: json.dumps(value, ensure_ascii=False).encode('utf-8'),
+        lambda payload: json.loads(payload)
+    ),
+    "pickle": (
+        lambda value: pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL),
+        pickle.loads
+    ),
+}
+if msgpack is not None:
+    SERIALIZERS["msgpack"] = (
+        lambda value: msgpack.packb(value, use_bin_type=True),
+        lambda payload: msgpack.unpackb(payload, raw=False)
+    )
+
+# Compresores: nombre -> (comprimir, descomprimir)
+COMPRESSORS: Dict[str, Tuple[Callable[[bytes], bytes], Callable[[bytes], bytes]]] = {
+    "zlib": (lambda payload: zlib.compress(payload, 6), zlib.decompress),
+}
+if zstandard is not None:
+    # Los (des)compresores de zstandard no son seguros entre hilos: uno por llamada
+    COMPRESSORS["zstd"] = (
+        lambda payload: zstandard.ZstdCompressor(level=3).compress(payload),
+        lambda payload: zstandard.ZstdDecompressor().decompress(payload)
+    )
+
+# Alternativas cuando una dependencia opcional no está instalada
+_FALLBACKS = {"msgpack": "pickle", "zstd": "zlib"}
+_warned = set()
+
+
+def _available(name: Optional[str], registry: Dict[str, Any]) -> Optional[str]:
+    """Devuelve el codec pedido o su alternativa si no está disponible."""
+    if name is None or name in registry:
+        return name
+    fallback = _FALLBACKS.get(name)
+    if fallback not in registry:
+        raise ValueError(f"Codec de caché desconocido: {name}")
+    if name not in _warned:
+        _warned.add(name)
+        logger.warning(f"Codec '{name}' no disponible, se usa '{fallback}'")
+    return fallback
+
+
+def encode(value: Any, serializer: str = "json", compression: Optional[str] = None,
+           min_compress_bytes: int = COMPRESSION_MIN_BYTES) -> Tuple[bytes, str]:
+    """
+    Serializa (y comprime si supera el umbral) un valor.
+
+    Args:
+        value: Valor a serializar
+        serializer: "json", "pickle" o "msgpack"
+        compression: None, "zlib" o "zstd"
+        min_compress_bytes: Tamaño mínimo para comprimir
+
+    Returns:
+        Tupla (bytes, identificador del codec usado)
+    """
+    serializer = _available(serializer, SERIALIZERS)
+    payload = SERIALIZERS[serializer][0](value)
+
+    compression = _available(compression, COMPRESSORS)
+    if compression and len(payload) >= min_compress_bytes:
+        compressed = COMPRESSORS[compression][0](payload)
+        # Solo compensa si realmente reduce el tamaño
+        if len(compressed) < len(payload):
+            return compressed, f"{serializer}+{compression}"
+
+    return payload, serializer
+
+
+def decode(payload: Any, codec: Optional[str]) -> Any:
+    """
+    Deserializa un valor guardado con encode().
+
+    Args:
+        payload: Bytes guardados (o texto JSON de entradas anteriores a los codecs)
+        codec: Identificador del codec (None para entradas antiguas en JSON)
+
+    Returns:
+        Valor original
+    """
+    if not codec:
+        return json.loads(payload)
+
+    serializer, _, compression = codec.partition("+")
+    if compression:
+        payload = COMPRESSORS[compression][1](payload)
+    return SERIALIZERS[serializer][1](payload)
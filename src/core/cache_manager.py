@@ -7,17 +7,73 @@ y se limpia automáticamente al finalizar el procesamiento.
 import os
 import json
 import time
-import shutil
+import base64
 import logging
 import sqlite3
+import threading
+import weakref
+from collections import OrderedDict
 from pathlib import Path
 from typing import Dict, Any, Optional, Union, List, Tuple
 from datetime import datetime, timedelta
 
 from src.core.config import DATA_DIR
+from src.core import cache_codecs
 
 logger = logging.getLogger("cache_manager")
 
+# Centinela para distinguir "no está en caché" de un valor None almacenado
+_MISSING = object()
+
+# Sentencias SQL constantes: sqlite3 reutiliza la sentencia preparada de cada
+# conexión mientras el texto no cambie
+_ENTRY_BYTES = "LENGTH(CAST(key AS BLOB)) + LENGTH(CAST(value AS BLOB)) + COALESCE(LENGTH(CAST(metadata AS BLOB)), 0)"
+_SQL_GET = "SELECT value, expires_at, codec FROM cache WHERE key = ?"
+_SQL_SET = """
+    INSERT OR REPLACE INTO cache 
+    (key, value, created_at, expires_at, metadata, size, last_access, codec, hits) 
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, 0)
+"""
+_SQL_DELETE = "DELETE FROM cache WHERE key = ?"
+_SQL_TOUCH = "UPDATE cache SET last_access = ?, hits = hits + ? WHERE key = ?"
+_SQL_ENTRY_SIZE = "SELECT size FROM cache WHERE key = ?"
+_SQL_DELETE_EXPIRED = "DELETE FROM cache WHERE expires_at <= ?"
+_SQL_COUNT = "SELECT COUNT(*) FROM cache"
+_SQL_EVICTION_CANDIDATES = {
+    "lru": "SELECT key, size FROM cache ORDER BY last_access LIMIT ?",
+    "lfu": "SELECT key, size FROM cache ORDER BY hits, last_access LIMIT ?",
+}
+# Candidatos dentro de un namespace: rango de claves ['ns:', 'ns;') sobre la clave primaria
+_SQL_NAMESPACE_EVICTION_CANDIDATES = {
+    "lru": "SELECT key, size FROM cache WHERE key >= ? AND key < ? ORDER BY last_access LIMIT ?",
+    "lfu": "SELECT key, size FROM cache WHERE key >= ? AND key < ? ORDER BY hits, last_access LIMIT ?",
+}
+_SQL_NAMESPACE_SIZES = """
+    SELECT CASE WHEN instr(key, ':') > 0 THEN substr(key, 1, instr(key, ':') - 1) ELSE '' END AS namespace,
+           SUM(size)
+    FROM cache GROUP BY namespace
+"""
+# Tamaño de lote para consultas con IN (...) (por debajo del límite de parámetros de SQLite)
+SQLITE_BATCH_SIZE = 500
+
+# Al llenarse, la caché se vacía hasta esta fracción del tamaño máximo para
+# no desalojar en cada escritura
+EVICTION_TARGET_RATIO = 0.9
+
+# Accesos acumulados en memoria antes de registrarlos en SQLite
+ACCESS_FLUSH_SIZE = 100
+
+# Segmentos del backend JSON
+JSON_SEGMENT_MAX_BYTES = 4 * 1024 * 1024  # Tamaño a partir del cual se abre un segmento nuevo
+JSON_COMPACT_GARBAGE_RATIO = 0.5  # Fracción de bytes muertos que dispara la compactación
+JSON_MIN_SEGMENTS = 4  # Segmentos cerrados tolerados además de los necesarios para los datos vivos
+JSON_COMPACT_INTERVAL = 60  # Segundos entre comprobaciones del compactador
+
+# Caché en dos niveles (L1 en memoria sobre L2 SQLite)
+L1_MAX_SIZE_MB = 16  # Tamaño por defecto del nivel en memoria
+WRITE_BEHIND_BATCH = 100  # Escrituras acumuladas antes de volcarlas a L2
+WRITE_BEHIND_DELAY = 1.0  # Segundos máximos que una escritura espera para llegar a L2
+
 class CacheManager:
     """
     Gestor de caché para operaciones de scraping.
@@ -30,7 +86,12 @@ class CacheManager:
         cache_dir: Optional[str] = None, 
         ttl_seconds: int = 3600,
         max_size_mb: int = 100,
-        storage_type: str = "sqlite"  # Opciones: "sqlite", "json", "memory"
+        storage_type: str = "sqlite",  # Opciones: "sqlite", "json", "memory", "tiered"
+        eviction_policy: str = "lru",  # Opciones: "lru", "lfu"
+        l1_size_mb: int = L1_MAX_SIZE_MB,
+        namespaces: Optional[Dict[str, Dict[str, Any]]] = None,
+        codec: str = "json",  # Opciones: "json", "pickle", "msgpack"
+        compression: Optional[str] = None  # Opciones: None, "zlib", "zstd"
     ):
         """
         Inicializa el gestor de caché.
@@ -39,7 +100,15 @@ class CacheManager:
             cache_dir: Directorio donde se almacenará la caché
             ttl_seconds: Tiempo de vida de los elementos en caché (segundos)
             max_size_mb: Tamaño máximo de la caché en MB
-            storage_type: Tipo de almacenamiento ("sqlite", "json", "memory")
+            storage_type: Tipo de almacenamiento ("sqlite", "json", "memory", o "tiered":
+                L1 en memoria delante de L2 SQLite)
+            eviction_policy: Elementos a desalojar cuando la caché está llena:
+                los usados hace más tiempo ("lru") o los menos usados ("lfu")
+            l1_size_mb: Tamaño máximo del nivel en memoria en modo "tiered" (MB)
+            namespaces: Configuración por namespace (prefijo de la clave hasta ':'),
+                ej. {"page": {"ttl": 86400, "max_size_mb": 50, "codec": "pickle", "compression": "zstd"}}
+            codec: Serializador por defecto de los valores persistidos
+            compression: Compresión por defecto de los valores grandes (ver cache_codecs)
         """
         if cache_dir is None:
             cache_dir = str(DATA_DIR / "cache")
@@ -48,12 +117,27 @@ class CacheManager:
         self.ttl_seconds = ttl_seconds
         self.max_size_mb = max_size_mb
         self.storage_type = storage_type
-        self.memory_cache = {}  # Caché en memoria
+        self.eviction_policy = eviction_policy
+        self.codec = codec
+        self.compression = compression
+        self.memory_cache = OrderedDict()  # Caché en memoria (orden de uso, el más reciente al final)
+        self._memory_lock = threading.RLock()
+        self._local = threading.local()  # Conexión SQLite de cada hilo
+        self._size_lock = threading.Lock()
+        self._size_bytes = 0  # Tamaño de los datos en bytes, actualizado en cada escritura
+        self._namespace_bytes: Dict[str, int] = {}  # Tamaño por namespace
+        self.namespaces: Dict[str, Dict[str, Any]] = {}
+        self.namespace_stats: Dict[str, Dict[str, int]] = {}
+        for name, options in (namespaces or {}).items():
+            self.register_namespace(name, **options)
+        self._access_buffer: Dict[str, List] = {}  # Accesos SQLite pendientes: clave -> [último acceso, hits]
+        self._persist_stats = True  # Los niveles internos de una caché "tiered" no guardan estadísticas
         self.stats = {
             "hits": 0,
             "misses": 0,
             "items_added": 0,
             "items_expired": 0,
+            "items_evicted": 0,
             "cleanups_performed": 0,
             "last_cleanup": None
         }
@@ -66,81 +150,852 @@ class CacheManager:
             self._init_sqlite_storage()
         elif storage_type == "json":
             self._init_json_storage()
+        elif storage_type == "tiered":
+            self._init_tiered_storage(l1_size_mb)
         
         # Realizar limpieza inicial para eliminar elementos expirados
         self.cleanup(force=True)
         
         logger.info(f"Caché inicializada: {self.storage_type} en {self.cache_dir}")
     
+    def register_namespace(self, name: str, ttl: Optional[int] = None,
+                           max_size_mb: Optional[float] = None, codec: Optional[str] = None,
+                           compression: Optional[str] = None) -> None:
+        """
+        Registra un namespace: las claves 'name:...' usan su TTL, su cuota y su codec.
+        
+        Args:
+            name: Nombre del namespace (ej. "dns", "page", "verify")
+            ttl: Tiempo de vida por defecto de sus elementos (segundos)
+            max_size_mb: Tamaño máximo que pueden ocupar sus elementos (MB)
+            codec: Serializador de sus valores (por defecto el de la caché)
+            compression: Compresión de sus valores grandes (por defecto la de la caché)
+        """
+        self.namespaces[name] = {
+            "ttl": ttl,
+            "max_size_mb": max_size_mb,
+            "codec": codec,
+            "compression": compression
+        }
+        if getattr(self, "_l2", None) is not None:
+            self._l2.register_namespace(name, ttl, max_size_mb, codec, compression)
+    
+    @staticmethod
+    def _namespace_of(key: str) -> str:
+        """Namespace de una clave (prefijo hasta ':'; '' si no tiene)."""
+        namespace, separator, _ = key.partition(':')
+        return namespace if separator else ''
+    
+    def _ttl_for(self, key: str, ttl: Optional[int]) -> float:
+        """TTL efectivo: el indicado, el del namespace o el de la caché."""
+        if ttl:
+            return ttl
+        namespace_ttl = self.namespaces.get(self._namespace_of(key), {}).get("ttl")
+        return namespace_ttl or self.ttl_seconds
+    
+    def _encode(self, key: str, value: Any) -> Tuple[bytes, str]:
+        """Serializa un valor con el codec de su namespace (o el de la caché)."""
+        config = self.namespaces.get(self._namespace_of(key), {})
+        return cache_codecs.encode(
+            value,
+            config.get("codec") or self.codec,
+            config.get("compression") or self.compression
+        )
+    
+    def _count_namespace(self, key: str, counter: str, amount: int = 1) -> None:
+        """Incrementa un contador del namespace de la clave."""
+        stats = self.namespace_stats.setdefault(
+            self._namespace_of(key), {"hits": 0, "misses": 0, "items_added": 0}
+        )
+        stats[counter] += amount
+    
+    def _init_tiered_storage(self, l1_size_mb: int):
+        """
+        Inicializa la caché en dos niveles.
+        
+        L1 es una caché en memoria acotada (LRU/LFU) y L2 una caché SQLite. Las
+        lecturas que fallan en L1 se resuelven en L2 y suben a L1; las escrituras
+        van a L1 de inmediato y se vuelcan a L2 por lotes (write-behind), como
+        mucho WRITE_BEHIND_DELAY segundos después.
+        """
+        self._l1 = CacheManager(self.cache_dir, self.ttl_seconds, l1_size_mb, "memory", self.eviction_policy)
+        self._l2 = CacheManager(self.cache_dir, self.ttl_seconds, self.max_size_mb, "sqlite", self.eviction_policy,
+                                namespaces=self.namespaces, codec=self.codec, compression=self.compression)
+        self._l1._persist_stats = False
+        self._l2._persist_stats = False
+        
+        # Escrituras pendientes de volcar a L2: clave -> (valor, created_at, expires_at, metadatos)
+        self._write_lock = threading.Lock()
+        self._flush_lock = threading.Lock()  # Evita que un volcado en curso reviva una clave borrada
+        self._pending_writes: "OrderedDict[str, Tuple[Any, float, float, Dict]]" = OrderedDict()
+        self._flush_wakeup = threading.Event()
+        self._flusher_stop = threading.Event()
+        self._flusher = threading.Thread(
+            target=CacheManager._write_behind_loop,
+            args=(weakref.ref(self), self._flush_wakeup, self._flusher_stop),
+            name="cache-write-behind",
+            daemon=True
+        )
+        self._flusher.start()
+    
+    def _flush_writes(self) -> int:
+        """
+        Vuelca a L2 en una sola transacción las escrituras pendientes.
+        
+        Returns:
+            Número de entradas volcadas
+        """
+        with self._flush_lock:
+            with self._write_lock:
+                pending, self._pending_writes = self._pending_writes, OrderedDict()
+            if not pending:
+                return 0
+            
+            now = time.time()
+            entries = [
+                (key, value, created_at, expires_at, metadata)
+                for key, (value, created_at, expires_at, metadata) in pending.items()
+                if expires_at > now
+            ]
+            if entries and not self._l2._sqlite_set_batch(entries):
+                logger.error(f"No se pudieron volcar {len(entries)} escrituras a la caché L2")
+            return len(entries)
+    
+    @staticmethod
+    def _write_behind_loop(manager_ref, wakeup: threading.Event, stop: threading.Event) -> None:
+        """Hilo write-behind: vuelca a L2 al llenarse el lote o cada WRITE_BEHIND_DELAY segundos."""
+        while not stop.is_set():
+            wakeup.wait(WRITE_BEHIND_DELAY)
+            wakeup.clear()
+            manager = manager_ref()
+            if manager is None:
+                return
+            try:
+                manager._flush_writes()
+            except Exception as e:
+                logger.error(f"Error al volcar escrituras a la caché L2: {e}")
+            del manager
+    
+    def _tiered_get(self, key: str, default: Any) -> Any:
+        """Lectura en dos niveles: L1, escrituras pendientes y L2 (read-through)."""
+        value = self._l1.get(key, _MISSING)
+        if value is not _MISSING:
+            self.stats["hits"] += 1
+            return value
+        
+        # Escrita pero aún no volcada (y desalojada de L1)
+        with self._write_lock:
+            pending = self._pending_writes.get(key)
+        if pending is not None and pending[2] > time.time():
+            self.stats["hits"] += 1
+            return pending[0]
+        
+        entry = self._l2._sqlite_get_entry(key)
+        if entry is None:
+            self.stats["misses"] += 1
+            return default
+        
+        # Subir a L1 con el tiempo de vida que le queda en L2
+        value, expires_at = entry
+        self._l1.set(key, value, ttl=max(expires_at - time.time(), 0.001))
+        self.stats["hits"] += 1
+        return value
+    
+    def _tiered_get_many(self, keys: List[str]) -> Dict[str, Any]:
+        """Lectura por lotes en dos niveles: lo que falta en L1 se pide a L2 en una consulta."""
+        found: Dict[str, Any] = {}
+        missing = []
+        now = time.time()
+        
+        for key in keys:
+            value = self._l1.get(key, _MISSING)
+            if value is not _MISSING:
+                found[key] = value
+                continue
+            with self._write_lock:
+                pending = self._pending_writes.get(key)
+            if pending is not None and pending[2] > now:
+                found[key] = pending[0]
+            else:
+                missing.append(key)
+        
+        if missing:
+            for key, (value, expires_at) in self._l2._sqlite_get_many(missing).items():
+                self._l1.set(key, value, ttl=max(expires_at - now, 0.001))
+                found[key] = value
+        
+        self.stats["hits"] += len(found)
+        self.stats["misses"] += len(keys) - len(found)
+        return found
+    
+    def _tiered_set(self, key: str, value: Any, ttl: Optional[int], metadata: Optional[Dict]) -> bool:
+        """Escritura en dos niveles: inmediata en L1 y diferida (por lotes) en L2."""
+        ttl = self._ttl_for(key, ttl)
+        created_at = time.time()
+        
+        self._l1.set(key, value, ttl=ttl, metadata=metadata)
+        with self._write_lock:
+            self._pending_writes[key] = (value, created_at, created_at + ttl, metadata or {})
+            batch_ready = len(self._pending_writes) >= WRITE_BEHIND_BATCH
+        if batch_ready:
+            self._flush_wakeup.set()
+        
+        self.stats["items_added"] += 1
+        return True
+    
+    def _tiered_delete(self, key: str) -> bool:
+        """Elimina una clave de ambos niveles y de las escrituras pendientes."""
+        deleted_l1 = self._l1.delete(key)
+        with self._flush_lock:
+            with self._write_lock:
+                pending = self._pending_writes.pop(key, None)
+            deleted_l2 = self._l2.delete(key)
+        return bool(pending) or deleted_l1 or deleted_l2
+    
     def _init_sqlite_storage(self):
         """Inicializa el almacenamiento SQLite."""
         self.db_path = self.cache_dir / "cache.db"
         
-        conn = sqlite3.connect(str(self.db_path))
+        conn = self._connection()
+        
+        # VACUUM incremental: las páginas libres se devuelven sin reescribir la base
+        if conn.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+            conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+            conn.execute("VACUUM")
+        
         cursor = conn.cursor()
         
         # Crear tabla si no existe
         cursor.execute('''
         CREATE TABLE IF NOT EXISTS cache (
             key TEXT PRIMARY KEY,
-            value TEXT,
+            value BLOB,
             created_at REAL,
             expires_at REAL,
-            metadata TEXT
+            metadata TEXT,
+            size INTEGER,
+            last_access REAL,
+            hits INTEGER DEFAULT 0,
+            codec TEXT
         )
         ''')
         
-        # Crear índice para expiración
+        # Migrar cachés creadas antes de registrar tamaño, accesos y codec
+        # (codec NULL: valor antiguo guardado como texto JSON)
+        columns = {row[1] for row in cursor.execute("PRAGMA table_info(cache)")}
+        for column, definition in (("size", "INTEGER"), ("last_access", "REAL"),
+                                   ("hits", "INTEGER DEFAULT 0"), ("codec", "TEXT")):
+            if column not in columns:
+                cursor.execute(f"ALTER TABLE cache ADD COLUMN {column} {definition}")
+        cursor.execute(f"UPDATE cache SET size = {_ENTRY_BYTES} WHERE size IS NULL")
+        cursor.execute("UPDATE cache SET last_access = created_at WHERE last_access IS NULL")
+        
+        # Crear índices para expiración y desalojo
         cursor.execute('CREATE INDEX IF NOT EXISTS idx_expires_at ON cache (expires_at)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_last_access ON cache (last_access)')
         
         conn.commit()
-        conn.close()
+        
+        # Tamaño inicial; a partir de aquí se actualiza de forma incremental
+        self._sqlite_resync_sizes(conn)
     
-    def _init_json_storage(self):
-        """Inicializa el almacenamiento JSON."""
-        self.json_path = self.cache_dir / "cache_index.json"
-        
-        # Crear archivo de índice si no existe
-        if not self.json_path.exists():
-            with open(self.json_path, 'w', encoding='utf-8') as f:
-                json.dump({
-                    "metadata": {
-                        "created_at": time.time(),
-                        "last_updated": time.time()
-                    },
-                    "items": {}
-                }, f)
+    def _connection(self) -> sqlite3.Connection:
+        """
+        Obtiene la conexión SQLite persistente del hilo actual.
+        Se abre al primer uso en modo WAL con synchronous=NORMAL.
+        """
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(str(self.db_path), timeout=30, cached_statements=64)
+            conn.execute("PRAGMA journal_mode = WAL")
+            conn.execute("PRAGMA synchronous = NORMAL")
+            self._local.conn = conn
+        return conn
     
-    def _get_cache_size(self) -> float:
+    def _add_size(self, delta: int, key: Optional[str] = None) -> None:
+        """Actualiza el tamaño registrado de la caché (y del namespace de la clave)."""
+        with self._size_lock:
+            self._size_bytes = max(0, self._size_bytes + delta)
+            if key is not None:
+                namespace = self._namespace_of(key)
+                self._namespace_bytes[namespace] = max(0, self._namespace_bytes.get(namespace, 0) + delta)
+    
+    def _reset_sizes(self) -> None:
+        """Pone a cero el tamaño registrado (llamar con el lock del backend tomado)."""
+        with self._size_lock:
+            self._size_bytes = 0
+            self._namespace_bytes = {}
+    
+    def _sqlite_resync_sizes(self, conn: sqlite3.Connection) -> None:
+        """Recalcula desde SQLite el tamaño total y por namespace."""
+        sizes = {namespace: size or 0 for namespace, size in conn.execute(_SQL_NAMESPACE_SIZES)}
+        with self._size_lock:
+            self._namespace_bytes = sizes
+            self._size_bytes = sum(sizes.values())
+    
+    def _sqlite_delete(self, conn: sqlite3.Connection, key: str) -> bool:
+        """Elimina una clave (sin confirmar la transacción) y descuenta su tamaño."""
+        row = conn.execute(_SQL_ENTRY_SIZE, (key,)).fetchone()
+        if row is None:
+            return False
+        conn.execute(_SQL_DELETE, (key,))
+        self._add_size(-row[0], key)
+        with self._size_lock:
+            self._access_buffer.pop(key, None)
+        return True
+    
+    def _sqlite_set_batch(self, entries: List[Tuple[str, Any, float, float, Dict]]) -> bool:
         """
-        Obtiene el tamaño actual de la caché en MB.
+        Escribe varias entradas SQLite en una sola transacción.
         
+        Args:
+            entries: Tuplas (clave, valor, created_at, expires_at, metadatos)
+            
         Returns:
-            Tamaño de la caché en MB
+            True si se almacenaron correctamente, False en caso contrario
         """
+        try:
+            # Serializar valores y metadatos
+            rows = []
+            for key, value, created_at, expires_at, metadata in entries:
+                payload, codec = self._encode(key, value)
+                metadata_json = json.dumps(metadata, ensure_ascii=False)
+                size = self._entry_size(key, metadata_json) + len(payload)
+                rows.append((key, sqlite3.Binary(payload), created_at, expires_at, metadata_json, size, created_at, codec))
+            
+            # Un lote mayor que la caché (o que la cuota de un namespace) desalojaría
+            # sus propias entradas: se conservan solo las más recientes que caben
+            rows = self._trim_batch(rows)
+            if not rows:
+                return False
+            
+            # Desalojar si no caben (en total y en la cuota de cada namespace)
+            if not self._ensure_space(sum(row[5] for row in rows)):
+                return False
+            by_namespace: Dict[str, int] = {}
+            for row in rows:
+                namespace = self._namespace_of(row[0])
+                by_namespace[namespace] = by_namespace.get(namespace, 0) + row[5]
+            for namespace, size in by_namespace.items():
+                if not self._ensure_namespace_space(namespace, size):
+                    return False
+            
+            # Insertar o actualizar
+            conn = self._connection()
+            deltas = []
+            with conn:
+                for row in rows:
+                    previous = conn.execute(_SQL_ENTRY_SIZE, (row[0],)).fetchone()
+                    conn.execute(_SQL_SET, row)
+                    deltas.append((row[5] - ((previous[0] or 0) if previous else 0), row[0]))
+            for delta, key in deltas:
+                self._add_size(delta, key)
+            
+            self.stats["items_added"] += len(rows)
+            return True
+            
+        except Exception as e:
+            logger.error(f"Error al almacenar en caché SQLite: {e}")
+            return False
+    
+    def _trim_batch(self, rows: List[tuple]) -> List[tuple]:
+        """
+        Recorta un lote de filas SQLite (clave en la posición 0, tamaño en la 5)
+        para que quepa en la caché y en la cuota de cada namespace, conservando
+        las más recientes.
+        """
+        limit = self.max_size_mb * 1024 * 1024 * EVICTION_TARGET_RATIO
+        namespace_limits = {
+            name: config["max_size_mb"] * 1024 * 1024 * EVICTION_TARGET_RATIO
+            for name, config in self.namespaces.items() if config.get("max_size_mb")
+        }
+        
+        kept = []
+        total = 0
+        namespace_totals: Dict[str, int] = {}
+        for row in reversed(rows):
+            namespace = self._namespace_of(row[0])
+            namespace_total = namespace_totals.get(namespace, 0) + row[5]
+            if total + row[5] > limit or namespace_total > namespace_limits.get(namespace, float("inf")):
+                continue
+            kept.append(row)
+            total += row[5]
+            namespace_totals[namespace] = namespace_total
+        
+        dropped = len(rows) - len(kept)
+        if dropped:
+            self.stats["items_evicted"] += dropped
+            logger.info(f"Lote mayor que la caché: se descartan {dropped} entradas antiguas del lote")
+        kept.reverse()
+        return kept
+    
+    def _record_access(self, key: str) -> None:
+        """Acumula un acceso SQLite y lo registra por lotes para no escribir en cada lectura."""
+        with self._size_lock:
+            entry = self._access_buffer.setdefault(key, [0.0, 0])
+            entry[0] = time.time()
+            entry[1] += 1
+            flush_due = len(self._access_buffer) >= ACCESS_FLUSH_SIZE
+        if flush_due:
+            self._flush_access_buffer()
+    
+    def _flush_access_buffer(self) -> None:
+        """Registra en SQLite los accesos acumulados."""
+        with self._size_lock:
+            pending, self._access_buffer = self._access_buffer, {}
+        if not pending:
+            return
+        try:
+            conn = self._connection()
+            with conn:
+                conn.executemany(
+                    _SQL_TOUCH,
+                    [(last_access, hits, key) for key, (last_access, hits) in pending.items()]
+                )
+        except Exception as e:
+            logger.error(f"Error al registrar accesos en caché SQLite: {e}")
+    
+    @staticmethod
+    def _entry_size(key: str, *parts: str) -> int:
+        """Tamaño en bytes de una entrada serializada (clave incluida)."""
+        return len(key.encode('utf-8')) + sum(len(part.encode('utf-8')) for part in parts)
+    
+    def _ensure_space(self, entry_size: int) -> bool:
+        """
+        Libera espacio para una nueva entrada desalojando según la política
+        configurada.
+        
+        Args:
+            entry_size: Tamaño en bytes de la entrada a almacenar
+            
+        Returns:
+            True si la entrada cabe, False si supera por sí sola el tamaño máximo
+        """
+        max_bytes = self.max_size_mb * 1024 * 1024
+        if entry_size > max_bytes:
+            logger.error(f"No se puede almacenar en caché: la entrada ({entry_size} bytes) supera el tamaño máximo")
+            return False
+        
+        current = self._size_bytes
+        if current + entry_size <= max_bytes:
+            return True
+        
+        # Desalojar hasta dejar margen para varias escrituras más
+        target = max_bytes * EVICTION_TARGET_RATIO - entry_size
+        evicted = self._evict(int(current - target))
+        logger.info(f"Caché llena ({self.max_size_mb}MB): {evicted} elementos desalojados ({self.eviction_policy})")
+        return True
+    
+    def _ensure_namespace_space(self, namespace: str, entry_size: int) -> bool:
+        """
+        Libera espacio dentro de la cuota de un namespace desalojando solo sus elementos.
+        
+        Args:
+            namespace: Namespace de la entrada
+            entry_size: Tamaño en bytes de la entrada a almacenar
+            
+        Returns:
+            True si la entrada cabe, False si supera por sí sola la cuota
+        """
+        quota_mb = self.namespaces.get(namespace, {}).get("max_size_mb")
+        if not quota_mb:
+            return True
+        
+        max_bytes = quota_mb * 1024 * 1024
+        if entry_size > max_bytes:
+            logger.error(f"No se puede almacenar en caché: la entrada ({entry_size} bytes) supera la cuota de '{namespace}'")
+            return False
+        
+        current = self._namespace_bytes.get(namespace, 0)
+        if current + entry_size <= max_bytes:
+            return True
+        
+        target = max_bytes * EVICTION_TARGET_RATIO - entry_size
+        evicted = self._evict(int(current - target), namespace=namespace)
+        logger.info(f"Cuota de '{namespace}' llena ({quota_mb}MB): {evicted} elementos desalojados")
+        return True
+    
+    def _evict(self, bytes_to_free: int, namespace: Optional[str] = None) -> int:
+        """
+        Desaloja elementos (primero los expirados) hasta liberar los bytes indicados.
+        
+        Args:
+            bytes_to_free: Bytes a liberar
+            namespace: Si se indica, solo se desalojan elementos de ese namespace
+        
+        Returns:
+            Número de elementos desalojados
+        """
+        if bytes_to_free <= 0:
+            return 0
+        
+        def in_scope(key: str) -> bool:
+            return namespace is None or self._namespace_of(key) == namespace
+        
+        now = time.time()
+        freed = 0
+        evicted = 0
+        
+        # Caché en memoria
         if self.storage_type == "memory":
-            # Estimación aproximada para caché en memoria
-            import sys
-            return sys.getsizeof(str(self.memory_cache)) / (1024 * 1024)
+            with self._memory_lock:
+                expired = [k for k, v in self.memory_cache.items() if v["expires_at"] <= now]
+                if self.eviction_policy == "lfu":
+                    by_use = sorted(self.memory_cache, key=lambda k: self.memory_cache[k]["hits"])
+                else:
+                    by_use = list(self.memory_cache)  # Orden LRU
+                
+                for key in expired + by_use:
+                    if freed >= bytes_to_free:
+                        break
+                    if not in_scope(key):
+                        continue
+                    item = self.memory_cache.pop(key, None)
+                    if item is None:
+                        continue
+                    self._add_size(-item["size"], key)
+                    freed += item["size"]
+                    evicted += 1
         
+        # Caché SQLite
         elif self.storage_type == "sqlite":
-            if self.db_path.exists():
-                return self.db_path.stat().st_size / (1024 * 1024)
+            self._flush_access_buffer()
+            try:
+                conn = self._connection()
+                policy = self.eviction_policy if self.eviction_policy in _SQL_EVICTION_CANDIDATES else "lru"
+                if namespace is None:
+                    candidates_sql, params = _SQL_EVICTION_CANDIDATES[policy], ()
+                else:
+                    candidates_sql, params = _SQL_NAMESPACE_EVICTION_CANDIDATES[policy], (f"{namespace}:", f"{namespace};")
+                
+                with conn:
+                    # Primero los expirados (de cualquier namespace)
+                    before = self._namespace_bytes.get(namespace, 0) if namespace is not None else self._size_bytes
+                    cursor = conn.execute(_SQL_DELETE_EXPIRED, (now,))
+                    evicted += cursor.rowcount
+                    self._sqlite_resync_sizes(conn)
+                    after = self._namespace_bytes.get(namespace, 0) if namespace is not None else self._size_bytes
+                    freed += before - after
+                    
+                    while freed < bytes_to_free:
+                        candidates = conn.execute(candidates_sql, params + (256,)).fetchall()
+                        if not candidates:
+                            break
+                        batch = []
+                        for key, size in candidates:
+                            batch.append((key,))
+                            self._add_size(-(size or 0), key)
+                            freed += size or 0
+                            if freed >= bytes_to_free:
+                                break
+                        conn.executemany(_SQL_DELETE, batch)
+                        evicted += len(batch)
+                
+                # Devolver al sistema las páginas liberadas
+                conn.execute("PRAGMA incremental_vacuum").fetchall()
+            except Exception as e:
+                logger.error(f"Error al desalojar de caché SQLite: {e}")
         
+        # Caché JSON
         elif self.storage_type == "json":
-            total_size = 0
+            try:
+                with self._json_lock:
+                    expired = [k for k, entry in self._json_index.items() if entry[3] <= now]
+                    if self.eviction_policy == "lfu":
+                        by_use = sorted(self._json_index, key=lambda k: self._json_index[k][4])
+                    else:
+                        by_use = list(self._json_index)  # Orden LRU
+                    
+                    for key in expired + by_use:
+                        if freed >= bytes_to_free:
+                            break
+                        if not in_scope(key):
+                            continue
+                        entry = self._json_forget(key)
+                        if entry is None:
+                            continue
+                        if entry[3] > now:
+                            self._json_append(self._json_line({"k": key, "d": 1}))
+                        freed += entry[2]
+                        evicted += 1
+                self._maybe_compact_json()
+            except Exception as e:
+                logger.error(f"Error al desalojar de caché JSON: {e}")
+        
+        self.stats["items_evicted"] += evicted
+        return evicted
+    
+    def _init_json_storage(self):
+        """
+        Inicializa el almacenamiento JSON en segmentos append-only.
+        
+        Cada escritura añade una línea JSON al segmento activo y los borrados
+        añaden un tombstone. El índice en memoria (clave -> posición del último
+        registro) se reconstruye al abrir leyendo los segmentos en orden, y un
+        compactador en segundo plano copia los registros vivos de los segmentos
+        cerrados al activo para eliminar después los antiguos.
+        """
+        self._json_lock = threading.RLock()
+        # Clave -> [segmento, offset, longitud, expires_at, hits], en orden de uso (LRU)
+        self._json_index: "OrderedDict[str, List]" = OrderedDict()
+        # Segmento -> [bytes escritos, bytes vivos]
+        self._segments: Dict[int, List[int]] = {}
+        self._active_segment = 0
+        self._active_file = None
+        
+        self._load_json_segments()
+        self._open_active_segment()
+        self._migrate_legacy_json()
+        
+        # Compactador en segundo plano (con referencia débil para no retener la caché)
+        self._compact_wakeup = threading.Event()
+        self._compactor_stop = threading.Event()
+        self._compactor = threading.Thread(
+            target=CacheManager._json_compactor_loop,
+            args=(weakref.ref(self), self._compact_wakeup, self._compactor_stop),
+            name="cache-compactor",
+            daemon=True
+        )
+        self._compactor.start()
+    
+    def _segment_path(self, segment: int) -> Path:
+        """Ruta del archivo de un segmento."""
+        return self.cache_dir / f"segment_{segment:06d}.jsonl"
+    
+    @staticmethod
+    def _json_line(record: Dict[str, Any]) -> bytes:
+        """Serializa un registro como una línea del segmento."""
+        return (json.dumps(record, ensure_ascii=False) + "\n").encode('utf-8')
+    
+    def _load_json_segments(self) -> None:
+        """Reconstruye el índice en memoria leyendo los segmentos en orden."""
+        now = time.time()
+        
+        for path in sorted(self.cache_dir.glob("segment_*.jsonl")):
+            try:
+                segment = int(path.stem.split("_")[1])
+            except (IndexError, ValueError):
+                continue
+            self._segments[segment] = [0, 0]
             
-            # Tamaño del índice
-            if self.json_path.exists():
-                total_size += self.json_path.stat().st_size
+            with open(path, 'rb') as f:
+                offset = 0
+                for line in f:
+                    length = len(line)
+                    if not line.endswith(b"\n"):
+                        break  # Registro incompleto tras una interrupción
+                    self._segments[segment][0] += length
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        offset += length
+                        continue
+                    
+                    key = record["k"]
+                    self._json_forget(key)
+                    if not record.get("d") and record["e"] > now:
+                        self._json_index[key] = [segment, offset, length, record["e"], 0]
+                        self._segments[segment][1] += length
+                        self._add_size(length, key)
+                    offset += length
+        
+        if self._json_index:
+            logger.info(f"Índice de caché JSON reconstruido: {len(self._json_index)} elementos "
+                        f"en {len(self._segments)} segmentos")
+    
+    def _open_active_segment(self) -> None:
+        """Abre un segmento nuevo para las escrituras."""
+        self._active_segment = max(self._segments, default=0) + 1
+        self._segments[self._active_segment] = [0, 0]
+        self._active_file = open(self._segment_path(self._active_segment), 'ab')
+    
+    def _json_append(self, line: bytes) -> Tuple[int, int]:
+        """
+        Añade una línea al segmento activo (y lo cierra si alcanza el tamaño máximo).
+        
+        Returns:
+            Tupla (segmento, offset) donde quedó escrita la línea
+        """
+        with self._json_lock:
+            if self._segments[self._active_segment][0] >= JSON_SEGMENT_MAX_BYTES:
+                self._active_file.close()
+                self._open_active_segment()
             
-            # Tamaño de los archivos de caché
-            for file_path in self.cache_dir.glob("cache_*.json"):
-                total_size += file_path.stat().st_size
+            segment = self._active_segment
+            offset = self._segments[segment][0]
+            self._active_file.write(line)
+            self._active_file.flush()
+            self._segments[segment][0] += len(line)
+            return segment, offset
+    
+    def _json_put(self, key: str, line: bytes, expires_at: float) -> None:
+        """Escribe un registro y lo apunta en el índice."""
+        with self._json_lock:
+            self._json_forget(key)
+            segment, offset = self._json_append(line)
+            self._json_index[key] = [segment, offset, len(line), expires_at, 0]
+            self._segments[segment][1] += len(line)
+            self._add_size(len(line), key)
+    
+    def _json_forget(self, key: str) -> Optional[List]:
+        """Quita una clave del índice y descuenta sus bytes vivos."""
+        entry = self._json_index.pop(key, None)
+        if entry is not None:
+            self._segments[entry[0]][1] -= entry[2]
+            self._add_size(-entry[2], key)
+        return entry
+    
+    def _json_value_fields(self, key: str, value: Any) -> Dict[str, Any]:
+        """
+        Campos del valor en una línea de segmento: JSON legible ("v") con el
+        codec por defecto, o bytes en base64 ("b") con el identificador del
+        codec ("z") si se usa otro serializador o se comprime.
+        """
+        payload, codec = self._encode(key, value)
+        if codec == "json":
+            return {"v": value}
+        return {"b": base64.b64encode(payload).decode('ascii'), "z": codec}
+    
+    @staticmethod
+    def _json_record_value(record: Dict[str, Any]) -> Any:
+        """Valor de una línea de segmento (ver _json_value_fields)."""
+        if "z" in record:
+            return cache_codecs.decode(base64.b64decode(record["b"]), record["z"])
+        return record["v"]
+    
+    def _json_read(self, entry: List) -> Dict[str, Any]:
+        """Lee el registro al que apunta una entrada del índice."""
+        with open(self._segment_path(entry[0]), 'rb') as f:
+            f.seek(entry[1])
+            return json.loads(f.read(entry[2]))
+    
+    def _json_compaction_due(self) -> bool:
+        """
+        Indica si conviene compactar: la mitad de lo escrito en los segmentos
+        cerrados ya no está vivo, o hay demasiados segmentos pequeños.
+        """
+        with self._json_lock:
+            sealed = [stats for seg, stats in self._segments.items() if seg != self._active_segment]
+            if not sealed:
+                return False
+            written = sum(stats[0] for stats in sealed)
+            live = sum(stats[1] for stats in sealed)
+            max_segments = 2 * (live // JSON_SEGMENT_MAX_BYTES + 1) + JSON_MIN_SEGMENTS
+            return written - live >= written * JSON_COMPACT_GARBAGE_RATIO or len(sealed) > max_segments
+    
+    def _maybe_compact_json(self) -> None:
+        """Despierta al compactador si hay espacio que recuperar."""
+        if self._json_compaction_due():
+            self._compact_wakeup.set()
+    
+    def _compact_json_segments(self) -> int:
+        """
+        Copia los registros vivos de los segmentos cerrados al segmento activo
+        y elimina los segmentos cerrados.
+        
+        Se compactan todos los segmentos cerrados a la vez: así ningún tombstone
+        descartado puede dejar viva una versión anterior en otro segmento.
+        
+        Returns:
+            Bytes recuperados
+        """
+        with self._json_lock:
+            sealed = sorted(seg for seg in self._segments if seg != self._active_segment)
+            live_by_segment: Dict[int, List[Tuple[int, str]]] = {seg: [] for seg in sealed}
+            for key, entry in self._json_index.items():
+                if entry[0] in live_by_segment:
+                    live_by_segment[entry[0]].append((entry[1], key))
+        
+        reclaimed = 0
+        for segment in sealed:
+            # Un segmento por vez, para no bloquear a los escritores durante toda la compactación
+            with self._json_lock:
+                with open(self._segment_path(segment), 'rb') as f:
+                    for offset, key in sorted(live_by_segment[segment]):
+                        entry = self._json_index.get(key)
+                        if entry is None or entry[0] != segment or entry[1] != offset:
+                            continue  # Reescrita o borrada mientras tanto
+                        f.seek(offset)
+                        line = f.read(entry[2])
+                        new_segment, new_offset = self._json_append(line)
+                        self._segments[segment][1] -= entry[2]
+                        self._segments[new_segment][1] += entry[2]
+                        entry[0], entry[1] = new_segment, new_offset
+        
+        # Eliminar los segmentos antiguos (del más antiguo al más reciente)
+        with self._json_lock:
+            for segment in sealed:
+                written, _ = self._segments.pop(segment)
+                reclaimed += written
+                self._segment_path(segment).unlink(missing_ok=True)
+        
+        logger.info(f"Segmentos de caché compactados: {len(sealed)} ({reclaimed / (1024 * 1024):.2f} MB)")
+        return reclaimed
+    
+    @staticmethod
+    def _json_compactor_loop(manager_ref, wakeup: threading.Event, stop: threading.Event) -> None:
+        """Hilo compactador: espera avisos (o el intervalo) y compacta si hace falta."""
+        while not stop.is_set():
+            wakeup.wait(JSON_COMPACT_INTERVAL)
+            wakeup.clear()
+            manager = manager_ref()
+            if manager is None or stop.is_set():
+                return
+            try:
+                if manager._json_compaction_due():
+                    manager._compact_json_segments()
+            except Exception as e:
+                logger.error(f"Error al compactar segmentos de caché: {e}")
+            del manager
+    
+    def _migrate_legacy_json(self) -> None:
+        """Importa la caché JSON antigua (índice + un archivo por elemento) a segmentos."""
+        legacy_index = self.cache_dir / "cache_index.json"
+        if not legacy_index.exists():
+            return
+        
+        now = time.time()
+        migrated = 0
+        try:
+            with open(legacy_index, 'r', encoding='utf-8') as f:
+                index = json.load(f)
+            
+            for key, item in index.get("items", {}).items():
+                cache_file = self.cache_dir / f"cache_{item['file_id']}.json"
+                if item["expires_at"] <= now or not cache_file.exists():
+                    continue
+                with open(cache_file, 'r', encoding='utf-8') as f:
+                    cache_data = json.load(f)
+                if key in cache_data:
+                    self._json_put(key, self._json_line({
+                        "k": key,
+                        "v": cache_data[key]["value"],
+                        "c": item["created_at"],
+                        "e": item["expires_at"],
+                        "m": item.get("metadata", {})
+                    }), item["expires_at"])
+                    migrated += 1
             
-            return total_size / (1024 * 1024)
+            for file_path in self.cache_dir.glob("cache_*.json"):
+                if file_path.name != "cache_stats.json":
+                    file_path.unlink()
+            logger.info(f"Caché JSON migrada a segmentos: {migrated} elementos")
+        except Exception as e:
+            logger.error(f"Error al migrar la caché JSON antigua: {e}")
+    
+    def _get_cache_size(self) -> float:
+        """
+        Obtiene el tamaño actual de la caché en MB.
+        
+        Returns:
+            Tamaño de la caché en MB
+        """
+        # En dos niveles, el tamaño persistente es el de L2
+        if self.storage_type == "tiered":
+            return self._l2._get_cache_size()
         
-        return 0
+        # Todos los backends registran el tamaño de cada entrada al escribirla
+        return self._size_bytes / (1024 * 1024)
     
     def get(self, key: str, default: Any = None) -> Any:
         """
@@ -153,85 +1008,87 @@ class CacheManager:
         Returns:
             Valor almacenado o valor por defecto
         """
-        # Caché en memoria
-        if self.storage_type == "memory":
-            if key in self.memory_cache:
-                item = self.memory_cache[key]
-                
-                # Verificar expiración
-                if item["expires_at"] > time.time():
-                    self.stats["hits"] += 1
-                    return item["value"]
-                else:
-                    # Eliminar elemento expirado
-                    del self.memory_cache[key]
-                    self.stats["items_expired"] += 1
+        value = self._get_value(key, _MISSING)
+        self._count_namespace(key, "misses" if value is _MISSING else "hits")
+        return default if value is _MISSING else value
+    
+    def get_many(self, keys: List[str]) -> Dict[str, Any]:
+        """
+        Obtiene varios valores de la caché (una consulta por lote en SQLite).
+        
+        Args:
+            keys: Claves a obtener
             
-            self.stats["misses"] += 1
-            return default
+        Returns:
+            Diccionario {clave: valor} con las claves encontradas y vigentes
+        """
+        keys = list(dict.fromkeys(keys))
         
-        # Caché SQLite
+        if self.storage_type == "tiered":
+            found = self._tiered_get_many(keys)
         elif self.storage_type == "sqlite":
-            try:
-                conn = sqlite3.connect(str(self.db_path))
-                cursor = conn.cursor()
-                
-                cursor.execute(
-                    "SELECT value, expires_at FROM cache WHERE key = ?", 
-                    (key,)
-                )
-                result = cursor.fetchone()
-                
-                if result:
-                    value_str, expires_at = result
+            found = {key: entry[0] for key, entry in self._sqlite_get_many(keys).items()}
+        else:
+            found = {}
+            for key in keys:
+                value = self._get_value(key, _MISSING)
+                if value is not _MISSING:
+                    found[key] = value
+        
+        for key in keys:
+            self._count_namespace(key, "hits" if key in found else "misses")
+        return found
+    
+    def _get_value(self, key: str, default: Any) -> Any:
+        """Obtiene un valor del backend configurado (sin contadores por namespace)."""
+        # Caché en dos niveles
+        if self.storage_type == "tiered":
+            return self._tiered_get(key, default)
+        
+        # Caché en memoria
+        if self.storage_type == "memory":
+            with self._memory_lock:
+                if key in self.memory_cache:
+                    item = self.memory_cache[key]
                     
                     # Verificar expiración
-                    if expires_at > time.time():
+                    if item["expires_at"] > time.time():
+                        self.memory_cache.move_to_end(key)
+                        item["hits"] += 1
                         self.stats["hits"] += 1
-                        conn.close()
-                        return json.loads(value_str)
+                        return item["value"]
                     else:
                         # Eliminar elemento expirado
-                        cursor.execute("DELETE FROM cache WHERE key = ?", (key,))
-                        conn.commit()
+                        del self.memory_cache[key]
+                        self._add_size(-item["size"], key)
                         self.stats["items_expired"] += 1
-                
-                conn.close()
-                self.stats["misses"] += 1
-                return default
-                
-            except Exception as e:
-                logger.error(f"Error al obtener de caché SQLite: {e}")
-                return default
+            
+            self.stats["misses"] += 1
+            return default
+        
+        # Caché SQLite
+        elif self.storage_type == "sqlite":
+            entry = self._sqlite_get_entry(key)
+            return entry[0] if entry is not None else default
         
         # Caché JSON
         elif self.storage_type == "json":
             try:
-                if not self.json_path.exists():
-                    self.stats["misses"] += 1
-                    return default
-                
-                with open(self.json_path, 'r', encoding='utf-8') as f:
-                    index = json.load(f)
-                
-                if key in index["items"]:
-                    item_meta = index["items"][key]
+                with self._json_lock:
+                    entry = self._json_index.get(key)
                     
-                    # Verificar expiración
-                    if item_meta["expires_at"] > time.time():
-                        # Cargar valor desde archivo individual
-                        cache_file = self.cache_dir / f"cache_{item_meta['file_id']}.json"
-                        
-                        if cache_file.exists():
-                            with open(cache_file, 'r', encoding='utf-8') as f:
-                                cache_data = json.load(f)
-                                
-                                if key in cache_data:
-                                    self.stats["hits"] += 1
-                                    return cache_data[key]["value"]
-                    else:
-                        # Marcar como expirado (se eliminará en la próxima limpieza)
-                        self.stats["items_expired"] += 1
+                    if entry is not None:
+                        # Verificar expiración
+                        if entry[3] > time.time():
+                            self._json_index.move_to_end(key)
+                            entry[4] += 1
+                            record = self._json_read(entry)
+                            self.stats["hits"] += 1
+                            return self._json_record_value(record)
+                        else:
+                            # Eliminar elemento expirado
+                            self._json_forget(key)
+                            self.stats["items_expired"] += 1
                 
                 self.stats["misses"] += 1
                 return default
@@ -240,6 +1097,106 @@ class CacheManager:
                 logger.error(f"Error al obtener de caché JSON: {e}")
                 return default
     
+    def _sqlite_get_entry(self, key: str) -> Optional[Tuple[Any, float]]:
+        """
+        Lee una entrada SQLite vigente.
+        
+        Returns:
+            Tupla (valor, expires_at) o None si no existe o está expirada
+        """
+        try:
+            conn = self._connection()
+            result = conn.execute(_SQL_GET, (key,)).fetchone()
+            
+            if result:
+                payload, expires_at, codec = result
+                
+                # Verificar expiración
+                if expires_at > time.time():
+                    self.stats["hits"] += 1
+                    self._record_access(key)
+                    return cache_codecs.decode(payload, codec), expires_at
+                else:
+                    # Eliminar elemento expirado
+                    with conn:
+                        self._sqlite_delete(conn, key)
+                    self.stats["items_expired"] += 1
+            
+            self.stats["misses"] += 1
+            return None
+            
+        except Exception as e:
+            logger.error(f"Error al obtener de caché SQLite: {e}")
+            return None
+    
+    def _sqlite_get_many(self, keys: List[str]) -> Dict[str, Tuple[Any, float]]:
+        """
+        Lee varias entradas SQLite vigentes con una consulta por lote.
+        
+        Returns:
+            Diccionario {clave: (valor, expires_at)} con las claves encontradas
+        """
+        found: Dict[str, Tuple[Any, float]] = {}
+        expired = []
+        now = time.time()
+        try:
+            conn = self._connection()
+            for start in range(0, len(keys), SQLITE_BATCH_SIZE):
+                chunk = keys[start:start + SQLITE_BATCH_SIZE]
+                placeholders = ",".join("?" * len(chunk))
+                rows = conn.execute(
+                    f"SELECT key, value, expires_at, codec FROM cache WHERE key IN ({placeholders})", chunk
+                )
+                for key, payload, expires_at, codec in rows:
+                    if expires_at > now:
+                        found[key] = (cache_codecs.decode(payload, codec), expires_at)
+                    else:
+                        expired.append(key)
+            
+            # Eliminar elementos expirados
+            if expired:
+                with conn:
+                    for key in expired:
+                        self._sqlite_delete(conn, key)
+                self.stats["items_expired"] += len(expired)
+            
+            for key in found:
+                self._record_access(key)
+            self.stats["hits"] += len(found)
+            self.stats["misses"] += len(keys) - len(found)
+            
+        except Exception as e:
+            logger.error(f"Error al obtener lote de caché SQLite: {e}")
+        return found
+    
+    def _sqlite_delete_many(self, keys: List[str]) -> List[str]:
+        """
+        Elimina varias claves SQLite en una sola transacción.
+        
+        Returns:
+            Lista de claves eliminadas
+        """
+        deleted = []
+        try:
+            conn = self._connection()
+            with conn:
+                for start in range(0, len(keys), SQLITE_BATCH_SIZE):
+                    chunk = keys[start:start + SQLITE_BATCH_SIZE]
+                    placeholders = ",".join("?" * len(chunk))
+                    sizes = conn.execute(
+                        f"SELECT key, size FROM cache WHERE key IN ({placeholders})", chunk
+                    ).fetchall()
+                    conn.executemany(_SQL_DELETE, [(key,) for key, _ in sizes])
+                    for key, size in sizes:
+                        self._add_size(-(size or 0), key)
+                        deleted.append(key)
+            with self._size_lock:
+                for key in deleted:
+                    self._access_buffer.pop(key, None)
+        except Exception as e:
+            logger.error(f"Error al eliminar lote de caché SQLite: {e}")
+        return deleted
+    
     def set(self, key: str, value: Any, ttl: Optional[int] = None, metadata: Dict = None) -> bool:
         """
         Almacena un valor en la caché.
@@ -247,24 +1204,54 @@ class CacheManager:
         Args:
             key: Clave del elemento
             value: Valor a almacenar
-            ttl: Tiempo de vida en segundos (opcional, usa el valor por defecto si no se especifica)
+            ttl: Tiempo de vida en segundos (opcional, usa el del namespace o el valor por defecto)
             metadata: Metadatos adicionales (opcional)
             
         Returns:
             True si se almacenó correctamente, False en caso contrario
         """
-        # Verificar tamaño de la caché antes de añadir
-        if self._get_cache_size() >= self.max_size_mb:
-            logger.warning(f"Caché alcanzó tamaño máximo ({self.max_size_mb}MB). Ejecutando limpieza...")
-            self.cleanup(force=True)
+        stored = self._set_value(key, value, ttl, metadata)
+        if stored:
+            self._count_namespace(key, "items_added")
+        return stored
+    
+    def set_many(self, items: Dict[str, Any], ttl: Optional[int] = None, metadata: Dict = None) -> bool:
+        """
+        Almacena varios valores (una sola transacción en SQLite).
+        
+        Args:
+            items: Diccionario {clave: valor}
+            ttl: Tiempo de vida en segundos (opcional, usa el del namespace o el valor por defecto)
+            metadata: Metadatos adicionales comunes (opcional)
             
-            # Si sigue excediendo después de la limpieza, no almacenar
-            if self._get_cache_size() >= self.max_size_mb:
-                logger.error(f"No se puede almacenar en caché: tamaño máximo excedido incluso después de limpieza")
-                return False
+        Returns:
+            True si se almacenaron todos correctamente, False en caso contrario
+        """
+        if not items:
+            return True
         
-        # Calcular tiempo de expiración
-        ttl = ttl or self.ttl_seconds
+        if self.storage_type == "sqlite":
+            created_at = time.time()
+            stored = self._sqlite_set_batch([
+                (key, value, created_at, created_at + self._ttl_for(key, ttl), metadata or {})
+                for key, value in items.items()
+            ])
+            if stored:
+                for key in items:
+                    self._count_namespace(key, "items_added")
+            return stored
+        
+        results = [self.set(key, value, ttl, metadata) for key, value in items.items()]
+        return all(results)
+    
+    def _set_value(self, key: str, value: Any, ttl: Optional[int], metadata: Optional[Dict]) -> bool:
+        """Almacena un valor en el backend configurado (sin contadores por namespace)."""
+        # Caché en dos niveles
+        if self.storage_type == "tiered":
+            return self._tiered_set(key, value, ttl, metadata)
+        
+        # Calcular tiempo de expiración (TTL del namespace si no se indica)
+        ttl = self._ttl_for(key, ttl)
         created_at = time.time()
         expires_at = created_at + ttl
         
@@ -274,89 +1261,58 @@ class CacheManager:
         
         # Caché en memoria
         if self.storage_type == "memory":
-            self.memory_cache[key] = {
-                "value": value,
-                "created_at": created_at,
-                "expires_at": expires_at,
-                "metadata": metadata
-            }
+            try:
+                size = self._entry_size(
+                    key,
+                    json.dumps(value, ensure_ascii=False, default=str),
+                    json.dumps(metadata, ensure_ascii=False, default=str)
+                )
+            except (TypeError, ValueError):
+                import sys
+                size = sys.getsizeof(value)
+            
+            with self._memory_lock:
+                previous = self.memory_cache.pop(key, None)
+                if previous is not None:
+                    self._add_size(-previous["size"], key)
+                
+                # Desalojar si no cabe
+                if not self._ensure_space(size) or not self._ensure_namespace_space(self._namespace_of(key), size):
+                    return False
+                
+                self.memory_cache[key] = {
+                    "value": value,
+                    "created_at": created_at,
+                    "expires_at": expires_at,
+                    "metadata": metadata,
+                    "size": size,
+                    "hits": 0
+                }
+                self._add_size(size, key)
             self.stats["items_added"] += 1
             return True
         
         # Caché SQLite
         elif self.storage_type == "sqlite":
-            try:
-                conn = sqlite3.connect(str(self.db_path))
-                cursor = conn.cursor()
-                
-                # Serializar valor y metadatos
-                value_json = json.dumps(value, ensure_ascii=False)
-                metadata_json = json.dumps(metadata, ensure_ascii=False)
-                
-                # Insertar o actualizar
-                cursor.execute(
-                    """
-                    INSERT OR REPLACE INTO cache 
-                    (key, value, created_at, expires_at, metadata) 
-                    VALUES (?, ?, ?, ?, ?)
-                    """, 
-                    (key, value_json, created_at, expires_at, metadata_json)
-                )
-                
-                conn.commit()
-                conn.close()
-                
-                self.stats["items_added"] += 1
-                return True
-                
-            except Exception as e:
-                logger.error(f"Error al almacenar en caché SQLite: {e}")
-                return False
+            return self._sqlite_set_batch([(key, value, created_at, expires_at, metadata)])
         
         # Caché JSON
         elif self.storage_type == "json":
             try:
-                # Cargar índice
-                if self.json_path.exists():
-                    with open(self.json_path, 'r', encoding='utf-8') as f:
-                        index = json.load(f)
-                else:
-                    index = {
-                        "metadata": {
-                            "created_at": time.time(),
-                            "last_updated": time.time()
-                        },
-                        "items": {}
-                    }
-                
-                # Generar ID de archivo
-                file_id = str(int(time.time() * 1000))
-                
-                # Actualizar índice
-                index["items"][key] = {
-                    "file_id": file_id,
-                    "created_at": created_at,
-                    "expires_at": expires_at,
-                    "metadata": metadata
-                }
-                
-                index["metadata"]["last_updated"] = time.time()
-                
-                # Guardar índice
-                with open(self.json_path, 'w', encoding='utf-8') as f:
-                    json.dump(index, f, ensure_ascii=False)
-                
-                # Guardar valor en archivo individual
-                cache_file = self.cache_dir / f"cache_{file_id}.json"
+                line = self._json_line({
+                    "k": key,
+                    **self._json_value_fields(key, value),
+                    "c": created_at,
+                    "e": expires_at,
+                    "m": metadata
+                })
+                
+                # Desalojar si no cabe
+                if not self._ensure_space(len(line)) or not self._ensure_namespace_space(self._namespace_of(key), len(line)):
+                    return False
                 
-                with open(cache_file, 'w', encoding='utf-8') as f:
-                    json.dump({
-                        key: {
-                            "value": value,
-                            "created_at": created_at,
-                            "expires_at": expires_at
-                        }
-                    }, f, ensure_ascii=False)
+                self._json_put(key, line, expires_at)
+                self._maybe_compact_json()
                 
                 self.stats["items_added"] += 1
                 return True
@@ -365,6 +1321,33 @@ class CacheManager:
                 logger.error(f"Error al almacenar en caché JSON: {e}")
                 return False
     
+    def delete_many(self, keys: List[str]) -> int:
+        """
+        Elimina varias claves (una sola transacción en SQLite).
+        
+        Args:
+            keys: Claves a eliminar
+            
+        Returns:
+            Número de elementos eliminados
+        """
+        keys = list(dict.fromkeys(keys))
+        
+        # Caché en dos niveles
+        if self.storage_type == "tiered":
+            deleted = {key for key in keys if self._l1.delete(key)}
+            with self._flush_lock:
+                with self._write_lock:
+                    deleted.update(key for key in keys if self._pending_writes.pop(key, None) is not None)
+                deleted.update(self._l2._sqlite_delete_many(keys))
+            return len(deleted)
+        
+        # Caché SQLite
+        elif self.storage_type == "sqlite":
+            return len(self._sqlite_delete_many(keys))
+        
+        return sum(1 for key in keys if self.delete(key))
+    
     def delete(self, key: str) -> bool:
         """
         Elimina un elemento de la caché.
@@ -375,26 +1358,25 @@ class CacheManager:
         Returns:
             True si se eliminó correctamente, False en caso contrario
         """
+        # Caché en dos niveles
+        if self.storage_type == "tiered":
+            return self._tiered_delete(key)
+        
         # Caché en memoria
         if self.storage_type == "memory":
-            if key in self.memory_cache:
-                del self.memory_cache[key]
-                return True
-            return False
+            with self._memory_lock:
+                item = self.memory_cache.pop(key, None)
+                if item is not None:
+                    self._add_size(-item["size"], key)
+                    return True
+                return False
         
         # Caché SQLite
         elif self.storage_type == "sqlite":
             try:
-                conn = sqlite3.connect(str(self.db_path))
-                cursor = conn.cursor()
-                
-                cursor.execute("DELETE FROM cache WHERE key = ?", (key,))
-                deleted = cursor.rowcount > 0
-                
-                conn.commit()
-                conn.close()
-                
-                return deleted
+                conn = self._connection()
+                with conn:
+                    return self._sqlite_delete(conn, key)
                 
             except Exception as e:
                 logger.error(f"Error al eliminar de caché SQLite: {e}")
@@ -403,40 +1385,12 @@ class CacheManager:
         # Caché JSON
         elif self.storage_type == "json":
             try:
-                if not self.json_path.exists():
-                    return False
-                
-                with open(self.json_path, 'r', encoding='utf-8') as f:
-                    index = json.load(f)
-                
-                if key in index["items"]:
-                    # Obtener ID de archivo
-                    file_id = index["items"][key]["file_id"]
-                    
-                    # Eliminar del índice
-                    del index["items"][key]
-                    
-                    # Actualizar índice
-                    index["metadata"]["last_updated"] = time.time()
-                    
-                    with open(self.json_path, 'w', encoding='utf-8') as f:
-                        json.dump(index, f, ensure_ascii=False)
-                    
-                    # Intentar eliminar archivo si no hay más elementos que lo usen
-                    cache_file = self.cache_dir / f"cache_{file_id}.json"
-                    
-                    # Verificar si otros elementos usan el mismo archivo
-                    file_in_use = any(
-                        item["file_id"] == file_id 
-                        for item in index["items"].values()
-                    )
-                    
-                    if not file_in_use and cache_file.exists():
-                        cache_file.unlink()
-                    
-                    return True
-                
-                return False
+                with self._json_lock:
+                    if self._json_forget(key) is None:
+                        return False
+                    self._json_append(self._json_line({"k": key, "d": 1}))
+                self._maybe_compact_json()
+                return True
                 
             except Exception as e:
                 logger.error(f"Error al eliminar de caché JSON: {e}")
@@ -452,6 +1406,11 @@ class CacheManager:
         Returns:
             Número de elementos eliminados
         """
+        # Caché en dos niveles
+        if self.storage_type == "tiered":
+            self._flush_writes()
+            return self._l1.cleanup(force) + self._l2.cleanup(force)
+        
         # Verificar si es necesario realizar limpieza
         current_size = self._get_cache_size()
         
@@ -464,77 +1423,47 @@ class CacheManager:
         
         # Caché en memoria
         if self.storage_type == "memory":
-            # Identificar claves expiradas
-            expired_keys = [
-                k for k, v in self.memory_cache.items() 
-                if v["expires_at"] <= now
-            ]
-            
-            # Eliminar elementos expirados
-            for key in expired_keys:
-                del self.memory_cache[key]
-                items_removed += 1
+            with self._memory_lock:
+                # Identificar claves expiradas
+                expired_keys = [
+                    k for k, v in self.memory_cache.items() 
+                    if v["expires_at"] <= now
+                ]
+                
+                # Eliminar elementos expirados
+                for key in expired_keys:
+                    self._add_size(-self.memory_cache.pop(key)["size"], key)
+                    items_removed += 1
         
         # Caché SQLite
         elif self.storage_type == "sqlite":
             try:
-                conn = sqlite3.connect(str(self.db_path))
-                cursor = conn.cursor()
+                conn = self._connection()
+                self._flush_access_buffer()
                 
                 # Eliminar elementos expirados
-                cursor.execute("DELETE FROM cache WHERE expires_at <= ?", (now,))
-                items_removed = cursor.rowcount
-                
-                # Optimizar base de datos
-                cursor.execute("VACUUM")
+                with conn:
+                    cursor = conn.execute(_SQL_DELETE_EXPIRED, (now,))
+                    items_removed = cursor.rowcount
+                    # Recalcular el tamaño (corrige escrituras de otros procesos)
+                    self._sqlite_resync_sizes(conn)
                 
-                conn.commit()
-                conn.close()
+                # Devolver al sistema las páginas liberadas (VACUUM incremental)
+                if items_removed:
+                    conn.execute("PRAGMA incremental_vacuum").fetchall()
                 
             except Exception as e:
                 logger.error(f"Error al limpiar caché SQLite: {e}")
         
         # Caché JSON
         elif self.storage_type == "json":
-            try:
-                if not self.json_path.exists():
-                    return 0
-                
-                with open(self.json_path, 'r', encoding='utf-8') as f:
-                    index = json.load(f)
-                
-                # Identificar elementos expirados
-                expired_keys = [
-                    k for k, v in index["items"].items() 
-                    if v["expires_at"] <= now
-                ]
-                
-                # Eliminar elementos expirados
+            with self._json_lock:
+                # Los registros expirados no necesitan tombstone: al reabrir se descartan igual
+                expired_keys = [k for k, entry in self._json_index.items() if entry[3] <= now]
                 for key in expired_keys:
-                    file_id = index["items"][key]["file_id"]
-                    del index["items"][key]
-                    items_removed += 1
-                    
-                    # Verificar si otros elementos usan el mismo archivo
-                    file_in_use = any(
-                        item["file_id"] == file_id 
-                        for item in index["items"].values()
-                    )
-                    
-                    # Eliminar archivo si no está en uso
-                    if not file_in_use:
-                        cache_file = self.cache_dir / f"cache_{file_id}.json"
-                        if cache_file.exists():
-                            cache_file.unlink()
-                
-                # Actualizar índice
-                index["metadata"]["last_updated"] = time.time()
-                
-                with open(self.json_path, 'w', encoding='utf-8') as f:
-                    json.dump(index, f, ensure_ascii=False)
-                
-            except Exception as e:
-                logger.error(f"Error al limpiar caché JSON: {e}")
+                    self._json_forget(key)
+                items_removed = len(expired_keys)
+            self._maybe_compact_json()
         
         # Actualizar estadísticas
         self.stats["cleanups_performed"] += 1
@@ -552,36 +1481,41 @@ class CacheManager:
             True si se limpió correctamente, False en caso contrario
         """
         try:
+            # Caché en dos niveles
+            if self.storage_type == "tiered":
+                with self._write_lock:
+                    self._pending_writes.clear()
+                return self._l1.clear() and self._l2.clear()
+            
             # Caché en memoria
             if self.storage_type == "memory":
-                self.memory_cache.clear()
+                with self._memory_lock:
+                    self.memory_cache.clear()
+                    self._reset_sizes()
             
             # Caché SQLite
             elif self.storage_type == "sqlite":
-                conn = sqlite3.connect(str(self.db_path))
-                cursor = conn.cursor()
+                conn = self._connection()
                 
-                cursor.execute("DELETE FROM cache")
-                cursor.execute("VACUUM")
+                with self._size_lock:
+                    self._access_buffer.clear()
+                with conn:
+                    conn.execute("DELETE FROM cache")
+                    self._reset_sizes()
                 
-                conn.commit()
-                conn.close()
+                conn.execute("PRAGMA incremental_vacuum").fetchall()
             
             # Caché JSON
             elif self.storage_type == "json":
-                # Eliminar todos los archivos de caché
-                for file_path in self.cache_dir.glob("cache_*.json"):
-                    file_path.unlink()
-                
-                # Reiniciar índice
-                with open(self.json_path, 'w', encoding='utf-8') as f:
-                    json.dump({
-                        "metadata": {
-                            "created_at": time.time(),
-                            "last_updated": time.time()
-                        },
-                        "items": {}
-                    }, f)
+                with self._json_lock:
+                    if self._active_file is not None:
+                        self._active_file.close()
+                    for segment in list(self._segments):
+                        self._segment_path(segment).unlink(missing_ok=True)
+                    self._json_index.clear()
+                    self._segments.clear()
+                    self._reset_sizes()
+                    self._open_active_segment()
             
             logger.info("Caché completamente limpiada")
             return True
@@ -608,6 +1542,31 @@ class CacheManager:
             "hit_ratio": self._calculate_hit_ratio()
         }
         
+        # Estadísticas por namespace
+        sizes = self._l2._namespace_bytes if self.storage_type == "tiered" else self._namespace_bytes
+        namespaces = {}
+        for name in set(self.namespace_stats) | set(self.namespaces) | set(sizes):
+            counters = self.namespace_stats.get(name, {"hits": 0, "misses": 0, "items_added": 0})
+            lookups = counters["hits"] + counters["misses"]
+            config = self.namespaces.get(name, {})
+            namespaces[name] = {
+                **counters,
+                "hit_ratio": counters["hits"] / lookups if lookups else 0.0,
+                "size_mb": sizes.get(name, 0) / (1024 * 1024),
+                "ttl_seconds": config.get("ttl") or self.ttl_seconds,
+                "max_size_mb": config.get("max_size_mb")
+            }
+        current_stats["namespaces"] = namespaces
+        
+        # Estadísticas de cada nivel
+        if self.storage_type == "tiered":
+            with self._write_lock:
+                pending = len(self._pending_writes)
+            current_stats["tiers"] = {
+                "l1": self._l1.get_stats(),
+                "l2": {**self._l2.get_stats(), "pending_writes": pending}
+            }
+        
         return current_stats
     
     def _calculate_hit_ratio(self) -> float:
@@ -629,6 +1588,11 @@ class CacheManager:
         Returns:
             Número de elementos
         """
+        # Caché en dos niveles (L2 contiene todo lo volcado)
+        if self.storage_type == "tiered":
+            self._flush_writes()
+            return self._l2.count()
+        
         # Caché en memoria
         if self.storage_type == "memory":
             return len(self.memory_cache)
@@ -636,14 +1600,7 @@ class CacheManager:
         # Caché SQLite
         elif self.storage_type == "sqlite":
             try:
-                conn = sqlite3.connect(str(self.db_path))
-                cursor = conn.cursor()
-                
-                cursor.execute("SELECT COUNT(*) FROM cache")
-                count = cursor.fetchone()[0]
-                
-                conn.close()
-                return count
+                return self._connection().execute(_SQL_COUNT).fetchone()[0]
                 
             except Exception as e:
                 logger.error(f"Error al contar elementos en caché SQLite: {e}")
@@ -651,18 +1608,7 @@ class CacheManager:
         
         # Caché JSON
         elif self.storage_type == "json":
-            try:
-                if not self.json_path.exists():
-                    return 0
-                
-                with open(self.json_path, 'r', encoding='utf-8') as f:
-                    index = json.load(f)
-                
-                return len(index["items"])
-                
-            except Exception as e:
-                logger.error(f"Error al contar elementos en caché JSON: {e}")
-                return 0
+            return len(self._json_index)
     
     def purge_expired(self) -> int:
         """
@@ -681,114 +1627,21 @@ class CacheManager:
             True si se compactó correctamente, False en caso contrario
         """
         try:
+            # Caché en dos niveles
+            if self.storage_type == "tiered":
+                self._flush_writes()
+                return self._l2.compact()
+            
             # Caché SQLite
             if self.storage_type == "sqlite":
-                conn = sqlite3.connect(str(self.db_path))
-                cursor = conn.cursor()
-                
-                cursor.execute("VACUUM")
-                
-                conn.commit()
-                conn.close()
+                self._connection().execute("VACUUM")
                 
                 logger.info("Caché SQLite compactada")
                 return True
             
             # Caché JSON
             elif self.storage_type == "json":
-                # Primero eliminar elementos expirados
-                self.cleanup(force=True)
-                
-                if not self.json_path.exists():
-                    return True
-                
-                # Cargar índice actual
-                with open(self.json_path, 'r', encoding='utf-8') as f:
-                    index = json.load(f)
-                
-                # Crear nuevo directorio temporal
-                temp_dir = self.cache_dir / "temp_compact"
-                os.makedirs(temp_dir, exist_ok=True)
-                
-                # Crear nuevo índice
-                new_index = {
-                    "metadata": {
-                        "created_at": index["metadata"]["created_at"],
-                        "last_updated": time.time(),
-                        "compacted_at": time.time()
-                    },
-                    "items": {}
-                }
-                
-                # Agrupar elementos por archivo
-                files_to_items = {}
-                
-                for key, item in index["items"].items():
-                    file_id = item["file_id"]
-                    
-                    if file_id not in files_to_items:
-                        files_to_items[file_id] = []
-                    
-                    files_to_items[file_id].append((key, item))
-                
-                # Procesar cada archivo
-                for file_id, items in files_to_items.items():
-                    # Cargar archivo original
-                    cache_file = self.cache_dir / f"cache_{file_id}.json"
-                    
-                    if not cache_file.exists():
-                        continue
-                    
-                    with open(cache_file, 'r', encoding='utf-8') as f:
-                        cache_data = json.load(f)
-                    
-                    # Crear nuevo archivo compacto
-                    new_file_id = str(int(time.time() * 1000) + len(new_index["items"]))
-                    new_cache_file = temp_dir / f"cache_{new_file_id}.json"
-                    
-                    new_cache_data = {}
-                    
-                    # Copiar elementos al nuevo archivo
-                    for key, item in items:
-                        if key in cache_data:
-                            new_cache_data[key] = cache_data[key]
-                            
-                            # Actualizar índice
-                            new_index["items"][key] = {
-                                **item,
-                                "file_id": new_file_id
-                            }
-                    
-                    # Guardar nuevo archivo
-                    with open(new_cache_file, 'w', encoding='utf-8') as f:
-                        json.dump(new_cache_data, f, ensure_ascii=False)
-                
-                # Guardar nuevo índice en ubicación temporal
-                temp_index_path = temp_dir / "cache_index.json"
-                
-                with open(temp_index_path, 'w', encoding='utf-8') as f:
-                    json.dump(new_index, f, ensure_ascii=False)
-                
-                # Reemplazar archivos originales con los nuevos
-                # Primero hacer backup del índice original
-                backup_path = self.json_path.with_suffix('.json.bak')
-                if self.json_path.exists():
-                    shutil.copy2(self.json_path, backup_path)
-                
-                # Eliminar archivos originales
-                for file_path in self.cache_dir.glob("cache_*.json"):
-                    file_path.unlink()
-                
-                # Mover archivos nuevos
-                for file_path in temp_dir.glob("cache_*.json"):
-                    shutil.move(str(file_path), str(self.cache_dir))
-                
-                # Mover nuevo índice
-                shutil.move(str(temp_index_path), str(self.json_path))
-                
-                # Eliminar directorio temporal
-                shutil.rmtree(temp_dir)
-                
+                self._compact_json_segments()
                 logger.info("Caché JSON compactada")
                 return True
             
@@ -800,14 +1653,41 @@ class CacheManager:
             logger.error(f"Error al compactar caché: {e}")
             return False
     
+    def close(self) -> None:
+        """Detiene el compactador y cierra archivos y conexiones."""
+        if self.storage_type == "tiered":
+            # Volcar lo pendiente antes de cerrar para que sobreviva al reinicio
+            self._flusher_stop.set()
+            self._flush_wakeup.set()
+            self._flush_writes()
+            self._l1.close()
+            self._l2.close()
+        
+        elif self.storage_type == "sqlite":
+            self._flush_access_buffer()
+            conn = getattr(self._local, "conn", None)
+            if conn is not None:
+                conn.close()
+                self._local.conn = None
+        
+        elif self.storage_type == "json":
+            self._compactor_stop.set()
+            self._compact_wakeup.set()
+            with self._json_lock:
+                if self._active_file is not None and not self._active_file.closed:
+                    self._active_file.close()
+    
     def __del__(self):
         """Método destructor para asegurar limpieza de recursos."""
         try:
             # Guardar estadísticas antes de cerrar
-            stats_path = self.cache_dir / "cache_stats.json"
+            if self._persist_stats:
+                stats_path = self.cache_dir / "cache_stats.json"
+                
+                with open(stats_path, 'w', encoding='utf-8') as f:
+                    json.dump(self.get_stats(), f, ensure_ascii=False, indent=2)
             
-            with open(stats_path, 'w', encoding='utf-8') as f:
-                json.dump(self.get_stats(), f, ensure_ascii=False, indent=2)
+            self.close()
                 
         except Exception:
             pass
@@ -1,51 +1,77 @@
 """
 Sistema de puntos de control para recuperación de operaciones de scraping.
+
+El estado se guarda en dos ficheros:
+- Un snapshot JSON con el estado completo (se reescribe solo al compactar).
+- Un journal append-only con una línea JSON por URL procesada, que se escribe
+  por lotes con fsync y se vacía en cada compactación.
+
+Alternativamente, SQLiteCheckpointManager guarda el estado en SQLite (WAL),
+apto para varios hilos y procesos escribiendo en el mismo trabajo.
 """
 
 import os
 import json
 import time
 import logging
+import sqlite3
+import threading
 from pathlib import Path
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Set
 
-from src.core.config import DATA_DIR
+from src.core.config import DATA_DIR, CHECKPOINT_BACKEND
 
 class CheckpointManager:
     """
-    Gestiona puntos de control para el scraping, permitiendo reanudar 
+    Gestiona puntos de control para el scraping, permitiendo reanudar
     el proceso en caso de interrupciones.
     """
     
-    def __init__(self, checkpoint_dir: Optional[str] = None, job_name: str = None):
+    def __init__(
+        self,
+        checkpoint_dir: Optional[str] = None,
+        job_name: str = None,
+        journal_batch_size: int = 20,
+        compact_every: int = 1000
+    ):
         """
         Inicializa el gestor de checkpoints.
         
         Args:
             checkpoint_dir: Directorio donde se guardarán los checkpoints
             job_name: Nombre único para el trabajo actual (ej: nombre del archivo CSV)
+            journal_batch_size: Registros acumulados antes de escribir (y sincronizar) el journal
+            compact_every: Registros mínimos en el journal antes de compactarlo en un snapshot
         """
         if checkpoint_dir is None:
             checkpoint_dir = str(DATA_DIR / "checkpoints")
-            
+        
         if job_name is None:
             job_name = f"job_{int(time.time())}"
-            
+        
         self.checkpoint_dir = Path(checkpoint_dir)
         self.job_name = job_name
         self.checkpoint_file = self.checkpoint_dir / f"{job_name}_checkpoint.json"
+        self.journal_file = self.checkpoint_dir / f"{job_name}_checkpoint.journal"
+        self.journal_batch_size = journal_batch_size
+        self.compact_every = compact_every
         self.checkpoint_data = {
             "job_name": job_name,
             "started_at": time.time(),
             "last_updated": time.time(),
             "processed_urls": {},
-            "completed_rows": [],
+            "completed_rows": set(),  # En disco se guarda como lista ordenada
             "failed_rows": {},
             "total_rows": 0,
             "current_position": 0,
             "is_completed": False
         }
         
+        # Estado del journal
+        self._lock = threading.RLock()
+        self._journal_buffer: List[str] = []
+        self._journal_records = 0  # Registros escritos en el journal desde el último snapshot
+        
         # Crear directorio si no existe
         os.makedirs(self.checkpoint_dir, exist_ok=True)
         
@@ -53,45 +79,144 @@ class CheckpointManager:
         self._load_checkpoint()
     
     def _load_checkpoint(self) -> None:
-        """Carga el checkpoint desde el archivo si existe."""
+        """Carga el snapshot desde el archivo si existe y reaplica el journal."""
         if self.checkpoint_file.exists():
             try:
                 with open(self.checkpoint_file, 'r', encoding='utf-8') as f:
                     loaded_data = json.load(f)
+                    loaded_data["completed_rows"] = set(loaded_data.get("completed_rows", []))
                     self.checkpoint_data.update(loaded_data)
-                    logging.info(f"Checkpoint cargado: {self.job_name} - "
-                                f"Procesadas {len(self.checkpoint_data['completed_rows'])} filas")
             except Exception as e:
                 logging.error(f"Error al cargar checkpoint {self.checkpoint_file}: {e}")
                 # Crear backup del archivo corrupto
                 if self.checkpoint_file.exists():
                     backup_file = self.checkpoint_file.with_suffix('.json.bak')
                     self.checkpoint_file.rename(backup_file)
+        
+        # Reaplicar las entradas del journal posteriores al snapshot
+        if self.journal_file.exists():
+            try:
+                with open(self.journal_file, 'r', encoding='utf-8') as f:
+                    for line in f:
+                        try:
+                            record = json.loads(line)
+                        except json.JSONDecodeError:
+                            # Última línea incompleta tras una interrupción
+                            continue
+                        self._apply_record(record)
+                        self._journal_records += 1
+            except Exception as e:
+                logging.error(f"Error al leer journal {self.journal_file}: {e}")
+        
+        if self.checkpoint_file.exists() or self._journal_records:
+            logging.info(f"Checkpoint cargado: {self.job_name} - "
+                        f"Procesadas {len(self.checkpoint_data['completed_rows'])} filas")
     
-    def save(self) -> None:
-        """Guarda el estado actual del checkpoint."""
-        self.checkpoint_data["last_updated"] = time.time()
+    def _apply_record(self, record: Dict[str, Any]) -> None:
+        """Aplica al estado en memoria un registro de URL procesada."""
+        row_id = record["row_id"]
+        url = record["url"]
+        
+        # Un fallo posterior (ej. al completar un resultado parcial) no deshace
+        # un éxito previo de la misma fila
+        previous = self.checkpoint_data["processed_urls"].get(url)
+        if not record["success"] and previous and previous["success"] and previous["row_id"] == row_id:
+            previous["timestamp"] = record["timestamp"]
+            return
+        
+        self.checkpoint_data["processed_urls"][url] = {
+            "row_id": row_id,
+            "success": record["success"],
+            "timestamp": record["timestamp"],
+            "result": record.get("result") or {},
+            "error": record.get("error"),
+            "partial": record.get("partial", False)
+        }
+        
+        if record["success"]:
+            self.checkpoint_data["completed_rows"].add(row_id)
+            # Eliminar de fallidos si estaba ahí
+            self.checkpoint_data["failed_rows"].pop(str(row_id), None)
+        else:
+            self.checkpoint_data["failed_rows"][str(row_id)] = {
+                "url": url,
+                "error": record.get("error"),
+                "timestamp": record["timestamp"]
+            }
+        
+        # Actualizar posición actual
+        self.checkpoint_data["current_position"] = max(
+            self.checkpoint_data["current_position"],
+            row_id + 1
+        )
+    
+    def _flush_journal(self) -> None:
+        """Escribe en el journal los registros pendientes y los sincroniza en disco."""
+        if not self._journal_buffer:
+            return
         try:
-            # Primero escribir a un archivo temporal
-            temp_file = self.checkpoint_file.with_suffix('.json.tmp')
-            with open(temp_file, 'w', encoding='utf-8') as f:
-                json.dump(self.checkpoint_data, f, ensure_ascii=False, indent=2)
-            
-            # Luego reemplazar el archivo original (más seguro ante interrupciones)
-            if temp_file.exists():
-                if self.checkpoint_file.exists():
-                    self.checkpoint_file.unlink()
-                temp_file.rename(self.checkpoint_file)
+            with open(self.journal_file, 'a', encoding='utf-8') as f:
+                f.write("".join(self._journal_buffer))
+                f.flush()
+                os.fsync(f.fileno())
+            self._journal_records += len(self._journal_buffer)
+            self._journal_buffer = []
         except Exception as e:
-            logging.error(f"Error al guardar checkpoint {self.checkpoint_file}: {e}")
+            logging.error(f"Error al escribir journal {self.journal_file}: {e}")
+    
+    def _compaction_due(self) -> bool:
+        """
+        Indica si conviene compactar el journal en un snapshot.
+        El umbral crece con el tamaño del estado para que el coste amortizado
+        de cada registro se mantenga constante.
+        """
+        threshold = max(self.compact_every, len(self.checkpoint_data["processed_urls"]) // 2)
+        return self._journal_records >= threshold
+    
+    def flush(self) -> None:
+        """Persiste los registros pendientes (y compacta si el journal es grande)."""
+        with self._lock:
+            self._flush_journal()
+            if self._compaction_due():
+                self.save()
+    
+    def save(self) -> None:
+        """Compacta el estado actual en un snapshot y vacía el journal."""
+        with self._lock:
+            self.checkpoint_data["last_updated"] = time.time()
+            try:
+                snapshot = {
+                    **self.checkpoint_data,
+                    "completed_rows": sorted(self.checkpoint_data["completed_rows"])
+                }
+                
+                # Primero escribir a un archivo temporal
+                temp_file = self.checkpoint_file.with_suffix('.json.tmp')
+                with open(temp_file, 'w', encoding='utf-8') as f:
+                    json.dump(snapshot, f, ensure_ascii=False, default=str)
+                    f.flush()
+                    os.fsync(f.fileno())
+                
+                # Luego reemplazar el archivo original de forma atómica
+                os.replace(temp_file, self.checkpoint_file)
+                
+                # El snapshot ya incluye todo lo registrado: vaciar el journal
+                self._journal_buffer = []
+                self._journal_records = 0
+                if self.journal_file.exists():
+                    self.journal_file.unlink()
+            except Exception as e:
+                logging.error(f"Error al guardar checkpoint {self.checkpoint_file}: {e}")
     
     def set_total_rows(self, total: int) -> None:
         """Establece el número total de filas a procesar."""
-        self.checkpoint_data["total_rows"] = total
-        self.save()
+        with self._lock:
+            self.checkpoint_data["total_rows"] = total
+            self.save()
     
-    def mark_url_processed(self, row_id: int, url: str, success: bool, 
-                          result: Optional[Dict] = None, error: Optional[str] = None) -> None:
+    def mark_url_processed(self, row_id: int, url: str, success: bool,
+                          result: Optional[Dict] = None, error: Optional[str] = None,
+                          partial: bool = False) -> None:
         """
         Marca una URL como procesada con su resultado.
         
@@ -101,37 +226,29 @@ class CheckpointManager:
             success: Si el procesamiento fue exitoso
             result: Resultados del scraping (emails, redes, etc.)
             error: Mensaje de error si falló
+            partial: Si el resultado está incompleto porque se agotó el tiempo de la fila
         """
-        self.checkpoint_data["processed_urls"][url] = {
+        record = {
             "row_id": row_id,
+            "url": url,
             "success": success,
             "timestamp": time.time(),
             "result": result or {},
-            "error": error
+            "error": error,
+            "partial": partial
         }
         
-        if success:
-            if row_id not in self.checkpoint_data["completed_rows"]:
-                self.checkpoint_data["completed_rows"].append(row_id)
-                # Eliminar de fallidos si estaba ahí
-                if str(row_id) in self.checkpoint_data["failed_rows"]:
-                    del self.checkpoint_data["failed_rows"][str(row_id)]
-        else:
-            self.checkpoint_data["failed_rows"][str(row_id)] = {
-                "url": url,
-                "error": error,
-                "timestamp": time.time()
-            }
-        
-        # Actualizar posición actual
-        self.checkpoint_data["current_position"] = max(
-            self.checkpoint_data["current_position"], 
-            row_id + 1
-        )
-        
-        # Guardar cada 5 URLs procesadas para no sobrecargar I/O
-        if len(self.checkpoint_data["processed_urls"]) % 5 == 0:
-            self.save()
+        with self._lock:
+            self._apply_record(record)
+            self._journal_buffer.append(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+            
+            # Escribir el journal por lotes para no sobrecargar I/O
+            if len(self._journal_buffer) >= self.journal_batch_size:
+                self._flush_journal()
+                
+                # Compactar periódicamente en un snapshot
+                if self._compaction_due():
+                    self.save()
     
     def is_url_processed(self, url: str) -> bool:
         """Verifica si una URL ya fue procesada."""
@@ -147,17 +264,47 @@ class CheckpointManager:
         
         Args:
             all_row_ids: Lista con todos los IDs de filas
-            
+        
         Returns:
             Lista de IDs de filas pendientes
         """
-        return [row_id for row_id in all_row_ids 
-                if row_id not in self.checkpoint_data["completed_rows"]]
+        completed: Set[int] = self.checkpoint_data["completed_rows"]
+        return [row_id for row_id in all_row_ids if row_id not in completed]
     
     def get_failed_rows(self) -> Dict[int, Dict]:
         """Obtiene las filas que fallaron durante el procesamiento."""
         return {int(k): v for k, v in self.checkpoint_data["failed_rows"].items()}
     
+    def get_partial_rows(self) -> List[int]:
+        """Obtiene las filas completadas con un resultado parcial (tiempo agotado)."""
+        with self._lock:
+            return sorted(
+                entry["row_id"] for entry in self.checkpoint_data["processed_urls"].values()
+                if entry["success"] and entry.get("partial")
+            )
+    
+    def get_completed_results(self) -> Dict[int, Dict]:
+        """
+        Obtiene los resultados guardados de las filas completadas.
+        
+        Returns:
+            Diccionario {row_id: resultado} de las filas completadas con éxito
+        """
+        with self._lock:
+            completed = self.checkpoint_data["completed_rows"]
+            return {
+                entry["row_id"]: entry["result"]
+                for entry in self.checkpoint_data["processed_urls"].values()
+                if entry["success"] and entry["row_id"] in completed and entry["result"]
+            }
+    
+    def get_url_result(self, url: str) -> Optional[Dict]:
+        """Obtiene el resultado guardado de una URL procesada con éxito, si existe."""
+        entry = self.checkpoint_data["processed_urls"].get(url)
+        if entry and entry["success"] and entry["result"]:
+            return entry["result"]
+        return None
+    
     def get_progress(self) -> Dict[str, Any]:
         """Obtiene información sobre el progreso actual."""
         total = self.checkpoint_data["total_rows"]
@@ -169,6 +316,7 @@ class CheckpointManager:
             "total": total,
             "completed": completed,
             "failed": failed,
+            "partial": len(self.get_partial_rows()),
             "pending": pending,
             "percent_complete": (completed / total * 100) if total > 0 else 0,
             "started_at": self.checkpoint_data["started_at"],
@@ -178,9 +326,332 @@ class CheckpointManager:
     
     def mark_completed(self) -> None:
         """Marca el trabajo como completado."""
-        self.checkpoint_data["is_completed"] = True
-        self.save()
+        with self._lock:
+            self.checkpoint_data["is_completed"] = True
+            self.save()
     
     def is_completed(self) -> bool:
         """Verifica si el trabajo está marcado como completado."""
         return self.checkpoint_data["is_completed"]
+
+
+class SQLiteCheckpointManager:
+    """
+    Gestor de checkpoints sobre SQLite en modo WAL.
+    
+    Ofrece la misma interfaz que CheckpointManager, pero es seguro con muchos
+    hilos y con varios procesos trabajando sobre el mismo trabajo: cada hilo usa
+    su propia conexión, las escrituras se acumulan y se confirman por lotes en
+    una sola transacción, y WAL permite lecturas concurrentes con un escritor.
+    """
+    
+    def __init__(
+        self,
+        checkpoint_dir: Optional[str] = None,
+        job_name: str = None,
+        batch_size: int = 50,
+        busy_timeout_ms: int = 30000
+    ):
+        """
+        Inicializa el gestor de checkpoints SQLite.
+        
+        Args:
+            checkpoint_dir: Directorio donde se guardarán los checkpoints
+            job_name: Nombre único para el trabajo actual (ej: nombre del archivo CSV)
+            batch_size: Registros acumulados antes de confirmar un lote
+            busy_timeout_ms: Espera máxima cuando otro proceso tiene el bloqueo de escritura
+        """
+        if checkpoint_dir is None:
+            checkpoint_dir = str(DATA_DIR / "checkpoints")
+            
+        if job_name is None:
+            job_name = f"job_{int(time.time())}"
+            
+        self.checkpoint_dir = Path(checkpoint_dir)
+        self.job_name = job_name
+        self.db_path = self.checkpoint_dir / f"{job_name}_checkpoint.db"
+        self.batch_size = batch_size
+        self.busy_timeout_ms = busy_timeout_ms
+        
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._pending: List[tuple] = []
+        self._flushing: List[List[tuple]] = []  # Lotes retirados de _pending aún sin confirmar
+        self._completed: Set[int] = set()
+        
+        # Crear directorio si no existe
+        os.makedirs(self.checkpoint_dir, exist_ok=True)
+        
+        self._init_db()
+    
+    def _connection(self) -> sqlite3.Connection:
+        """Obtiene la conexión del hilo actual (se crea al primer uso)."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(str(self.db_path), timeout=self.busy_timeout_ms / 1000)
+            conn.execute(f"PRAGMA busy_timeout = {int(self.busy_timeout_ms)}")
+            conn.execute("PRAGMA journal_mode = WAL")
+            conn.execute("PRAGMA synchronous = NORMAL")
+            self._local.conn = conn
+        return conn
+    
+    def _init_db(self) -> None:
+        """Crea las tablas e índices si no existen y registra los metadatos iniciales."""
+        conn = self._connection()
+        with conn:
+            conn.execute('''
+            CREATE TABLE IF NOT EXISTS rows (
+                row_id INTEGER PRIMARY KEY,
+                url TEXT,
+                success INTEGER,
+                timestamp REAL,
+                result TEXT,
+                error TEXT,
+                partial INTEGER DEFAULT 0
+            )
+            ''')
+            # Migrar checkpoints creados antes de registrar resultados parciales
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(rows)")}
+            if "partial" not in columns:
+                conn.execute("ALTER TABLE rows ADD COLUMN partial INTEGER DEFAULT 0")
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_rows_url ON rows (url)')
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_rows_success ON rows (success)')
+            conn.execute('CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)')
+            
+            now = json.dumps(time.time())
+            conn.executemany(
+                "INSERT OR IGNORE INTO meta (key, value) VALUES (?, ?)",
+                [("job_name", json.dumps(self.job_name)), ("started_at", now),
+                 ("last_updated", now), ("total_rows", "0"), ("is_completed", "false")]
+            )
+        
+        completed = self._completed_from_db()
+        self._completed.update(completed)
+        if completed:
+            logging.info(f"Checkpoint cargado: {self.job_name} - Procesadas {len(completed)} filas")
+    
+    def _get_meta(self, key: str, default: Any = None) -> Any:
+        """Lee un valor de la tabla de metadatos."""
+        row = self._connection().execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row else default
+    
+    def _set_meta(self, key: str, value: Any) -> None:
+        """Escribe un valor en la tabla de metadatos."""
+        conn = self._connection()
+        with conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+                (key, json.dumps(value))
+            )
+    
+    def _completed_from_db(self) -> Set[int]:
+        """Obtiene los IDs de filas completadas registradas por cualquier proceso."""
+        cursor = self._connection().execute("SELECT row_id FROM rows WHERE success = 1")
+        return {row[0] for row in cursor}
+    
+    def flush(self) -> None:
+        """Confirma en una sola transacción los registros pendientes."""
+        with self._lock:
+            pending, self._pending = self._pending, []
+            if not pending:
+                return
+            # Sigue visible para is_url_processed hasta que se confirme
+            self._flushing.append(pending)
+        try:
+            conn = self._connection()
+            with conn:
+                # Un fallo posterior no deshace un éxito previo de la misma fila
+                conn.executemany(
+                    """
+                    INSERT INTO rows (row_id, url, success, timestamp, result, error, partial)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                    ON CONFLICT(row_id) DO UPDATE SET
+                        url = excluded.url,
+                        timestamp = excluded.timestamp,
+                        error = CASE WHEN rows.success AND NOT excluded.success
+                                     THEN rows.error ELSE excluded.error END,
+                        result = CASE WHEN excluded.success THEN excluded.result ELSE rows.result END,
+                        partial = CASE WHEN excluded.success THEN excluded.partial ELSE rows.partial END,
+                        success = MAX(rows.success, excluded.success)
+                    """,
+                    pending
+                )
+                conn.execute(
+                    "INSERT OR REPLACE INTO meta (key, value) VALUES ('last_updated', ?)",
+                    (json.dumps(time.time()),)
+                )
+            with self._lock:
+                self._flushing.remove(pending)
+        except Exception as e:
+            logging.error(f"Error al guardar checkpoint {self.db_path}: {e}")
+            # Devolver los registros a la cola para reintentar en el próximo lote
+            with self._lock:
+                self._flushing.remove(pending)
+                self._pending = pending + self._pending
+    
+    def save(self) -> None:
+        """Guarda el estado actual del checkpoint."""
+        self.flush()
+    
+    def set_total_rows(self, total: int) -> None:
+        """Establece el número total de filas a procesar."""
+        self._set_meta("total_rows", total)
+    
+    def mark_url_processed(self, row_id: int, url: str, success: bool,
+                          result: Optional[Dict] = None, error: Optional[str] = None,
+                          partial: bool = False) -> None:
+        """
+        Marca una URL como procesada con su resultado.
+        
+        Args:
+            row_id: ID de la fila (índice)
+            url: URL procesada
+            success: Si el procesamiento fue exitoso
+            result: Resultados del scraping (emails, redes, etc.)
+            error: Mensaje de error si falló
+            partial: Si el resultado está incompleto porque se agotó el tiempo de la fila
+        """
+        record = (
+            row_id, url, int(bool(success)), time.time(),
+            json.dumps(result or {}, ensure_ascii=False, default=str), error, int(bool(partial))
+        )
+        with self._lock:
+            self._pending.append(record)
+            if success:
+                self._completed.add(row_id)
+            batch_ready = len(self._pending) >= self.batch_size
+            
+        if batch_ready:
+            self.flush()
+    
+    def is_url_processed(self, url: str) -> bool:
+        """Verifica si una URL ya fue procesada."""
+        with self._lock:
+            if any(record[1] == url for record in self._pending):
+                return True
+            if any(record[1] == url for batch in self._flushing for record in batch):
+                return True
+        row = self._connection().execute(
+            "SELECT 1 FROM rows WHERE url = ? LIMIT 1", (url,)
+        ).fetchone()
+        return row is not None
+    
+    def is_row_completed(self, row_id: int) -> bool:
+        """Verifica si una fila ya fue completada exitosamente (por cualquier proceso)."""
+        if row_id in self._completed:
+            return True
+        row = self._connection().execute(
+            "SELECT 1 FROM rows WHERE row_id = ? AND success = 1", (row_id,)
+        ).fetchone()
+        if row is not None:
+            self._completed.add(row_id)
+            return True
+        return False
+    
+    def get_pending_rows(self, all_row_ids: List[int]) -> List[int]:
+        """
+        Obtiene las filas pendientes de procesar.
+        
+        Args:
+            all_row_ids: Lista con todos los IDs de filas
+            
+        Returns:
+            Lista de IDs de filas pendientes
+        """
+        self._completed.update(self._completed_from_db())
+        return [row_id for row_id in all_row_ids if row_id not in self._completed]
+    
+    def get_failed_rows(self) -> Dict[int, Dict]:
+        """Obtiene las filas que fallaron durante el procesamiento."""
+        self.flush()
+        cursor = self._connection().execute(
+            "SELECT row_id, url, error, timestamp FROM rows WHERE success = 0"
+        )
+        return {
+            row_id: {"url": url, "error": error, "timestamp": timestamp}
+            for row_id, url, error, timestamp in cursor
+        }
+    
+    def get_partial_rows(self) -> List[int]:
+        """Obtiene las filas completadas con un resultado parcial (tiempo agotado)."""
+        self.flush()
+        cursor = self._connection().execute(
+            "SELECT row_id FROM rows WHERE success = 1 AND partial = 1 ORDER BY row_id"
+        )
+        return [row[0] for row in cursor]
+    
+    def get_completed_results(self) -> Dict[int, Dict]:
+        """
+        Obtiene los resultados guardados de las filas completadas.
+        
+        Returns:
+            Diccionario {row_id: resultado} de las filas completadas con éxito
+        """
+        self.flush()
+        cursor = self._connection().execute("SELECT row_id, result FROM rows WHERE success = 1")
+        results = {}
+        for row_id, result in cursor:
+            result = json.loads(result) if result else {}
+            if result:
+                results[row_id] = result
+        return results
+    
+    def get_url_result(self, url: str) -> Optional[Dict]:
+        """Obtiene el resultado guardado de una URL procesada con éxito, si existe."""
+        self.flush()
+        row = self._connection().execute(
+            "SELECT result FROM rows WHERE url = ? AND success = 1 ORDER BY timestamp DESC LIMIT 1",
+            (url,)
+        ).fetchone()
+        result = json.loads(row[0]) if row and row[0] else None
+        return result or None
+    
+    def get_progress(self) -> Dict[str, Any]:
+        """Obtiene información sobre el progreso actual."""
+        self.flush()
+        completed, failed, partial = self._connection().execute(
+            "SELECT COALESCE(SUM(success = 1), 0), COALESCE(SUM(success = 0), 0), "
+            "COALESCE(SUM(success = 1 AND partial = 1), 0) FROM rows"
+        ).fetchone()
+        total = self._get_meta("total_rows", 0)
+        started_at = self._get_meta("started_at", time.time())
+        
+        return {
+            "total": total,
+            "completed": completed,
+            "failed": failed,
+            "partial": partial,
+            "pending": total - completed,
+            "percent_complete": (completed / total * 100) if total > 0 else 0,
+            "started_at": started_at,
+            "last_updated": self._get_meta("last_updated", started_at),
+            "elapsed_seconds": time.time() - started_at
+        }
+    
+    def mark_completed(self) -> None:
+        """Marca el trabajo como completado."""
+        self.flush()
+        self._set_meta("is_completed", True)
+    
+    def is_completed(self) -> bool:
+        """Verifica si el trabajo está marcado como completado."""
+        return bool(self._get_meta("is_completed", False))
+
+
+def get_checkpoint_manager(job_name: str, backend: Optional[str] = None,
+                           checkpoint_dir: Optional[str] = None):
+    """
+    Crea el gestor de checkpoints configurado.
+    
+    Args:
+        job_name: Nombre único del trabajo
+        backend: "json" o "sqlite" (por defecto CHECKPOINT_BACKEND)
+        checkpoint_dir: Directorio de checkpoints (opcional)
+        
+    Returns:
+        Instancia de CheckpointManager o SQLiteCheckpointManager
+    """
+    backend = backend or CHECKPOINT_BACKEND
+    if backend == "sqlite":
+        return SQLiteCheckpointManager(checkpoint_dir=checkpoint_dir, job_name=job_name)
+    return CheckpointManager(checkpoint_dir=checkpoint_dir, job_name=job_name)
@@ -0,0 +1,318 @@
+"""
+Circuit breaker por host / IP y clase de error.
+
+Tras CIRCUIT_FAILURE_THRESHOLD fallos consecutivos de la misma clase
+(timeout, red, conexión rechazada...) en un host, o en la IP que comparte con
+otros sitios (hosting compartido, CDN), el circuito se abre: el planificador
+aplaza las filas de ese host / IP en lugar de dejar que los hilos agoten sus
+timeouts. Pasado el enfriamiento el circuito queda semiabierto y deja pasar
+una única fila de prueba: si funciona se cierra, si falla vuelve a abrirse con
+un enfriamiento mayor.
+"""
+
+import time
+import logging
+import ipaddress
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+import dns.resolver
+import dns.exception
+from selenium.common.exceptions import TimeoutException
+
+from src.core.error_handler import ErrorHandler
+from src.core.config import (
+    CIRCUIT_FAILURE_THRESHOLD, CIRCUIT_COOLDOWN_SECONDS, CIRCUIT_MAX_COOLDOWN_SECONDS,
+    CIRCUIT_DNS_TIMEOUT, CIRCUIT_IP_CACHE_TTL, CIRCUIT_IP_CACHE_SIZE
+)
+
+logger = logging.getLogger("circuit_breaker")
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+# Segundos que se aplazan las demás filas mientras la fila de prueba está en curso
+PROBE_WAIT_SECONDS = 10.0
+
+# Segundos que se recuerda que un host no resuelve (puede ser un fallo puntual del DNS)
+NEGATIVE_IP_TTL_SECONDS = 300.0
+
+
+class _Circuit:
+    """Estado de un circuito (un host o IP y una clase de error)."""
+
+    def __init__(self, cooldown: float):
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.cooldown = cooldown
+        self.probe_in_flight = False
+
+
+class CircuitBreaker:
+    """
+    Registro de circuitos por host / IP y clase de error. Es seguro entre hilos.
+    """
+
+    def __init__(
+        self,
+        failure_threshold: int = CIRCUIT_FAILURE_THRESHOLD,
+        cooldown_seconds: float = CIRCUIT_COOLDOWN_SECONDS,
+        max_cooldown_seconds: float = CIRCUIT_MAX_COOLDOWN_SECONDS,
+        error_handler: Optional[ErrorHandler] = None,
+        dns_timeout: float = CIRCUIT_DNS_TIMEOUT,
+        ip_cache_ttl: float = CIRCUIT_IP_CACHE_TTL,
+        ip_cache_size: int = CIRCUIT_IP_CACHE_SIZE
+    ):
+        """
+        Inicializa el circuit breaker.
+
+        Args:
+            failure_threshold: Fallos consecutivos de una clase que abren el circuito
+            cooldown_seconds: Tiempo que el circuito permanece abierto antes de probar
+            max_cooldown_seconds: Enfriamiento máximo tras pruebas fallidas
+            error_handler: Gestor de errores en el que se clasifican los fallos y se
+                contabilizan las aperturas (error_stats)
+            dns_timeout: Segundos máximos para resolver la IP de un host
+            ip_cache_ttl: Segundos que se recuerda la IP resuelta de un host
+            ip_cache_size: Hosts cuya IP se recuerda como máximo
+        """
+        self.failure_threshold = failure_threshold
+        self.cooldown_seconds = cooldown_seconds
+        self.max_cooldown_seconds = max_cooldown_seconds
+        self.error_handler = error_handler or ErrorHandler()
+        self.dns_timeout = dns_timeout
+        self.ip_cache_ttl = ip_cache_ttl
+        self.ip_cache_size = max(1, ip_cache_size)
+
+        self._lock = threading.Lock()
+        self._circuits: Dict[str, Dict[str, _Circuit]] = {}  # ámbito -> clase de error -> circuito
+        self._ip_lock = threading.Lock()
+        self._ips: "OrderedDict[str, Tuple[Optional[str], float]]" = OrderedDict()  # host -> (IP, caducidad), LRU
+        self.stats = {"opened": 0, "deferred": 0, "probes": 0}
+
+    # Claves --------------------------------------------------------------
+
+    @staticmethod
+    def _host(url: str) -> str:
+        """Host de una URL en minúsculas."""
+        return (urlsplit(url.strip()).hostname or "").lower()
+
+    def _cached_ip(self, host: str) -> Tuple[bool, Optional[str]]:
+        """
+        Consulta la caché de IPs sin resolver.
+
+        Returns:
+            Tupla (conocida y vigente, IP o None si el host no resuelve)
+        """
+        with self._ip_lock:
+            entry = self._ips.get(host)
+            if entry is None:
+                return False, None
+            ip, expires_at = entry
+            if expires_at <= time.time():
+                del self._ips[host]
+                return False, None
+            self._ips.move_to_end(host)
+            return True, ip
+
+    def known_ip(self, host: str) -> Optional[str]:
+        """IP ya resuelta de un host, o None si no se conoce (nunca consulta el DNS)."""
+        return self._cached_ip(host)[1]
+
+    def resolve(self, host: str) -> Optional[str]:
+        """
+        Resuelve la IP de un host con un timeout de dns_timeout segundos; None si
+        no resuelve. El resultado se recuerda ip_cache_ttl segundos (los fallos,
+        NEGATIVE_IP_TTL_SECONDS). Puede bloquear: se llama desde los hilos de
+        trabajo, no desde el planificador.
+        """
+        found, ip = self._cached_ip(host)
+        if found:
+            return ip
+
+        try:
+            ip = str(ipaddress.ip_address(host))
+        except ValueError:
+            try:
+                answer = dns.resolver.resolve(host, "A", lifetime=self.dns_timeout)
+                ip = answer[0].to_text()
+            except (dns.exception.DNSException, OSError, UnicodeError, ValueError):
+                ip = None
+
+        ttl = self.ip_cache_ttl if ip else NEGATIVE_IP_TTL_SECONDS
+        with self._ip_lock:
+            self._ips[host] = (ip, time.time() + ttl)
+            self._ips.move_to_end(host)
+            while len(self._ips) > self.ip_cache_size:
+                self._ips.popitem(last=False)
+        return ip
+
+    def _scopes(self, url: str, resolve: bool) -> List[str]:
+        """
+        Ámbitos afectados por una URL: su host y, si se conoce, su IP.
+
+        Args:
+            url: URL de la fila
+            resolve: Si se resuelve la IP cuando aún no se conoce (puede
+                bloquear); si es False solo se usa la IP ya resuelta
+        """
+        host = self._host(url)
+        if not host:
+            return []
+        scopes = [f"host:{host}"]
+        ip = self.resolve(host) if resolve else self.known_ip(host)
+        if ip:
+            scopes.append(f"ip:{ip}")
+        return scopes
+
+    def error_class(self, error: Exception) -> Optional[str]:
+        """
+        Clase de error que cuenta para el circuito, o None si el error es de la
+        propia operación y no dice nada sobre la salud del host.
+        """
+        reason = self.error_handler.permanent_error_reason(error)
+        if reason:
+            return reason
+        if isinstance(error, TimeoutException) or "timed out" in str(error).lower() \
+                or "timeout" in str(error).lower():
+            return "timeout"
+        if self.error_handler.is_retriable_error(error):
+            return "network"
+        return None
+
+    # Estado --------------------------------------------------------------
+
+    def allow(self, url: str) -> Tuple[bool, float]:
+        """
+        Consulta si se puede procesar ahora una URL. Si un circuito está
+        semiabierto, la primera llamada se convierte en la fila de prueba.
+
+        Args:
+            url: URL de la fila
+
+        Returns:
+            Tupla (permitido, segundos hasta que merezca la pena volver a preguntar)
+        """
+        # Lo llama el planificador: solo se usa la IP ya resuelta por los hilos
+        # de trabajo (record_success / record_failure), sin consultar el DNS
+        scopes = self._scopes(url, resolve=False)
+        now = time.time()
+        with self._lock:
+            wait = 0.0
+            probes = []
+            for scope in scopes:
+                for circuit in self._circuits.get(scope, {}).values():
+                    if circuit.state == CLOSED:
+                        continue
+                    remaining = circuit.opened_at + circuit.cooldown - now
+                    if circuit.state == OPEN and remaining > 0:
+                        wait = max(wait, remaining)
+                    elif circuit.probe_in_flight:
+                        wait = max(wait, PROBE_WAIT_SECONDS)
+                    else:
+                        probes.append(circuit)
+
+            if wait > 0:
+                self.stats["deferred"] += 1
+                return False, wait
+
+            for circuit in probes:
+                circuit.state = HALF_OPEN
+                circuit.probe_in_flight = True
+            if probes:
+                self.stats["probes"] += 1
+            return True, 0.0
+
+    def record_success(self, url: str) -> None:
+        """Registra que una URL se procesó bien: cierra los circuitos de su host e IP."""
+        scopes = self._scopes(url, resolve=True)
+        with self._lock:
+            for scope in scopes:
+                for circuit in self._circuits.get(scope, {}).values():
+                    if circuit.state != CLOSED:
+                        logger.info(f"Circuito cerrado: {scope}")
+                    circuit.state = CLOSED
+                    circuit.failures = 0
+                    circuit.cooldown = self.cooldown_seconds
+                    circuit.probe_in_flight = False
+
+    def record_failure(self, url: str, error: Exception) -> None:
+        """
+        Registra el fallo de una URL en los circuitos de su host e IP.
+
+        Args:
+            url: URL de la fila
+            error: Excepción con la que falló
+        """
+        error_class = self.error_class(error)
+
+        # Un DNS inexistente no tiene IP con la que agrupar hermanos
+        scopes = self._scopes(url, resolve=error_class not in (None, "dns"))
+        now = time.time()
+        with self._lock:
+            for scope in scopes:
+                if error_class is None:
+                    # El error no dice nada del host: liberar la prueba para otra fila
+                    for circuit in self._circuits.get(scope, {}).values():
+                        circuit.probe_in_flight = False
+                    continue
+
+                circuits = self._circuits.setdefault(scope, {})
+                circuit = circuits.get(error_class)
+                if circuit is None:
+                    circuit = circuits[error_class] = _Circuit(self.cooldown_seconds)
+                circuit.failures += 1
+                if circuit.state == CLOSED and circuit.failures >= self.failure_threshold:
+                    self._open(scope, error_class, circuit, now)
+
+                # Prueba fallida: volver a abrir con más enfriamiento
+                for probed_class, probed in circuits.items():
+                    if probed.state == HALF_OPEN:
+                        probed.cooldown = min(probed.cooldown * 2, self.max_cooldown_seconds)
+                        self._open(scope, probed_class, probed, now)
+
+    def _open(self, scope: str, error_class: str, circuit: _Circuit, now: float) -> None:
+        """Abre un circuito y lo contabiliza en las estadísticas de errores."""
+        circuit.state = OPEN
+        circuit.opened_at = now
+        circuit.probe_in_flight = False
+        self.stats["opened"] += 1
+
+        stat_key = f"CircuitOpen[{error_class}]"
+        self.error_handler.error_stats[stat_key] = self.error_handler.error_stats.get(stat_key, 0) + 1
+        self.error_handler.logger.warning(
+            f"[CIRCUITO] Abierto para {scope} tras {circuit.failures} fallos "
+            f"({error_class}); se aplaza {circuit.cooldown:.0f}s"
+        )
+
+    def get_open_circuits(self) -> List[Dict[str, Any]]:
+        """Circuitos abiertos o semiabiertos."""
+        with self._lock:
+            return [
+                {"scope": scope, "error_class": error_class, "state": c.state,
+                 "failures": c.failures, "cooldown": c.cooldown}
+                for scope, circuits in self._circuits.items()
+                for error_class, c in circuits.items() if c.state != CLOSED
+            ]
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Estadísticas del circuit breaker."""
+        open_circuits = self.get_open_circuits()
+        return {**self.stats, "open_circuits": len(open_circuits)}
+
+
+_breaker: Optional[CircuitBreaker] = None
+_breaker_lock = threading.Lock()
+
+
+def get_circuit_breaker() -> CircuitBreaker:
+    """Obtiene la instancia compartida del circuit breaker."""
+    global _breaker
+    with _breaker_lock:
+        if _breaker is None:
+            _breaker = CircuitBreaker()
+        return _breaker
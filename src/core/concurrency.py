@@ -0,0 +1,222 @@
+"""
+Control adaptativo de la concurrencia del scraping (AIMD).
+
+En lugar de un número fijo de hilos, el límite de filas en curso (y de
+navegadores abiertos) se ajusta cada cierto tiempo según lo observado:
+
+- Incremento aditivo (+1) si en la ventana el pool estuvo lleno, la latencia
+  de las páginas no se ha degradado respecto a la mejor observada, la tasa de
+  errores temporales es baja y hay memoria libre para otro navegador.
+- Reducción multiplicativa si la latencia se dispara, crecen los errores
+  temporales (timeouts, red) o el sistema está bajo presión de memoria o CPU,
+  contando la memoria de los procesos de Chrome lanzados por el scraper.
+
+Así cada máquina encuentra su concurrencia en lugar de ajustarla a mano.
+"""
+
+import math
+import time
+import logging
+import threading
+from statistics import median
+from typing import Dict, Any, List, Optional
+
+from src.core.resource_manager import ResourceManager
+from src.core.config import (
+    CONCURRENCY_MIN_WORKERS, CONCURRENCY_MAX_WORKERS, CONCURRENCY_ADJUST_INTERVAL,
+    CONCURRENCY_MIN_SAMPLES, CONCURRENCY_LATENCY_TOLERANCE, CONCURRENCY_MIN_LATENCY,
+    CONCURRENCY_MAX_ERROR_RATE, CONCURRENCY_DECREASE_FACTOR, CONCURRENCY_MAX_SYSTEM_MEMORY_PERCENT,
+    CONCURRENCY_MAX_SYSTEM_CPU_PERCENT
+)
+
+logger = logging.getLogger("concurrency")
+
+# Memoria (MB) que se supone a un navegador mientras no haya ninguno abierto
+DEFAULT_DRIVER_MB = 300.0
+
+
+class ConcurrencyController:
+    """
+    Límite AIMD de filas en curso. El planificador consulta `limit` antes de
+    lanzar una fila y los hilos informan de cada fila con `record`. Es seguro
+    entre hilos.
+    """
+
+    def __init__(
+        self,
+        initial: int,
+        min_workers: int = CONCURRENCY_MIN_WORKERS,
+        max_workers: int = CONCURRENCY_MAX_WORKERS,
+        adjust_interval: float = CONCURRENCY_ADJUST_INTERVAL,
+        min_samples: int = CONCURRENCY_MIN_SAMPLES,
+        latency_tolerance: float = CONCURRENCY_LATENCY_TOLERANCE,
+        min_latency: float = CONCURRENCY_MIN_LATENCY,
+        max_error_rate: float = CONCURRENCY_MAX_ERROR_RATE,
+        decrease_factor: float = CONCURRENCY_DECREASE_FACTOR,
+        resource_manager: Optional[ResourceManager] = None
+    ):
+        """
+        Inicializa el controlador.
+
+        Args:
+            initial: Límite inicial de filas en curso
+            min_workers: Límite mínimo
+            max_workers: Límite máximo (tamaño del pool de hilos)
+            adjust_interval: Segundos mínimos entre ajustes
+            min_samples: Filas terminadas necesarias en la ventana para ajustar
+            latency_tolerance: Cuántas veces la mejor latencia mediana se tolera
+                antes de considerar que la concurrencia degrada las páginas
+            min_latency: Suelo de la mejor latencia, para que unas pocas filas
+                muy rápidas no hagan parecer degradada cualquier página real
+            max_error_rate: Proporción máxima de errores temporales en la ventana
+            decrease_factor: Factor aplicado al límite en una reducción
+            resource_manager: Gestor de recursos del que se leen memoria y CPU
+        """
+        self.min_workers = max(1, min_workers)
+        self.max_workers = max(self.min_workers, max_workers)
+        self.adjust_interval = adjust_interval
+        self.min_samples = min_samples
+        self.latency_tolerance = latency_tolerance
+        self.min_latency = min_latency
+        self.max_error_rate = max_error_rate
+        self.decrease_factor = decrease_factor
+        self.resource_manager = resource_manager or ResourceManager(enable_monitoring=False)
+
+        self._lock = threading.Lock()
+        self._limit = float(min(max(initial, self.min_workers), self.max_workers))
+        self._latencies: List[float] = []
+        self._errors = 0
+        self._saturated = False
+        self._best_latency: Optional[float] = None
+        self._last_adjust = time.time()
+        self.stats = {"increases": 0, "decreases": 0, "peak_limit": int(self._limit)}
+
+    @property
+    def limit(self) -> int:
+        """Número de filas que pueden estar en curso ahora."""
+        with self._lock:
+            return int(self._limit)
+
+    def record(self, latency: float, transient_error: bool = False) -> None:
+        """
+        Registra una fila terminada.
+
+        Args:
+            latency: Duración del procesamiento de la fila (segundos); solo de
+                filas que cargaron alguna página
+            transient_error: Si falló con un error temporal (timeout, red...)
+        """
+        with self._lock:
+            if transient_error:
+                self._errors += 1
+            else:
+                self._latencies.append(latency)
+
+    def mark_saturated(self) -> None:
+        """Indica que el pool llegó al límite con filas esperando (hay demanda para crecer)."""
+        with self._lock:
+            self._saturated = True
+
+    def _resource_pressure(self, drivers: int) -> Dict[str, Any]:
+        """
+        Lee memoria y CPU del sistema y del árbol de procesos.
+
+        Args:
+            drivers: Navegadores abiertos ahora
+
+        Returns:
+            Diccionario con overloaded (hay que reducir), headroom (cabe otro
+            navegador) y el motivo
+        """
+        status = self.resource_manager.check_resources()
+        memory = status["memory"]
+        cpu = status["cpu"]
+
+        if status["memory_warning"] or memory["system_used_percent"] > CONCURRENCY_MAX_SYSTEM_MEMORY_PERCENT:
+            return {"overloaded": True, "headroom": False,
+                    "reason": f"memoria {memory['system_used_percent']:.0f}% "
+                              f"(navegadores {memory['children_pss_mb']:.0f} MB)"}
+        if cpu["system_cpu_percent"] > CONCURRENCY_MAX_SYSTEM_CPU_PERCENT:
+            return {"overloaded": True, "headroom": False,
+                    "reason": f"CPU {cpu['system_cpu_percent']:.0f}%"}
+
+        # Memoria que ocupa de media un navegador (Chrome y sus procesos hijos)
+        driver_mb = memory["children_pss_mb"] / drivers if drivers else DEFAULT_DRIVER_MB
+        headroom = memory["system_available_mb"] > 2 * max(driver_mb, DEFAULT_DRIVER_MB / 2)
+        return {"overloaded": False, "headroom": headroom,
+                "reason": "" if headroom else f"sin memoria libre para otro navegador ({driver_mb:.0f} MB)"}
+
+    def adjust(self, drivers: int = 0) -> Optional[str]:
+        """
+        Recalcula el límite si ha pasado el intervalo y hay muestras suficientes.
+
+        Args:
+            drivers: Navegadores abiertos ahora (para estimar la memoria de uno más)
+
+        Returns:
+            Descripción del cambio si el límite cambió, o None
+        """
+        with self._lock:
+            now = time.time()
+            samples = len(self._latencies) + self._errors
+            if now - self._last_adjust < self.adjust_interval or samples < self.min_samples:
+                return None
+
+            latencies, self._latencies = self._latencies, []
+            errors, self._errors = self._errors, 0
+            saturated, self._saturated = self._saturated, False
+            self._last_adjust = now
+            previous = self._limit
+
+        # Fuera del lock: el gestor de recursos registra sus propias estadísticas
+        pressure = self._resource_pressure(drivers)
+
+        error_rate = errors / samples
+        window_latency = median(latencies) if latencies else None
+
+        with self._lock:
+            if window_latency is not None:
+                # La mejor latencia se olvida poco a poco por si cambian los sitios
+                if self._best_latency is None or window_latency < self._best_latency:
+                    self._best_latency = max(window_latency, self.min_latency)
+                else:
+                    self._best_latency *= 1.05
+
+            reason = None
+            if pressure["overloaded"]:
+                reason = pressure["reason"]
+            elif error_rate > self.max_error_rate:
+                reason = f"errores temporales {error_rate:.0%}"
+            elif window_latency is not None and self._best_latency \
+                    and window_latency > self._best_latency * self.latency_tolerance:
+                reason = f"latencia {window_latency:.1f}s (mejor {self._best_latency:.1f}s)"
+
+            if reason:
+                self._limit = max(float(self.min_workers), math.floor(self._limit * self.decrease_factor))
+            elif saturated and pressure["headroom"]:
+                self._limit = min(float(self.max_workers), self._limit + 1)
+                reason = f"latencia {window_latency or 0:.1f}s, errores {error_rate:.0%}"
+
+            if int(self._limit) == int(previous):
+                return None
+
+            if self._limit > previous:
+                self.stats["increases"] += 1
+            else:
+                self.stats["decreases"] += 1
+            self.stats["peak_limit"] = max(self.stats["peak_limit"], int(self._limit))
+            change = f"{int(previous)} → {int(self._limit)} ({reason})"
+
+        logger.info(f"Concurrencia ajustada: {change}")
+        return change
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Estadísticas del controlador."""
+        with self._lock:
+            return {
+                **self.stats,
+                "limit": int(self._limit),
+                "min_workers": self.min_workers,
+                "max_workers": self.max_workers,
+                "best_latency": self._best_latency
+            }
@@ -34,6 +34,66 @@ STATS_SHEET = "statistics"
 EMAIL_VERIFICATION_MODE = "avanzado"
 MAX_WORKERS = 4  # Número de hilos para scraping
 DEFAULT_TIMEOUT = 15  # Timeout por defecto para carga de páginas
+CHECKPOINT_BACKEND = "json"  # Almacenamiento de checkpoints: "json" (snapshot + journal) o "sqlite" (WAL)
+CHECKPOINT_FLUSH_INTERVAL = 30.0  # Segundos entre volcados del checkpoint a disco durante el scraping
+URL_STORE_ENABLED = True  # Reutilizar resultados de sitios ya scrapeados en cualquier archivo
+URL_STORE_MAX_AGE_DAYS = 30  # Antigüedad máxima (días) de un resultado antes de volver a scrapear
+MEMO_CACHE_ENABLED = True  # Memorizar extracciones y verificaciones en la caché compartida
+MEMO_CACHE_SIZE_MB = 300  # Tamaño máximo (MB) de la caché compartida (resultados y snapshots de páginas)
+MEMO_EXTRACTION_TTL = 24 * 3600  # Segundos que se reutiliza la extracción de una URL
+MEMO_VERIFICATION_TTL = 7 * 24 * 3600  # Segundos que se reutiliza la verificación de un email o dominio
+PAGE_SNAPSHOT_ENABLED = True  # Descargar por HTTP con revalidación (ETag/Last-Modified) antes de usar Selenium
+PAGE_SNAPSHOT_TTL_DAYS = 90  # Días que se conserva el snapshot de una página para revalidarlo
+PAGE_SNAPSHOT_MAX_SIZE_MB = 200  # Tamaño máximo (MB) de los snapshots de páginas en la caché
+PAGE_SNAPSHOT_MAX_PAGE_KB = 2048  # Páginas más grandes (KB) no se guardan
+DEAD_HOST_TTL_HOURS = 24  # Horas que se omite un host tras un error permanente confirmado (DNS, conexión rechazada, TLS)
+DEAD_HOST_FIRST_STRIKE_MINUTES = 10  # Minutos que se omite un host tras su primer error permanente (aún sin confirmar)
+DEAD_HOST_CONFIRM_SECONDS = 60  # Segundos mínimos entre dos errores permanentes de un host para confirmarlo
+DEAD_HOST_PROBE_HOST = "www.google.com"  # Host de referencia: si no resuelve, el error es de la red local y no del sitio
+SCRAPE_MAX_ATTEMPTS = 4  # Intentos por fila ante errores temporales (el primero más 3 reintentos)
+RETRY_BASE_DELAY = 2.0  # Espera (segundos) antes del primer reintento de una fila
+RETRY_BACKOFF_FACTOR = 2.0  # Factor de incremento de la espera entre reintentos
+RETRY_MAX_DELAY = 120.0  # Espera máxima (segundos) entre reintentos
+CIRCUIT_FAILURE_THRESHOLD = 5  # Fallos consecutivos de un host / IP que abren su circuito
+CIRCUIT_COOLDOWN_SECONDS = 60  # Segundos que se aplazan las filas de un circuito abierto antes de probar
+CIRCUIT_MAX_COOLDOWN_SECONDS = 900  # Aplazamiento máximo tras pruebas fallidas
+CIRCUIT_MAX_DEFERRALS = 20  # Aplazamientos de una fila antes de descartarla
+CIRCUIT_DNS_TIMEOUT = 3.0  # Segundos máximos para resolver la IP de un host (agrupar hosts por IP)
+CIRCUIT_IP_CACHE_TTL = 3600  # Segundos que se recuerda la IP resuelta de un host
+CIRCUIT_IP_CACHE_SIZE = 10000  # Hosts cuya IP se recuerda como máximo (se olvidan los menos usados)
+ROW_DEADLINE_SECONDS = 60  # Tiempo máximo (segundos) por intento de una fila: descarga, extracción y verificación
+ADAPTIVE_CONCURRENCY_ENABLED = True  # Ajustar los hilos (y navegadores) según latencia, errores y recursos; MAX_WORKERS es el valor inicial
+CONCURRENCY_MIN_WORKERS = 1  # Hilos mínimos con la concurrencia adaptativa
+CONCURRENCY_MAX_WORKERS = 12  # Hilos máximos con la concurrencia adaptativa
+CONCURRENCY_ADJUST_INTERVAL = 10.0  # Segundos mínimos entre ajustes de la concurrencia
+CONCURRENCY_MIN_SAMPLES = 4  # Filas terminadas necesarias para ajustar la concurrencia
+CONCURRENCY_LATENCY_TOLERANCE = 2.0  # Veces la mejor latencia mediana a partir de las que se reduce la concurrencia
+CONCURRENCY_MIN_LATENCY = 1.0  # Latencia (segundos) por debajo de la que no se toma la mejor latencia de referencia
+CONCURRENCY_MAX_ERROR_RATE = 0.2  # Proporción de errores temporales a partir de la que se reduce la concurrencia
+CONCURRENCY_DECREASE_FACTOR = 0.5  # Factor aplicado a los hilos en cada reducción
+CONCURRENCY_MAX_SYSTEM_MEMORY_PERCENT = 90.0  # Memoria del sistema (%) a partir de la que se reduce la concurrencia
+CONCURRENCY_MAX_SYSTEM_CPU_PERCENT = 90.0  # CPU del sistema (%) a partir de la que se reduce la concurrencia
+DRIVER_MAX_MEMORY_MB = 1024  # Memoria (PSS, MB) de un driver y sus procesos de Chrome a partir de la que se recicla
+DRIVER_CHECK_INTERVAL = 30.0  # Segundos entre revisiones de la memoria de los drivers
+RESOURCE_SAMPLE_INTERVAL = 2.0  # Segundos entre muestras del hilo de muestreo de recursos (memoria, CPU, árbol de procesos)
+RESOURCE_HISTORY_SIZE = 300  # Muestras de recursos que se conservan en el historial
+RATE_LIMIT_ENABLED = True  # Limitar el ritmo de filas por host e IP e intercalar hosts en la cola
+HOST_REQUESTS_PER_SECOND = 0.5  # Filas por segundo que se lanzan contra un mismo host
+HOST_BURST = 2  # Filas seguidas que se permiten contra un host antes de aplicar el ritmo
+IP_REQUESTS_PER_SECOND = 2.0  # Filas por segundo contra una misma IP (hosting compartido)
+IP_BURST = 6  # Filas seguidas que se permiten contra una IP antes de aplicar el ritmo
+RATE_LIMIT_PENALTY_SECONDS = 30.0  # Pausa de un host que responde 429/503 sin Retry-After
+RATE_LIMIT_PRUNE_SECONDS = 60.0  # Cada cuánto se descartan los buckets llenos (hosts / IPs inactivos)
+
+# Parámetros de enmascarado
+MASKING_STREAMING_MIN_MB = 10  # Tamaño (MB) a partir del cual los Excel se enmascaran en streaming
+MASKING_SCHEMA_TTL_DAYS = 90  # Días que se recuerdan las columnas sensibles detectadas por esquema
+MASKING_SCHEMA_CACHE_DIR = os.environ.get("MASKING_SCHEMA_CACHE_DIR", str(DATA_DIR / "cache" / "masking"))  # Caché de esquemas de enmascarado ("" la desactiva)
+MASKING_CSV_CHUNKED_MIN_MB = 100  # Tamaño (MB) a partir del cual los CSV se enmascaran por bloques
+MASKING_CHUNK_ROWS = 100_000  # Filas por bloque en el enmascarado de CSV por bloques
+MASKING_WORKERS = max(1, (os.cpu_count() or 2) - 1)  # Procesos para enmascarar bloques de CSV
+DEMO_SAMPLE_MODE = True  # Generar demos a partir de una muestra en lugar del archivo completo
+DEMO_SAMPLE_ROWS = 100  # Filas de la muestra (estratificada por sector, top por reseñas)
 
 # Parámetros de imágenes
 IMAGE_SIZE = (1200, 630)
@@ -0,0 +1,188 @@
+"""
+Caché negativa de hosts inaccesibles.
+
+Cuando un sitio falla con un error permanente (el dominio no resuelve, la
+conexión se rechaza o el TLS no es válido) se anota su host en la caché
+compartida. Mientras dure la anotación, los extractores y la descarga HTTP
+devuelven un resultado vacío de inmediato en lugar de volver a cargar la
+página.
+
+Un corte breve de la red local o del DNS produce los mismos errores, así que
+un primer fallo solo anota el host durante DEAD_HOST_FIRST_STRIKE_MINUTES; se
+anota DEAD_HOST_TTL_HOURS cuando vuelve a fallar pasados al menos
+DEAD_HOST_CONFIRM_SECONDS. Los errores de DNS y de conexión no se anotan si
+tampoco resuelve un host de referencia (la red local está caída).
+"""
+
+import time
+import logging
+import threading
+from typing import Dict, Any, Optional
+from urllib.parse import urlsplit
+
+import dns.resolver
+import dns.exception
+
+from src.core.memoize import get_shared_cache
+from src.core.config import (
+    DEAD_HOST_TTL_HOURS, DEAD_HOST_FIRST_STRIKE_MINUTES, DEAD_HOST_CONFIRM_SECONDS, DEAD_HOST_PROBE_HOST
+)
+
+logger = logging.getLogger("dead_hosts")
+
+DEAD_HOST_NAMESPACE = "dead"
+
+# Segundos que se reutiliza el resultado de la comprobación de la red local
+NETWORK_CHECK_INTERVAL = 30.0
+
+# Segundos máximos de la consulta DNS de la comprobación de la red local
+NETWORK_CHECK_TIMEOUT = 2.0
+
+
+def url_host(url: str) -> str:
+    """Obtiene el host de una URL (o de un host suelto) en minúsculas, sin puerto ni credenciales."""
+    url = url.strip()
+    if "://" not in url:
+        url = f"//{url}"
+    return (urlsplit(url).hostname or "").lower()
+
+
+class DeadHostCache:
+    """
+    Registro de hosts con errores permanentes, sobre la caché compartida
+    (persiste entre ejecuciones hasta que caduca).
+    """
+
+    def __init__(
+        self,
+        ttl_hours: float = DEAD_HOST_TTL_HOURS,
+        first_strike_minutes: float = DEAD_HOST_FIRST_STRIKE_MINUTES,
+        confirm_seconds: float = DEAD_HOST_CONFIRM_SECONDS,
+        probe_host: Optional[str] = DEAD_HOST_PROBE_HOST
+    ):
+        """
+        Inicializa la caché negativa.
+
+        Args:
+            ttl_hours: Horas durante las que un host confirmado se considera inaccesible
+            first_strike_minutes: Minutos que se omite un host tras su primer fallo
+            confirm_seconds: Segundos mínimos entre dos fallos para confirmar un host
+            probe_host: Host que debe resolver para anotar errores de DNS o
+                conexión (None para no comprobar la red local)
+        """
+        self.ttl_seconds = int(ttl_hours * 3600)
+        self.first_strike_seconds = int(first_strike_minutes * 60)
+        self.confirm_seconds = confirm_seconds
+        self.probe_host = probe_host
+        self.cache = get_shared_cache()
+        self.cache.register_namespace(DEAD_HOST_NAMESPACE, ttl=self.ttl_seconds)
+        self.stats = {"marked": 0, "suspected": 0, "short_circuits": 0, "network_down": 0}
+
+        self._network_lock = threading.Lock()
+        self._network_checked_at = 0.0
+        self._network_ok = True
+
+    def get(self, url: str) -> Optional[Dict[str, Any]]:
+        """
+        Consulta si el host de una URL está anotado como inaccesible.
+
+        Args:
+            url: URL (o host) a consultar
+
+        Returns:
+            Diccionario con reason, error y marked_at, o None si el host no está anotado
+        """
+        host = url_host(url)
+        if not host:
+            return None
+
+        entry = self.cache.get(f"{DEAD_HOST_NAMESPACE}:{host}")
+        if entry is not None:
+            self.stats["short_circuits"] += 1
+        return entry
+
+    def is_dead(self, url: str) -> bool:
+        """Indica si el host de una URL está anotado como inaccesible."""
+        return self.get(url) is not None
+
+    def network_ok(self) -> bool:
+        """
+        Comprueba (como mucho cada NETWORK_CHECK_INTERVAL segundos) que el host
+        de referencia resuelve, es decir, que la red local y el DNS funcionan.
+        """
+        if not self.probe_host:
+            return True
+        with self._network_lock:
+            if time.time() - self._network_checked_at < NETWORK_CHECK_INTERVAL:
+                return self._network_ok
+            try:
+                dns.resolver.resolve(self.probe_host, "A", lifetime=NETWORK_CHECK_TIMEOUT)
+                self._network_ok = True
+            except dns.exception.DNSException:
+                self._network_ok = False
+            self._network_checked_at = time.time()
+            return self._network_ok
+
+    def mark_dead(self, url: str, reason: str, error: str = "") -> None:
+        """
+        Anota el host de una URL como inaccesible: durante first_strike_minutes
+        tras el primer fallo y durante ttl_hours si vuelve a fallar pasados al
+        menos confirm_seconds.
+
+        Args:
+            url: URL (o host) que falló
+            reason: Motivo del error permanente ("dns", "refused", "tls")
+            error: Mensaje del error original
+        """
+        host = url_host(url)
+        if not host:
+            return
+
+        # Sin red local todos los hosts fallarían igual: no anotar ninguno
+        if reason in ("dns", "refused") and not self.network_ok():
+            self.stats["network_down"] += 1
+            logger.warning(f"Error de {reason} en {host} con la red local caída: no se anota")
+            return
+
+        # El primer fallo queda registrado como sospecha durante ttl_hours
+        now = time.time()
+        strike_key = f"{DEAD_HOST_NAMESPACE}:strike:{host}"
+        strike = self.cache.get(strike_key)
+        confirmed = strike is not None and now - strike["first_at"] >= self.confirm_seconds
+        if strike is None:
+            self.cache.set(strike_key, {"first_at": now}, ttl=self.ttl_seconds)
+
+        ttl = self.ttl_seconds if confirmed else self.first_strike_seconds
+        self.cache.set(f"{DEAD_HOST_NAMESPACE}:{host}", {
+            "reason": reason,
+            "error": error[:200],
+            "marked_at": now,
+            "confirmed": confirmed
+        }, ttl=ttl)
+        if confirmed:
+            self.stats["marked"] += 1
+            logger.info(f"Host inaccesible ({reason}), se omitirá durante {self.ttl_seconds // 3600}h: {host}")
+        else:
+            self.stats["suspected"] += 1
+            logger.info(f"Host posiblemente inaccesible ({reason}), se omitirá durante "
+                        f"{self.first_strike_seconds // 60} min: {host}")
+
+    def forget(self, url: str) -> None:
+        """Elimina la anotación del host de una URL (ej. tras recuperarse)."""
+        host = url_host(url)
+        if host:
+            self.cache.delete(f"{DEAD_HOST_NAMESPACE}:{host}")
+            self.cache.delete(f"{DEAD_HOST_NAMESPACE}:strike:{host}")
+
+
+_dead_hosts: Optional[DeadHostCache] = None
+_dead_hosts_lock = threading.Lock()
+
+
+def get_dead_hosts() -> DeadHostCache:
+    """Obtiene la instancia compartida de la caché negativa de hosts."""
+    global _dead_hosts
+    with _dead_hosts_lock:
+        if _dead_hosts is None:
+            _dead_hosts = DeadHostCache()
+        return _dead_hosts
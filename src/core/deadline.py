@@ -0,0 +1,67 @@
+"""
+Presupuesto de tiempo por fila.
+
+Un Deadline se crea al empezar a procesar una fila y se pasa a la descarga,
+a los extractores y a la verificación de emails. Cada espera (carga de la
+página, esperas explícitas, DNS) se recorta al tiempo restante; si el
+presupuesto se agota, las etapas pendientes se saltan y la fila se marca como
+parcial en lugar de alargarse sin límite.
+"""
+
+import time
+from typing import List, Optional
+
+from src.core.config import ROW_DEADLINE_SECONDS
+
+
+class Deadline:
+    """Límite de tiempo absoluto para el procesamiento de una fila."""
+
+    def __init__(self, seconds: float = ROW_DEADLINE_SECONDS):
+        """
+        Inicializa el presupuesto.
+
+        Args:
+            seconds: Segundos disponibles desde ahora
+        """
+        self.budget = seconds
+        self.expires_at = time.monotonic() + seconds
+        self.partial = False
+        self.skipped_stages: List[str] = []
+
+    def remaining(self) -> float:
+        """Segundos que quedan del presupuesto (0 si se agotó)."""
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def expired(self) -> bool:
+        """Indica si el presupuesto se agotó."""
+        return self.remaining() <= 0
+
+    def clip(self, timeout: float, minimum: float = 0.0) -> float:
+        """
+        Recorta una espera al tiempo restante.
+
+        Args:
+            timeout: Espera deseada (segundos)
+            minimum: Espera mínima a devolver (ej. 1 para timeouts de Selenium)
+
+        Returns:
+            Espera a usar
+        """
+        return max(minimum, min(timeout, self.remaining()))
+
+    def mark_partial(self, stage: str) -> None:
+        """
+        Registra que una etapa no se completó por falta de tiempo.
+
+        Args:
+            stage: Nombre de la etapa (ej. "emails", "social", "verify")
+        """
+        self.partial = True
+        if stage not in self.skipped_stages:
+            self.skipped_stages.append(stage)
+
+
+def remaining_or(deadline: Optional[Deadline], timeout: float) -> float:
+    """Espera recortada al presupuesto si lo hay, o la espera completa si no."""
+    return deadline.clip(timeout) if deadline is not None else timeout
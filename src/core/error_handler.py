@@ -31,6 +31,22 @@ class ErrorHandler:
         "ERR_SSL_PROTOCOL_ERROR", "ERR_TIMED_OUT"
     )
     
+    # Errores permanentes del host (reintentar no sirve): motivo -> patrones
+    PERMANENT_ERRORS = {
+        "dns": (
+            "ERR_NAME_NOT_RESOLVED", "NameResolutionError", "Failed to resolve",
+            "Name or service not known", "nodename nor servname", "getaddrinfo failed"
+        ),
+        "refused": (
+            "ERR_CONNECTION_REFUSED", "Connection refused", "ConnectionRefusedError",
+            "ERR_ADDRESS_UNREACHABLE"
+        ),
+        "tls": (
+            "ERR_SSL_PROTOCOL_ERROR", "ERR_SSL_VERSION_OR_CIPHER_MISMATCH",
+            "ERR_CERT_", "ERR_BAD_SSL_CLIENT_AUTH_CERT"
+        ),
+    }
+    
     def __init__(self, log_file: Optional[str] = None):
         """
         Inicializa el gestor de errores.
@@ -88,7 +104,10 @@ class ErrorHandler:
             self.recent_errors.pop(0)
         
         # Determinar nivel de gravedad
-        if isinstance(error, (TimeoutException, ConnectionError)) or any(
+        if self.permanent_error_reason(error):
+            log_level = logging.WARNING
+            category = "PERMANENTE"
+        elif isinstance(error, (TimeoutException, ConnectionError)) or any(
             net_err in error_msg for net_err in self.NETWORK_ERRORS
         ):
             log_level = logging.WARNING
@@ -110,6 +129,43 @@ class ErrorHandler:
         # Registrar en el logger
         self.logger.log(log_level, log_message)
     
+    def permanent_error_reason(self, error: Exception) -> Optional[str]:
+        """
+        Determina si un error indica que el host no es accesible de forma
+        permanente (DNS inexistente, conexión rechazada o TLS inválido).
+        
+        Args:
+            error: La excepción a evaluar
+            
+        Returns:
+            Motivo ("dns", "refused", "tls") o None si el error no es permanente
+        """
+        if isinstance(error, ConnectionRefusedError):
+            return "refused"
+        
+        error_msg = f"{type(error).__name__}: {error}"
+        for reason, patterns in self.PERMANENT_ERRORS.items():
+            if any(pattern in error_msg for pattern in patterns):
+                return reason
+        return None
+    
+    def classify_error(self, error: Exception) -> str:
+        """
+        Clasifica un error según si tiene sentido reintentarlo.
+        
+        Args:
+            error: La excepción a evaluar
+            
+        Returns:
+            "permanent" (no se reintenta nunca), "transient" (se puede reintentar)
+            u "other" (error de la propia operación)
+        """
+        if self.permanent_error_reason(error):
+            return "permanent"
+        if self.is_retriable_error(error):
+            return "transient"
+        return "other"
+    
     def is_retriable_error(self, error: Exception) -> bool:
         """
         Determina si un error puede ser reintentado.
@@ -120,6 +176,10 @@ class ErrorHandler:
         Returns:
             True si el error es temporal y se puede reintentar
         """
+        # Los errores permanentes del host no se reintentan nunca
+        if self.permanent_error_reason(error):
+            return False
+        
         # Errores de red son generalmente reintentables
         if isinstance(error, (TimeoutException, ConnectionError)):
             return True
@@ -158,9 +218,9 @@ class ErrorHandler:
                 current_delay = delay
                 
                 # Extraer URL del contexto si está disponible
-                url = kwargs.get('url', 'unknown')
-                if not url and args and isinstance(args[0], str):
-                    url = args[0]
+                url = kwargs.get('url')
+                if not url:
+                    url = args[0] if args and isinstance(args[0], str) else 'unknown'
                 
                 for attempt in range(max_retries + 1):
                     try:
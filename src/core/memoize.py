@@ -0,0 +1,179 @@
+"""
+Memorización de funciones sobre la caché compartida (CacheManager).
+
+El decorador @cached guarda el resultado de una función bajo la clave
+'<namespace>:<key_fn(*args, **kwargs)>'. Las llamadas concurrentes con la misma
+clave se agrupan (single-flight): solo un hilo ejecuta la función y el resto
+espera su resultado en lugar de repetir el trabajo.
+"""
+
+import atexit
+import logging
+import functools
+import threading
+from typing import Any, Callable, Dict, Optional
+
+from src.core.config import DATA_DIR, MEMO_CACHE_ENABLED, MEMO_CACHE_SIZE_MB
+
+logger = logging.getLogger("memoize")
+
+_MISSING = object()
+
+_cache = None
+_cache_lock = threading.Lock()
+
+# Cálculos en curso por clave (single-flight)
+_inflight: Dict[str, "_Flight"] = {}
+_inflight_lock = threading.Lock()
+
+# Marca por hilo para no guardar el resultado de la llamada en curso
+_local = threading.local()
+
+
+class _Flight:
+    """Cálculo en curso de una clave, compartido con los hilos que la esperan."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value: Any = None
+        self.error: Optional[BaseException] = None
+        self.skipped = False
+
+
+def get_shared_cache():
+    """
+    Obtiene la caché compartida de resultados (L1 en memoria sobre SQLite).
+
+    Returns:
+        Instancia de CacheManager
+    """
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            from src.core.cache_manager import CacheManager
+            _cache = CacheManager(
+                cache_dir=str(DATA_DIR / "cache" / "memo"),
+                max_size_mb=MEMO_CACHE_SIZE_MB,
+                storage_type="tiered"
+            )
+            # Volcar las escrituras diferidas (write-behind) al salir
+            atexit.register(_cache.close)
+        return _cache
+
+
+def skip_cache() -> None:
+    """
+    Indica que el resultado de la función memorizada en curso no debe guardarse
+    (ej. un valor por defecto devuelto tras un error). La marca se propaga a las
+    funciones memorizadas que la llamaron.
+    """
+    _local.skip = True
+
+
+def reset_skip() -> None:
+    """Borra la marca de skip_cache del hilo (antes de una serie de llamadas memorizadas)."""
+    _local.skip = False
+
+
+def cache_skipped() -> bool:
+    """
+    Indica si alguna función llamada desde el hilo (o las que esta llamó) pidió
+    no guardar su resultado desde el último reset_skip(): su resultado es un
+    valor por defecto tras un error, no un resultado real.
+    """
+    return getattr(_local, "skip", False)
+
+
+def _default_key(func: Callable) -> Callable[..., str]:
+    """Clave por defecto: nombre de la función y representación de los argumentos."""
+    def make_key(*args, **kwargs) -> str:
+        parts = [repr(arg) for arg in args]
+        parts += [f"{name}={value!r}" for name, value in sorted(kwargs.items())]
+        return f"{func.__module__}.{func.__qualname__}({','.join(parts)})"
+    return make_key
+
+
+def cached(namespace: str, ttl: Optional[int] = None,
+           key_fn: Optional[Callable[..., str]] = None):
+    """
+    Decorador que memoriza el resultado de una función en la caché compartida.
+
+    Las excepciones no se guardan: se propagan al hilo que ejecutó la función y
+    a los que esperaban el mismo resultado. Los hilos que esperan lo hacen como
+    mucho hasta su propio plazo (argumento 'deadline', si la función lo recibe)
+    y no reutilizan un resultado que el hilo que calculó no quiso guardar
+    (skip_cache): lo calculan con su propio presupuesto.
+
+    Args:
+        namespace: Namespace de la caché (prefijo de las claves)
+        ttl: Tiempo de vida de los resultados (segundos); por defecto el del namespace
+        key_fn: Función que recibe los mismos argumentos y devuelve la clave
+            (por defecto el nombre de la función y la representación de sus argumentos)
+
+    Returns:
+        Decorador
+    """
+    def decorator(func):
+        make_key = key_fn or _default_key(func)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not MEMO_CACHE_ENABLED:
+                return func(*args, **kwargs)
+
+            key = f"{namespace}:{make_key(*args, **kwargs)}"
+            cache = get_shared_cache()
+            value = cache.get(key, _MISSING)
+            if value is not _MISSING:
+                return value
+
+            # Unirse al cálculo en curso de la misma clave, si lo hay
+            with _inflight_lock:
+                flight = _inflight.get(key)
+                leader = flight is None
+                if leader:
+                    flight = _inflight[key] = _Flight()
+
+            def compute():
+                """Ejecuta la función y guarda el resultado salvo que pida lo contrario."""
+                outer_skip = getattr(_local, "skip", False)
+                _local.skip = False
+                try:
+                    value = func(*args, **kwargs)
+                    if not _local.skip:
+                        cache.set(key, value, ttl=ttl)
+                    return value, _local.skip
+                finally:
+                    # Un resultado no guardado tampoco debe guardarse en la función que lo usa
+                    _local.skip = outer_skip or _local.skip
+
+            if not leader:
+                deadline = kwargs.get("deadline")
+                finished = flight.done.wait(deadline.remaining() if deadline is not None else None)
+                if finished and flight.error is not None:
+                    raise flight.error
+                if finished and not flight.skipped:
+                    return flight.value
+                # El resultado del otro hilo no vale (error tragado o su plazo
+                # agotado) o este hilo ya no puede esperar más: calcularlo aquí
+                return compute()[0]
+
+            try:
+                # Otro hilo pudo terminar el cálculo entre la consulta y el registro
+                value = cache.get(key, _MISSING)
+                if value is _MISSING:
+                    value, flight.skipped = compute()
+                flight.value = value
+                return value
+            except BaseException as e:
+                flight.error = e
+                raise
+            finally:
+                with _inflight_lock:
+                    _inflight.pop(key, None)
+                flight.done.set()
+
+        wrapper.cache_namespace = namespace
+        return wrapper
+
+    return decorator
@@ -0,0 +1,177 @@
+"""
+Contabilidad de recursos del árbol de procesos.
+
+La mayor parte de la memoria del scraping no la usa el proceso de Python sino
+los chromedriver y los procesos de Chrome (navegador, renderizadores, GPU)
+que cuelgan de ellos. Este módulo suma RSS, PSS y CPU de todos los
+descendientes del proceso actual y los agrupa por driver (a partir del PID de
+cada chromedriver), para que el pool de drivers pueda reciclar los que más
+consumen y los monitores puedan alertar.
+
+PSS reparte la memoria compartida entre los procesos que la comparten, así
+que no cuenta varias veces las bibliotecas de Chrome; donde no está disponible
+(fuera de Linux o sin permisos) se usa RSS.
+"""
+
+import os
+import time
+import logging
+import threading
+from typing import Dict, Any, Optional, Tuple
+
+import psutil
+
+logger = logging.getLogger("process_tree")
+
+MB = 1024 * 1024
+
+
+def _empty_usage() -> Dict[str, float]:
+    """Acumulador de uso vacío."""
+    return {"rss_mb": 0.0, "pss_mb": 0.0, "cpu_percent": 0.0, "processes": 0}
+
+
+class ProcessTreeSampler:
+    """
+    Mide un proceso y todos sus descendientes. Conserva los objetos
+    psutil.Process entre muestras para que el CPU de cada proceso se calcule
+    sobre el intervalo desde la muestra anterior. Es seguro entre hilos.
+    """
+
+    def __init__(self, root_pid: Optional[int] = None):
+        """
+        Inicializa el muestreador.
+
+        Args:
+            root_pid: PID raíz del árbol (por defecto el proceso actual)
+        """
+        self.root = psutil.Process(root_pid or os.getpid())
+        self._lock = threading.Lock()
+        self._procs: Dict[int, psutil.Process] = {self.root.pid: self.root}
+
+    def _tracked(self, proc: psutil.Process) -> psutil.Process:
+        """Devuelve el objeto Process conservado para un PID (o empieza a conservarlo)."""
+        tracked = self._procs.get(proc.pid)
+        if tracked is None:
+            tracked = self._procs[proc.pid] = proc
+            # La primera lectura de CPU solo fija el punto de partida
+            try:
+                tracked.cpu_percent(interval=None)
+            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                pass
+        return tracked
+
+    @staticmethod
+    def _measure(proc: psutil.Process, include_pss: bool) -> Optional[Tuple[int, int, float]]:
+        """
+        Mide un proceso.
+
+        Returns:
+            Tupla (rss, pss, cpu %) en bytes, o None si el proceso ya no existe
+        """
+        try:
+            rss = pss = None
+            if include_pss:
+                try:
+                    info = proc.memory_full_info()
+                    rss = info.rss
+                    pss = getattr(info, "pss", None) or getattr(info, "uss", None)
+                except psutil.AccessDenied:
+                    pass
+            if rss is None:
+                rss = proc.memory_info().rss
+            return rss, pss if pss is not None else rss, proc.cpu_percent(interval=None)
+        except (psutil.NoSuchProcess, psutil.ZombieProcess):
+            return None
+        except psutil.AccessDenied:
+            return 0, 0, 0.0
+
+    @staticmethod
+    def _add(usage: Dict[str, float], measure: Tuple[int, int, float]) -> None:
+        """Suma la medida de un proceso a un acumulador."""
+        rss, pss, cpu = measure
+        usage["rss_mb"] += rss / MB
+        usage["pss_mb"] += pss / MB
+        usage["cpu_percent"] += cpu
+        usage["processes"] += 1
+
+    def sample(self, groups: Optional[Dict[str, int]] = None, include_pss: bool = True) -> Dict[str, Any]:
+        """
+        Mide el árbol de procesos.
+
+        Args:
+            groups: Nombre de grupo -> PID raíz del grupo (ej. el chromedriver de
+                cada driver); cada grupo suma su raíz y sus descendientes
+            include_pss: Si se lee PSS (más costoso que RSS)
+
+        Returns:
+            Diccionario con "self" (proceso raíz), "children" (todos los
+            descendientes), "total", "groups" (uso por grupo y si su raíz sigue
+            viva), "ungrouped" (descendientes fuera de los grupos) y "timestamp"
+        """
+        groups = groups or {}
+        with self._lock:
+            try:
+                descendants = self.root.children(recursive=True)
+            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                descendants = []
+
+            # Asignar cada descendiente al grupo de su raíz
+            group_of: Dict[int, str] = {}
+            by_pid = {proc.pid: proc for proc in descendants}
+            for name, pid in groups.items():
+                proc = by_pid.get(pid)
+                if proc is None:
+                    continue
+                group_of[pid] = name
+                try:
+                    for child in proc.children(recursive=True):
+                        group_of[child.pid] = name
+                except (psutil.NoSuchProcess, psutil.AccessDenied):
+                    pass
+
+            result = {
+                "self": _empty_usage(),
+                "children": _empty_usage(),
+                "total": _empty_usage(),
+                "groups": {name: {**_empty_usage(), "pid": pid, "alive": pid in by_pid}
+                           for name, pid in groups.items()},
+                "ungrouped": _empty_usage(),
+                "timestamp": time.time()
+            }
+
+            measure = self._measure(self.root, include_pss)
+            if measure:
+                self._add(result["self"], measure)
+                self._add(result["total"], measure)
+
+            alive = {self.root.pid}
+            for proc in descendants:
+                measure = self._measure(self._tracked(proc), include_pss)
+                if measure is None:
+                    continue
+                alive.add(proc.pid)
+                self._add(result["children"], measure)
+                self._add(result["total"], measure)
+                name = group_of.get(proc.pid)
+                self._add(result["groups"][name] if name else result["ungrouped"], measure)
+
+            # Olvidar los procesos que ya terminaron
+            for pid in list(self._procs):
+                if pid not in alive:
+                    del self._procs[pid]
+
+            return result
+
+
+_sampler: Optional[ProcessTreeSampler] = None
+_sampler_lock = threading.Lock()
+
+
+def get_process_tree() -> ProcessTreeSampler:
+    """Obtiene el muestreador compartido del árbol del proceso actual."""
+    global _sampler
+    with _sampler_lock:
+        if _sampler is None:
+            _sampler = ProcessTreeSampler()
+        return _sampler
@@ -0,0 +1,218 @@
+"""
+Limitación de ritmo por host e IP con token buckets.
+
+Cada host y cada IP (varios sitios en el mismo hosting compartido) tienen un
+bucket que se rellena a un ritmo fijo y admite una pequeña ráfaga. Una fila
+solo se lanza si hay token en el bucket de su host y en el de su IP (cuando
+los hilos de trabajo ya la han resuelto); si no, el planificador pasa a la
+fila de otro host en lugar de esperar (ver RetryScheduler.pop_ready). Un host
+que responde 429 o 503 queda en pausa durante su Retry-After. Los buckets
+que vuelven a estar llenos se descartan: uno nuevo empieza igual de lleno.
+"""
+
+import time
+import logging
+import threading
+from typing import Dict, Any, Callable, List, Optional, Tuple
+
+from src.core.dead_hosts import url_host
+from src.core.circuit_breaker import get_circuit_breaker
+from src.core.config import (
+    HOST_REQUESTS_PER_SECOND, HOST_BURST, IP_REQUESTS_PER_SECOND, IP_BURST, RATE_LIMIT_PENALTY_SECONDS,
+    RATE_LIMIT_PRUNE_SECONDS
+)
+
+logger = logging.getLogger("rate_limiter")
+
+
+class RateLimitedError(ConnectionError):
+    """El servidor pidió bajar el ritmo (429, o 503 con Retry-After); la fila se reintenta."""
+
+
+class TokenBucket:
+    """Bucket de tokens con pausa opcional (no es seguro entre hilos por sí solo)."""
+
+    def __init__(self, rate: float, capacity: float):
+        """
+        Inicializa el bucket lleno.
+
+        Args:
+            rate: Tokens que se añaden por segundo
+            capacity: Tokens máximos (ráfaga)
+        """
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+
+    def wait_time(self, now: float) -> float:
+        """Segundos hasta que haya un token disponible (0 si ya lo hay)."""
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if now < self.paused_until:
+            return self.paused_until - now
+        if self.tokens >= 1:
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    def take(self) -> None:
+        """Consume un token (tras comprobar wait_time)."""
+        self.tokens -= 1
+
+    def is_idle(self, now: float) -> bool:
+        """True si el bucket está lleno y sin pausa (equivale a uno recién creado)."""
+        self.wait_time(now)
+        return self.tokens >= self.capacity and now >= self.paused_until
+
+
+class RateLimiter:
+    """
+    Token buckets por host y por IP. Es seguro entre hilos.
+    """
+
+    def __init__(
+        self,
+        host_rate: float = HOST_REQUESTS_PER_SECOND,
+        host_burst: float = HOST_BURST,
+        ip_rate: float = IP_REQUESTS_PER_SECOND,
+        ip_burst: float = IP_BURST,
+        resolver: Optional[Callable[[str], Optional[str]]] = None
+    ):
+        """
+        Inicializa el limitador.
+
+        Args:
+            host_rate: Filas por segundo contra un host
+            host_burst: Ráfaga máxima contra un host
+            ip_rate: Filas por segundo contra una IP
+            ip_burst: Ráfaga máxima contra una IP
+            resolver: Función host -> IP ya conocida (None si no se conoce); sin
+                ella solo se limita por host. No debe bloquear: acquire se llama
+                desde el planificador con su lock tomado
+        """
+        self.host_rate = host_rate
+        self.host_burst = host_burst
+        self.ip_rate = ip_rate
+        self.ip_burst = ip_burst
+        self.resolver = resolver
+
+        self._lock = threading.Lock()
+        self._buckets: Dict[str, TokenBucket] = {}  # "host:..." / "ip:..." -> bucket
+        self._last_prune = time.monotonic()
+        self.stats = {"granted": 0, "throttled": 0, "refunded": 0, "penalties": 0, "pruned": 0}
+
+    def _bucket(self, scope: str) -> TokenBucket:
+        """Bucket de un ámbito (se crea lleno la primera vez)."""
+        bucket = self._buckets.get(scope)
+        if bucket is None:
+            if scope.startswith("ip:"):
+                bucket = TokenBucket(self.ip_rate, self.ip_burst)
+            else:
+                bucket = TokenBucket(self.host_rate, self.host_burst)
+            self._buckets[scope] = bucket
+        return bucket
+
+    def _scopes(self, url: str) -> List[str]:
+        """Ámbitos de una URL: su host y, si ya se conoce, su IP."""
+        host = url_host(url)
+        if not host:
+            return []
+        scopes = [f"host:{host}"]
+        ip = self.resolver(host) if self.resolver else None
+        if ip:
+            scopes.append(f"ip:{ip}")
+        return scopes
+
+    def _prune(self, now: float) -> None:
+        """Descarta los buckets llenos y sin pausa (llamar con el lock tomado)."""
+        if now - self._last_prune < RATE_LIMIT_PRUNE_SECONDS:
+            return
+        self._last_prune = now
+        idle = [scope for scope, bucket in self._buckets.items() if bucket.is_idle(now)]
+        for scope in idle:
+            del self._buckets[scope]
+        self.stats["pruned"] += len(idle)
+
+    def acquire(self, url: str) -> Tuple[bool, float]:
+        """
+        Intenta tomar un token del host y de la IP de una URL, sin esperar.
+
+        Args:
+            url: URL de la fila
+
+        Returns:
+            Tupla (concedido, segundos hasta que merezca la pena volver a intentarlo)
+        """
+        # La IP se consulta fuera del lock
+        scopes = self._scopes(url)
+        with self._lock:
+            now = time.monotonic()
+            self._prune(now)
+            buckets = [self._bucket(scope) for scope in scopes]
+            wait = max((bucket.wait_time(now) for bucket in buckets), default=0.0)
+            if wait > 0:
+                self.stats["throttled"] += 1
+                return False, wait
+
+            # Solo se consume si todos los ámbitos tienen token
+            for bucket in buckets:
+                bucket.take()
+            self.stats["granted"] += 1
+            return True, 0.0
+
+    def refund(self, url: str) -> None:
+        """
+        Devuelve los tokens de una fila que se concedió pero no llegó a
+        lanzarse (ej. se aplazó por tener el circuito abierto).
+
+        Args:
+            url: URL de la fila
+        """
+        scopes = self._scopes(url)
+        with self._lock:
+            for scope in scopes:
+                bucket = self._buckets.get(scope)
+                if bucket is not None:
+                    bucket.tokens = min(bucket.capacity, bucket.tokens + 1)
+            self.stats["refunded"] += 1
+
+    def penalize(self, url: str, seconds: Optional[float] = None) -> None:
+        """
+        Pausa un host que ha pedido bajar el ritmo (429 / 503).
+
+        Args:
+            url: URL que recibió la respuesta
+            seconds: Retry-After del servidor (por defecto RATE_LIMIT_PENALTY_SECONDS)
+        """
+        host = url_host(url)
+        if not host:
+            return
+        seconds = RATE_LIMIT_PENALTY_SECONDS if seconds is None else seconds
+        with self._lock:
+            bucket = self._bucket(f"host:{host}")
+            bucket.paused_until = max(bucket.paused_until, time.monotonic() + seconds)
+            bucket.tokens = 0
+            self.stats["penalties"] += 1
+        logger.info(f"Host {host} pide bajar el ritmo: pausa de {seconds:.0f}s")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Estadísticas del limitador."""
+        with self._lock:
+            return {**self.stats, "buckets": len(self._buckets)}
+
+
+_limiter: Optional[RateLimiter] = None
+_limiter_lock = threading.Lock()
+
+
+def get_rate_limiter() -> RateLimiter:
+    """
+    Obtiene el limitador compartido. Usa las IPs que ya resolvió el circuit
+    breaker en los hilos de trabajo (nunca consulta el DNS).
+    """
+    global _limiter
+    with _limiter_lock:
+        if _limiter is None:
+            _limiter = RateLimiter(resolver=get_circuit_breaker().known_ip)
+        return _limiter
@@ -1,7 +1,9 @@
 """
 Sistema de gestión de recursos para optimizar el uso de memoria y CPU.
 Proporciona mecanismos para controlar el consumo de recursos durante
-operaciones intensivas de scraping.
+operaciones intensivas de scraping. Las lecturas de memoria y CPU salen del
+último snapshot del muestreo en segundo plano (ver resource_sampler), así que
+no bloquean a quien las consulta.
 """
 
 import os
@@ -12,6 +14,8 @@ import threading
 from typing import Dict, Any, Optional, Callable, List
 from functools import wraps
 
+from src.core.resource_sampler import get_resource_sampler
+
 logger = logging.getLogger("resource_manager")
 
 class ResourceManager:
@@ -42,6 +46,7 @@ class ResourceManager:
         self.check_interval_seconds = check_interval_seconds
         
         self.process = psutil.Process(os.getpid())
+        self.sampler = get_resource_sampler()
         self.monitoring_thread = None
         self.stop_monitoring = threading.Event()
         
@@ -62,56 +67,59 @@ class ResourceManager:
     
     def get_memory_usage(self) -> Dict[str, float]:
         """
-        Obtiene información sobre el uso actual de memoria.
+        Obtiene información sobre el uso actual de memoria (del último
+        snapshot del muestreador, sin medir).
         
         Returns:
             Diccionario con información de uso de memoria
         """
-        # Información del proceso actual
-        process_memory = self.process.memory_info()
+        snapshot = self.sampler.snapshot()
+        process = snapshot["process"]
+        system_memory = snapshot["memory"]
         
-        # Información del sistema
-        system_memory = psutil.virtual_memory()
+        # Árbol de procesos: chromedriver y los procesos de Chrome que lanza
+        tree = snapshot["tree"]
+        children = tree["children"]
         
-        # Calcular porcentajes
-        process_percent = process_memory.rss / system_memory.total * 100
+        # Calcular porcentajes (el árbol con PSS, para no contar varias veces
+        # la memoria compartida entre los procesos de Chrome)
+        process_percent = process["rss_mb"] / system_memory["total_mb"] * 100
+        tree_percent = tree["total"]["pss_mb"] / system_memory["total_mb"] * 100
         
         return {
-            "process_rss_mb": process_memory.rss / (1024 * 1024),
-            "process_vms_mb": process_memory.vms / (1024 * 1024),
+            "process_rss_mb": process["rss_mb"],
+            "process_vms_mb": process["vms_mb"],
             "process_percent": process_percent,
-            "system_total_mb": system_memory.total / (1024 * 1024),
-            "system_available_mb": system_memory.available / (1024 * 1024),
-            "system_used_percent": system_memory.percent
+            "children_rss_mb": children["rss_mb"],
+            "children_pss_mb": children["pss_mb"],
+            "children_cpu_percent": children["cpu_percent"],
+            "children_count": children["processes"],
+            "tree_rss_mb": tree["total"]["rss_mb"],
+            "tree_pss_mb": tree["total"]["pss_mb"],
+            "tree_percent": tree_percent,
+            "system_total_mb": system_memory["total_mb"],
+            "system_available_mb": system_memory["available_mb"],
+            "system_used_percent": system_memory["percent"]
         }
     
     def get_cpu_usage(self) -> Dict[str, float]:
         """
-        Obtiene información sobre el uso actual de CPU.
+        Obtiene información sobre el uso actual de CPU (del último snapshot
+        del muestreador: variación desde la muestra anterior, sin esperar).
         
         Returns:
             Diccionario con información de uso de CPU
         """
-        # Uso de CPU del proceso actual (porcentaje)
-        process_cpu = self.process.cpu_percent(interval=0.1)
-        
-        # Uso de CPU del sistema (porcentaje por núcleo)
-        system_cpu = psutil.cpu_percent(interval=0.1)
-        
-        # Información de carga del sistema
-        try:
-            load_avg = os.getloadavg()
-        except (AttributeError, OSError):
-            # Windows no soporta getloadavg
-            load_avg = (0, 0, 0)
+        snapshot = self.sampler.snapshot()
+        cpu = snapshot["cpu"]
         
         return {
-            "process_cpu_percent": process_cpu,
-            "system_cpu_percent": system_cpu,
-            "load_avg_1min": load_avg[0],
-            "load_avg_5min": load_avg[1],
-            "load_avg_15min": load_avg[2],
-            "cpu_count": psutil.cpu_count()
+            "process_cpu_percent": snapshot["process"]["cpu_percent"],
+            "system_cpu_percent": cpu["percent"],
+            "load_avg_1min": cpu["load_avg_1min"],
+            "load_avg_5min": cpu["load_avg_5min"],
+            "load_avg_15min": cpu["load_avg_15min"],
+            "cpu_count": cpu["count"]
         }
     
     def check_resources(self) -> Dict[str, Any]:
@@ -125,22 +133,22 @@ class ResourceManager:
         cpu_info = self.get_cpu_usage()
         
         # Actualizar estadísticas
-        self.stats["current_memory_percent"] = memory_info["process_percent"]
+        self.stats["current_memory_percent"] = memory_info["tree_percent"]
         self.stats["current_cpu_percent"] = cpu_info["process_cpu_percent"]
         self.stats["last_check"] = time.time()
         
         # Actualizar picos
         self.stats["peak_memory_percent"] = max(
             self.stats["peak_memory_percent"],
-            memory_info["process_percent"]
+            memory_info["tree_percent"]
         )
         self.stats["peak_cpu_percent"] = max(
             self.stats["peak_cpu_percent"],
             cpu_info["process_cpu_percent"]
         )
         
-        # Verificar límites
-        memory_warning = memory_info["process_percent"] > self.max_memory_percent
+        # Verificar límites (la memoria incluye los navegadores lanzados por el proceso)
+        memory_warning = memory_info["tree_percent"] > self.max_memory_percent
         cpu_warning = cpu_info["process_cpu_percent"] > self.max_cpu_percent
         
         # Incrementar contadores si hay advertencias
@@ -177,7 +185,7 @@ class ResourceManager:
                 # Registrar advertencias
                 if status["memory_warning"]:
                     logger.warning(
-                        f"Advertencia de memoria: {status['memory']['process_percent']:.1f}% "
+                        f"Advertencia de memoria: {status['memory']['tree_percent']:.1f}% "
                         f"(límite: {self.max_memory_percent:.1f}%)"
                     )
                 
@@ -256,7 +264,7 @@ class ResourceManager:
         if status["throttling_needed"]:
             logger.info(
                 f"Aplicando throttling por {sleep_time}s - "
-                f"Memoria: {status['memory']['process_percent']:.1f}%, "
+                f"Memoria: {status['memory']['tree_percent']:.1f}%, "
                 f"CPU: {status['cpu']['process_cpu_percent']:.1f}%"
             )
             time.sleep(sleep_time)
@@ -297,8 +305,9 @@ class ResourceManager:
         """
         import gc
         
-        # Información antes de optimizar
-        before = self.get_memory_usage()
+        # Información antes de optimizar (lectura directa: el snapshot no
+        # reflejaría el efecto de la recolección)
+        before_mb = self.process.memory_info().rss / (1024 * 1024)
         
         # Forzar recolección de basura
         gc.collect()
@@ -309,16 +318,16 @@ class ResourceManager:
                 gc.collect()
         
         # Información después de optimizar
-        after = self.get_memory_usage()
+        after_mb = self.process.memory_info().rss / (1024 * 1024)
         
         # Calcular diferencia
-        memory_diff = before["process_rss_mb"] - after["process_rss_mb"]
+        memory_diff = before_mb - after_mb
         
         return {
-            "before_mb": before["process_rss_mb"],
-            "after_mb": after["process_rss_mb"],
+            "before_mb": before_mb,
+            "after_mb": after_mb,
             "diff_mb": memory_diff,
-            "percent_reduction": (memory_diff / before["process_rss_mb"] * 100) if before["process_rss_mb"] > 0 else 0,
+            "percent_reduction": (memory_diff / before_mb * 100) if before_mb > 0 else 0,
             "aggressive_mode": aggressive,
             "timestamp": time.time()
         }
@@ -0,0 +1,194 @@
+"""
+Muestreo de recursos en segundo plano.
+
+Un único hilo mide cada RESOURCE_SAMPLE_INTERVAL segundos la memoria y el CPU
+del sistema, del proceso y de su árbol de procesos (chromedriver y Chrome), y
+publica el resultado como un snapshot inmutable. El CPU se calcula con
+lecturas de intervalo 0 (la variación desde la muestra anterior), así que
+ninguna lectura bloquea. ResourceManager, los monitores, el pool de drivers y
+el control de concurrencia leen el último snapshot en O(1) en lugar de medir
+en el camino crítico; las últimas muestras quedan en un buffer circular.
+"""
+
+import os
+import time
+import logging
+import threading
+from typing import Dict, Any, Callable, List, Optional
+
+import psutil
+
+from src.core.process_tree import get_process_tree
+from src.core.config import RESOURCE_SAMPLE_INTERVAL, RESOURCE_HISTORY_SIZE
+
+logger = logging.getLogger("resource_sampler")
+
+MB = 1024 * 1024
+
+
+class ResourceSampler:
+    """
+    Hilo de muestreo con el último snapshot y un historial circular.
+
+    La lectura no usa locks: el hilo de muestreo construye cada snapshot
+    completo y después sustituye la referencia, y el historial es una lista de
+    tamaño fijo en la que solo escribe ese hilo.
+    """
+
+    def __init__(self, interval: float = RESOURCE_SAMPLE_INTERVAL, history_size: int = RESOURCE_HISTORY_SIZE):
+        """
+        Inicializa el muestreador (no arranca el hilo).
+
+        Args:
+            interval: Segundos entre muestras
+            history_size: Muestras que se conservan en el historial
+        """
+        self.interval = interval
+        self.history_size = max(1, history_size)
+
+        self.process = psutil.Process(os.getpid())
+        self.tree = get_process_tree()
+        self._group_provider: Optional[Callable[[], Dict[str, int]]] = None
+
+        self._latest: Optional[Dict[str, Any]] = None
+        self._ring: List[Optional[Dict[str, Any]]] = [None] * self.history_size
+        self._count = 0  # Muestras publicadas desde el arranque
+
+        self._start_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def set_group_provider(self, provider: Optional[Callable[[], Dict[str, int]]]) -> None:
+        """
+        Registra la función que da los grupos del árbol de procesos en cada
+        muestra (ej. el pool de drivers: nombre -> PID del chromedriver).
+        """
+        self._group_provider = provider
+
+    # Muestreo ------------------------------------------------------------
+
+    def _sample(self) -> Dict[str, Any]:
+        """Toma una muestra completa (solo lecturas sin espera)."""
+        groups = {}
+        if self._group_provider is not None:
+            try:
+                groups = self._group_provider()
+            except Exception as e:
+                logger.debug(f"No se pudieron obtener los grupos de procesos: {e}")
+
+        memory = psutil.virtual_memory()
+        try:
+            load_avg = os.getloadavg()
+        except (AttributeError, OSError):
+            # Windows no soporta getloadavg
+            load_avg = (0, 0, 0)
+
+        try:
+            process_memory = self.process.memory_info()
+            process = {
+                "rss_mb": process_memory.rss / MB,
+                "vms_mb": process_memory.vms / MB,
+                "cpu_percent": self.process.cpu_percent(interval=None),
+                "threads": self.process.num_threads()
+            }
+        except (psutil.NoSuchProcess, psutil.AccessDenied):
+            process = {"rss_mb": 0.0, "vms_mb": 0.0, "cpu_percent": 0.0, "threads": 0}
+
+        return {
+            "timestamp": time.time(),
+            "memory": {
+                "total_mb": memory.total / MB,
+                "available_mb": memory.available / MB,
+                "used_mb": memory.used / MB,
+                "percent": memory.percent
+            },
+            "cpu": {
+                "percent": psutil.cpu_percent(interval=None),
+                "count": psutil.cpu_count(),
+                "load_avg_1min": load_avg[0],
+                "load_avg_5min": load_avg[1],
+                "load_avg_15min": load_avg[2]
+            },
+            "process": process,
+            "tree": self.tree.sample(groups=groups)
+        }
+
+    def _publish(self, snapshot: Dict[str, Any]) -> None:
+        """Publica un snapshot: primero en el historial y después como el último."""
+        self._ring[self._count % self.history_size] = snapshot
+        self._count += 1
+        self._latest = snapshot
+
+    def _loop(self) -> None:
+        """Bucle del hilo de muestreo."""
+        while not self._stop.wait(self.interval):
+            try:
+                self._publish(self._sample())
+            except Exception as e:
+                logger.error(f"Error al muestrear recursos: {e}")
+
+    def start(self) -> None:
+        """Arranca el hilo de muestreo (si no está en marcha) y publica una primera muestra."""
+        with self._start_lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+
+            # Fijar el punto de partida de las lecturas de CPU de intervalo 0
+            psutil.cpu_percent(interval=None)
+            try:
+                self.process.cpu_percent(interval=None)
+            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                pass
+            self._publish(self._sample())
+
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._loop, name="resource-sampler", daemon=True)
+            self._thread.start()
+            logger.info(f"Muestreo de recursos iniciado (cada {self.interval:.1f}s)")
+
+    def stop(self) -> None:
+        """Detiene el hilo de muestreo."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.interval + 1)
+
+    # Lectura -------------------------------------------------------------
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Último snapshot publicado (arranca el muestreo la primera vez).
+
+        Returns:
+            Diccionario con timestamp, memory, cpu, process y tree (ver
+            ProcessTreeSampler.sample); no debe modificarse
+        """
+        latest = self._latest
+        if latest is None:
+            self.start()
+            latest = self._latest
+        return latest
+
+    def history(self, last: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Últimas muestras del buffer circular, de la más antigua a la más reciente.
+
+        Args:
+            last: Número máximo de muestras (por defecto todo el historial)
+        """
+        count = self._count
+        size = min(count, self.history_size, last or self.history_size)
+        samples = [self._ring[(count - size + i) % self.history_size] for i in range(size)]
+        return [sample for sample in samples if sample is not None]
+
+
+_sampler: Optional[ResourceSampler] = None
+_sampler_lock = threading.Lock()
+
+
+def get_resource_sampler() -> ResourceSampler:
+    """Obtiene el muestreador de recursos compartido (el hilo arranca con la primera lectura)."""
+    global _sampler
+    with _sampler_lock:
+        if _sampler is None:
+            _sampler = ResourceSampler()
+        return _sampler
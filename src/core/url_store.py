@@ -0,0 +1,201 @@
+"""
+Almacén persistente de resultados de scraping por URL.
+
+A diferencia de los checkpoints, que son propios de cada trabajo, este almacén
+es compartido por todos los archivos procesados: un sitio que aparece en varios
+CSV (o en la actualización de la semana siguiente) solo se vuelve a scrapear
+cuando su resultado supera la antigüedad máxima configurada.
+"""
+
+import os
+import json
+import time
+import logging
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Dict, Any, Optional, List
+from urllib.parse import urlsplit
+
+from src.core.config import DATA_DIR, URL_STORE_MAX_AGE_DAYS
+
+logger = logging.getLogger("url_store")
+
+
+def normalize_url(url: str) -> str:
+    """
+    Normaliza una URL para usarla como clave (esquema y dominio en minúsculas,
+    sin fragmento ni barra final).
+    """
+    parts = urlsplit(url.strip())
+    path = parts.path.rstrip('/')
+    query = f"?{parts.query}" if parts.query else ""
+    return f"{parts.scheme.lower()}://{parts.netloc.lower()}{path}{query}"
+
+
+def url_domain(url: str) -> str:
+    """Obtiene el dominio de una URL (sin 'www.')."""
+    netloc = urlsplit(url.strip()).netloc.lower().split('@')[-1].split(':')[0]
+    return netloc[4:] if netloc.startswith('www.') else netloc
+
+
+class URLResultStore:
+    """
+    Almacén SQLite de resultados por URL, indexado por URL y por dominio.
+    Cada hilo usa su propia conexión; la base de datos trabaja en modo WAL.
+    """
+    
+    def __init__(self, cache_dir: Optional[str] = None, max_age_days: float = URL_STORE_MAX_AGE_DAYS):
+        """
+        Inicializa el almacén.
+        
+        Args:
+            cache_dir: Directorio donde se guardará la base de datos
+            max_age_days: Antigüedad máxima (días) de un resultado reutilizable
+        """
+        if cache_dir is None:
+            cache_dir = str(DATA_DIR / "cache")
+        
+        self.cache_dir = Path(cache_dir)
+        self.db_path = self.cache_dir / "url_results.db"
+        self.max_age_days = max_age_days
+        self._local = threading.local()
+        self.stats = {"hits": 0, "misses": 0, "stale": 0, "stored": 0}
+        
+        # Crear directorio si no existe
+        os.makedirs(self.cache_dir, exist_ok=True)
+        
+        self._init_db()
+    
+    def _connection(self) -> sqlite3.Connection:
+        """Obtiene la conexión del hilo actual (se crea al primer uso)."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(str(self.db_path), timeout=30)
+            conn.execute("PRAGMA journal_mode = WAL")
+            conn.execute("PRAGMA synchronous = NORMAL")
+            self._local.conn = conn
+        return conn
+    
+    def _init_db(self) -> None:
+        """Crea la tabla e índices si no existen."""
+        conn = self._connection()
+        with conn:
+            conn.execute('''
+            CREATE TABLE IF NOT EXISTS url_results (
+                url TEXT PRIMARY KEY,
+                domain TEXT,
+                scraped_at REAL,
+                emails TEXT,
+                social TEXT,
+                status TEXT
+            )
+            ''')
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_url_results_domain ON url_results (domain)')
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_url_results_scraped_at ON url_results (scraped_at)')
+    
+    @staticmethod
+    def _to_result(row: tuple) -> Dict[str, Any]:
+        """Convierte una fila de la tabla en un diccionario de resultado."""
+        url, domain, scraped_at, emails, social, status = row
+        return {
+            "url": url,
+            "domain": domain,
+            "scraped_at": scraped_at,
+            "emails": json.loads(emails) if emails else [],
+            "social": json.loads(social) if social else {},
+            "status": status
+        }
+    
+    def get(self, url: str, max_age_days: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """
+        Obtiene el resultado guardado de una URL si sigue vigente.
+        
+        Args:
+            url: URL a consultar
+            max_age_days: Antigüedad máxima en días (por defecto la del almacén)
+            
+        Returns:
+            Diccionario con emails, social, status y scraped_at, o None
+        """
+        max_age = self.max_age_days if max_age_days is None else max_age_days
+        row = self._connection().execute(
+            "SELECT url, domain, scraped_at, emails, social, status FROM url_results WHERE url = ?",
+            (normalize_url(url),)
+        ).fetchone()
+        
+        if row is None:
+            self.stats["misses"] += 1
+            return None
+        
+        if time.time() - row[2] > max_age * 86400:
+            self.stats["stale"] += 1
+            return None
+        
+        self.stats["hits"] += 1
+        return self._to_result(row)
+    
+    def put(self, url: str, emails: List[str], social: Dict[str, List[str]],
+            status: str = "ok") -> None:
+        """
+        Guarda (o reemplaza) el resultado de una URL.
+        
+        Args:
+            url: URL scrapeada
+            emails: Emails encontrados
+            social: Redes sociales encontradas
+            status: Estado del scraping ("ok", "empty", ...)
+        """
+        try:
+            conn = self._connection()
+            with conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO url_results (url, domain, scraped_at, emails, social, status) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (normalize_url(url), url_domain(url), time.time(),
+                     json.dumps(list(emails), ensure_ascii=False),
+                     json.dumps(social, ensure_ascii=False), status)
+                )
+            self.stats["stored"] += 1
+        except sqlite3.Error as e:
+            logger.error(f"Error al guardar resultado de {url}: {e}")
+    
+    def get_domain(self, domain: str) -> List[Dict[str, Any]]:
+        """Obtiene todos los resultados guardados de un dominio."""
+        cursor = self._connection().execute(
+            "SELECT url, domain, scraped_at, emails, social, status FROM url_results WHERE domain = ?",
+            (domain.lower(),)
+        )
+        return [self._to_result(row) for row in cursor]
+    
+    def purge_older_than(self, days: float) -> int:
+        """
+        Elimina los resultados más antiguos que el número de días indicado.
+        
+        Returns:
+            Número de resultados eliminados
+        """
+        conn = self._connection()
+        with conn:
+            cursor = conn.execute(
+                "DELETE FROM url_results WHERE scraped_at < ?",
+                (time.time() - days * 86400,)
+            )
+        return cursor.rowcount
+    
+    def count(self) -> int:
+        """Obtiene el número de URLs guardadas."""
+        return self._connection().execute("SELECT COUNT(*) FROM url_results").fetchone()[0]
+
+
+_store: Optional[URLResultStore] = None
+_store_lock = threading.Lock()
+
+
+def get_url_store() -> URLResultStore:
+    """Obtiene la instancia compartida del almacén de resultados por URL."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = URLResultStore()
+        return _store
@@ -24,7 +24,7 @@ from openpyxl.drawing.image import Image as XLImage
 # Configuración de logging
 from src.core.config import (
     BASE_DIR, LOG_DIR, INPUT_DIR, CLEAN_INPUT_DIR, OUTPUT_DIR,
-    EXCLUSION_OUTPUT_DIR, DEMO_OUTPUT_DIR, MAX_WORKERS
+    EXCLUSION_OUTPUT_DIR, DEMO_OUTPUT_DIR, MAX_WORKERS, DEMO_SAMPLE_MODE
 )
 
 # Importar módulo de visualización
@@ -351,6 +351,7 @@ def procesar_enmascarado(modo_prueba: bool = False):
         bool: True si la generación de archivos demo fue exitosa, False en caso contrario
     """
     from src.masking.data_masker import mask_file
+    from src.masking.demo_sampler import generate_demo_file
     
     print("\n🎭 Iniciando proceso de generación de archivos demo...")
     
@@ -374,8 +375,11 @@ def procesar_enmascarado(modo_prueba: bool = False):
                 print(f"🧪 Modo prueba activado para generación de demo")
             
             try:
-                # Intentar generar el archivo demo
-                mask_file(entrada, salida, modo_prueba=modo_prueba)
+                # Intentar generar el archivo demo (a partir de una muestra si está activado)
+                if DEMO_SAMPLE_MODE:
+                    generate_demo_file(entrada, salida, modo_prueba=modo_prueba)
+                else:
+                    mask_file(entrada, salida, modo_prueba=modo_prueba)
                 print(f"\n✅ Archivo demo generado → {os.path.basename(salida)}") 
                 # Verificar que el archivo de salida tenga todas las hojas necesarias
                 if fn.lower().endswith('.xlsx'):
@@ -536,12 +540,16 @@ def ejecutar_procesamiento_automatico(modo_prueba: bool = False):
         print(f"\n🎭 Generando archivo demo para {os.path.basename(ruta_exclusion)}...")
         try:
             from src.masking.data_masker import mask_file
+            from src.masking.demo_sampler import generate_demo_file
             
             if modo_prueba:
                 print(f"🧪 Modo prueba: procesando solo 20 filas")
                 
-            # Generar archivo demo
-            mask_file(ruta_exclusion, ruta_enmascarado, modo_prueba=modo_prueba)
+            # Generar archivo demo (a partir de una muestra si está activado)
+            if DEMO_SAMPLE_MODE:
+                generate_demo_file(ruta_exclusion, ruta_enmascarado, modo_prueba=modo_prueba)
+            else:
+                mask_file(ruta_exclusion, ruta_enmascarado, modo_prueba=modo_prueba)
             print(f"\n✅ Archivo demo generado → {ruta_enmascarado}")
             
         except Exception as e:
@@ -4,10 +4,46 @@ Módulo para enmascarar datos sensibles en archivos CSV y Excel.
 
 import os
 import re
+import json
+import time
+import hashlib
+import logging
 import pandas as pd
 import openpyxl
 from pathlib import Path
-from typing import Optional, Dict, Any
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional, Dict, Any, List
+
+from src.core.config import (
+    MASKING_STREAMING_MIN_MB, MASKING_SCHEMA_TTL_DAYS, MASKING_SCHEMA_CACHE_DIR,
+    MASKING_CSV_CHUNKED_MIN_MB, MASKING_CHUNK_ROWS, MASKING_WORKERS
+)
+
+logger = logging.getLogger("data_masker")
+
+# Palabras clave que identifican columnas de redes sociales
+SOCIAL_KEYWORDS = ["facebook", "instagram", "linkedin", "x", "twitter"]
+
+# Filas por lote al enmascarar la hoja 'data' de Excel
+XLSX_BATCH_ROWS = 5000
+
+# Tabla de traducción para enmascarar vocales
+_VOWEL_TABLE = str.maketrans("aeiouAEIOU", "*" * 10)
+
+# Filas de muestra para decidir qué columnas sin etiqueta hay que revisar
+SENSITIVE_SAMPLE_ROWS = 500
+
+# Expresión única de detección: el grupo 'email' casa si el texto contiene '@' y '.',
+# el grupo 'phone' si contiene al menos 6 dígitos (ambos se evalúan en una pasada)
+_SENSITIVE_VALUE_RE = re.compile(
+    r"^(?:(?=.*@)(?=.*\.)(?P<email>))?(?:(?=(?:\D*\d){6})(?P<phone>))?",
+    re.DOTALL
+)
+
+# Caché de esquemas ya analizados (se crea al primer uso) y su directorio (None = desactivada)
+_schema_cache = None
+_schema_cache_dir: Optional[str] = MASKING_SCHEMA_CACHE_DIR or None
 
 def mask_email(email):
     """
@@ -68,64 +104,590 @@ def mask_vowels(text):
         return text
     return re.sub(r"[aeiouAEIOU]", "*", text)
 
+def build_column_plan(header: List[Any]) -> Dict[str, Any]:
+    """
+    Clasifica una sola vez las columnas de una cabecera según el tipo de dato
+    sensible que contienen.
+    
+    Args:
+        header: Lista con los nombres de columna (en orden)
+        
+    Returns:
+        Diccionario con los índices de columnas de dirección, email, teléfono y redes
+    """
+    names = [col.lower() if isinstance(col, str) else '' for col in header]
+    
+    try:
+        address_idx = names.index('address')
+    except ValueError:
+        address_idx = None
+        
+    return {
+        "address": address_idx,
+        "email": [i for i, col in enumerate(names) if 'email' in col],
+        "phone": [i for i, col in enumerate(names) if 'phone' in col or 'tel' in col],
+        "social": [i for i, col in enumerate(names) if any(s in col for s in SOCIAL_KEYWORDS)],
+    }
+
+def _text_positions(series: pd.Series) -> Optional[pd.Series]:
+    """
+    Obtiene una máscara booleana con las posiciones que contienen texto.
+    
+    Args:
+        series: Columna a inspeccionar
+        
+    Returns:
+        Serie booleana, o None si la columna no puede contener texto
+    """
+    if not (pd.api.types.is_object_dtype(series) or pd.api.types.is_string_dtype(series)):
+        return None
+    try:
+        # str.len() devuelve NaN para valores nulos y no textuales
+        return series.str.len().notna()
+    except AttributeError:
+        return None
+
+def _replace_at(series: pd.Series, values: pd.Series) -> pd.Series:
+    """Devuelve una copia de la serie con los valores reemplazados (por etiqueta de índice)."""
+    result = series.copy()
+    result.loc[values.index] = values
+    return result
+
+def _mask_email_series(series: pd.Series, targets: pd.Series) -> pd.Series:
+    """Versión vectorizada de mask_email aplicada a las posiciones indicadas."""
+    values = series[targets & series.str.contains('@', regex=False, na=False)]
+    # Sin ningún '@', str.partition devuelve un DataFrame sin columnas
+    if values.empty:
+        return series
+    parts = values.str.partition('@')
+    name_len = parts[0].str.len()
+    parts, name_len = parts[name_len > 0], name_len[name_len > 0]
+    if parts.empty:
+        return series
+    stars = pd.Series('*', index=parts.index).str.repeat((name_len - 1).astype(int))
+    return _replace_at(series, parts[0].str[:1] + stars + '@' + parts[2])
+
+def _mask_phone_series(series: pd.Series, targets: pd.Series) -> pd.Series:
+    """Versión vectorizada de mask_phone aplicada a las posiciones indicadas."""
+    if not targets.any():
+        return series
+    values = series[targets]
+    masked = (values.str[:-2] + "**").where(values.str.len() > 2, "**")
+    return _replace_at(series, masked)
+
+def _mask_social_series(series: pd.Series, targets: pd.Series) -> pd.Series:
+    """Versión vectorizada de mask_social aplicada a las posiciones indicadas."""
+    if not targets.any():
+        return series
+    masked = series[targets].str.rsplit("/", n=1).str[-1].str[:2] + "****"
+    return _replace_at(series, masked)
+
+def _mask_vowels_series(series: pd.Series, targets: pd.Series) -> pd.Series:
+    """Versión vectorizada de mask_vowels aplicada a las posiciones indicadas."""
+    if not targets.any():
+        return series
+    return _replace_at(series, series[targets].str.translate(_VOWEL_TABLE))
+
+def _find_sensitive_values(series: pd.Series, plan: Dict[str, Any], idx: int):
+    """
+    Aplica la expresión de detección a una columna y devuelve las posiciones con
+    emails y teléfonos no identificados por la cabecera.
+    
+    Args:
+        series: Columna a inspeccionar (índice posicional)
+        plan: Plan de columnas generado por build_column_plan
+        idx: Posición de la columna
+        
+    Returns:
+        Tupla (email_hits, phone_hits) de series booleanas, o None si no hay texto
+    """
+    texts = _text_positions(series)
+    if texts is None or not texts.any():
+        return None
+        
+    found = series[texts].str.extract(_SENSITIVE_VALUE_RE)
+    email_hits = found["email"].notna().reindex(series.index, fill_value=False)
+    phone_hits = found["phone"].notna().reindex(series.index, fill_value=False)
+    
+    # Los emails de columnas 'email' ya están tratados; se comprueba si son teléfonos
+    if idx in plan["email"]:
+        email_hits[:] = False
+    phone_hits &= ~email_hits & (series.str.len() >= 7).fillna(False).astype(bool)
+    if idx in plan["phone"]:
+        phone_hits[:] = False
+        
+    return email_hits, phone_hits
+
+def _sample_clean_columns(df: pd.DataFrame, plan: Dict[str, Any]) -> List[int]:
+    """
+    Decide con una muestra de filas qué columnas pueden dejar de revisarse en
+    busca de emails o teléfonos no identificados por la cabecera.
+    
+    Solo se descarta una columna si la muestra contiene texto en ella y ninguna
+    detección; las columnas sin texto en la muestra se siguen revisando.
+    
+    Args:
+        df: DataFrame con índice posicional
+        plan: Plan de columnas generado por build_column_plan
+        
+    Returns:
+        Lista de posiciones de columna que no hace falta revisar
+    """
+    sample = df.head(SENSITIVE_SAMPLE_ROWS)
+    columns = []
+    for idx in range(sample.shape[1]):
+        hits = _find_sensitive_values(sample.iloc[:, idx], plan, idx)
+        if hits is not None and not (hits[0].any() or hits[1].any()):
+            columns.append(idx)
+    return columns
+
+def _scan_unlabelled_columns(df: pd.DataFrame, plan: Dict[str, Any]) -> None:
+    """
+    Detecta y enmascara emails y teléfonos en columnas no identificadas por la cabecera.
+    Modifica el DataFrame en el sitio (por posición de columna).
+    
+    Las columnas de plan["clean_columns"] solo pasan un filtro rápido ('@' o 6
+    dígitos); si alguna fila lo supera, la columna vuelve a revisarse entera.
+    Si el esquema tiene detecciones registradas (plan["recorded"]), se revisan
+    enteras esas columnas y no se muestrea; si no, las columnas limpias se
+    deciden con una muestra del primer lote. Las columnas con detecciones se
+    acumulan en plan["detected"].
+    
+    Args:
+        df: DataFrame con índice posicional
+        plan: Plan de columnas generado por build_column_plan
+    """
+    if plan.get("clean_columns") is None:
+        recorded = plan.get("recorded")
+        if recorded:
+            plan["clean_columns"] = set(range(df.shape[1])) - set(recorded)
+        else:
+            plan["clean_columns"] = set(_sample_clean_columns(df, plan))
+        
+    for idx in range(df.shape[1]):
+        series = df.iloc[:, idx]
+        if idx in plan["clean_columns"]:
+            texts = _text_positions(series)
+            if texts is None or not texts.any():
+                continue
+            values = series[texts]
+            if not (values.str.contains('@', regex=False) | (values.str.count(r'\d') >= 6)).any():
+                continue
+            plan["clean_columns"].discard(idx)
+        hits = _find_sensitive_values(series, plan, idx)
+        if hits is None:
+            continue
+            
+        email_hits, phone_hits = hits
+        if email_hits.any() or phone_hits.any():
+            plan.setdefault("detected", set()).add(idx)
+            series = _mask_email_series(series, email_hits)
+            series = _mask_phone_series(series, phone_hits)
+            df.isetitem(idx, series)
+
+def _schema_key(header: List[Any]) -> str:
+    """Genera una clave estable para una cabecera (esquema de columnas)."""
+    names = [col.lower() if isinstance(col, str) else '' for col in header]
+    digest = hashlib.sha1(json.dumps(names, ensure_ascii=False).encode('utf-8')).hexdigest()
+    return f"masking_schema:{digest}"
+
+def configure_schema_cache(cache_dir: Optional[str]) -> None:
+    """
+    Cambia el directorio de la caché de esquemas (ej. un directorio temporal en
+    las pruebas). Con None la caché se desactiva y cada archivo se muestrea.
+    
+    Args:
+        cache_dir: Directorio de la caché, o None para desactivarla
+    """
+    global _schema_cache, _schema_cache_dir
+    if _schema_cache is not None:
+        _schema_cache.close()
+    _schema_cache = None
+    _schema_cache_dir = cache_dir
+
+def _get_schema_cache():
+    """Devuelve (creándola si es necesario) la caché de esquemas, o None si está desactivada."""
+    global _schema_cache
+    if _schema_cache is None and _schema_cache_dir:
+        from src.core.cache_manager import CacheManager
+        _schema_cache = CacheManager(cache_dir=_schema_cache_dir,
+                                     ttl_seconds=MASKING_SCHEMA_TTL_DAYS * 86400)
+    return _schema_cache
+
+def load_schema_detections(header: List[Any]) -> Optional[List[int]]:
+    """
+    Obtiene las columnas con datos sensibles registradas para un esquema.
+    
+    Args:
+        header: Cabecera del archivo
+        
+    Returns:
+        Lista de posiciones de columna, o None si el esquema no se conoce
+    """
+    cache = _get_schema_cache()
+    if cache is None:
+        return None
+    try:
+        return cache.get(_schema_key(header))
+    except Exception as e:
+        logger.warning(f"No se pudo consultar la caché de esquemas: {e}")
+        return None
+
+def record_schema_detections(header: List[Any], plan: Dict[str, Any]) -> None:
+    """
+    Registra las columnas en las que se detectaron datos sensibles para que los
+    siguientes archivos con el mismo esquema las revisen enteras sin muestrear
+    (el resto de columnas pasa el filtro rápido). Solo se registran
+    detecciones positivas: un esquema sin detecciones no se guarda.
+    
+    Args:
+        header: Cabecera del archivo
+        plan: Plan de columnas tras el enmascarado
+    """
+    cache = _get_schema_cache()
+    columns = sorted(set(plan.get("recorded") or []) | plan.get("detected", set()))
+    if cache is None or not columns or columns == plan.get("recorded"):
+        return
+    try:
+        cache.set(_schema_key(header), columns)
+    except Exception as e:
+        logger.warning(f"No se pudo registrar el esquema de enmascarado: {e}")
+
+def apply_masking_plan(df: pd.DataFrame, plan: Dict[str, Any], strict: bool = False,
+                       scan_unlabelled: bool = False) -> pd.DataFrame:
+    """
+    Enmascara un DataFrame columna a columna según un plan precalculado.
+    
+    Args:
+        df: DataFrame a procesar
+        plan: Plan de columnas generado por build_column_plan
+        strict: Reglas de la hoja 'data' de Excel (teléfonos solo con dígitos,
+            redes solo con '/', todas las clasificaciones de una columna se aplican)
+        scan_unlabelled: Si se deben detectar emails/teléfonos en el resto de columnas
+        
+    Returns:
+        DataFrame con datos enmascarados (mismo índice que el original)
+    """
+    # Índice posicional para que los reemplazos por etiqueta sean inequívocos
+    original_index = df.index
+    df_masked = df.reset_index(drop=True)
+    
+    if strict:
+        steps = [("address", [plan["address"]] if plan["address"] is not None else []),
+                 ("email", plan["email"]), ("phone", plan["phone"]), ("social", plan["social"])]
+    else:
+        # Una sola clasificación por columna, con la prioridad de la versión original
+        steps, seen = [], set()
+        for kind in ("email", "address", "phone", "social"):
+            if kind == "address":
+                indices = [plan["address"]] if plan["address"] is not None else []
+            else:
+                indices = plan[kind]
+            indices = [i for i in indices if i not in seen]
+            seen.update(indices)
+            steps.append((kind, indices))
+    
+    for kind, indices in steps:
+        for idx in indices:
+            if idx >= df_masked.shape[1]:
+                continue
+            series = df_masked.iloc[:, idx]
+            targets = _text_positions(series)
+            if targets is None:
+                continue
+            if kind == "email":
+                series = _mask_email_series(series, targets)
+            elif kind == "address":
+                series = _mask_vowels_series(series, targets)
+            elif kind == "phone":
+                if strict:
+                    targets = targets & series.str.contains(r'\d', na=False)
+                series = _mask_phone_series(series, targets)
+            elif kind == "social":
+                if strict:
+                    targets = targets & series.str.contains('/', regex=False, na=False)
+                series = _mask_social_series(series, targets)
+            df_masked.isetitem(idx, series)
+            
+    if scan_unlabelled:
+        _scan_unlabelled_columns(df_masked, plan)
+        
+    df_masked.index = original_index
+    return df_masked
+
 def mask_dataframe(df: pd.DataFrame) -> pd.DataFrame:
     """
     Enmascara datos sensibles en un DataFrame.
     
+    Las columnas se clasifican una sola vez a partir de la cabecera y cada una
+    se enmascara con operaciones vectorizadas de pandas.
+    
     Args:
         df: DataFrame a procesar
         
     Returns:
         DataFrame con datos enmascarados
     """
-    df_masked = df.copy()
-    
-    for col in df_masked.columns:
-        lower = col.lower()
-        if "email" in lower:
-            df_masked[col] = df_masked[col].apply(mask_email)
-        elif "address" == lower:
-            df_masked[col] = df_masked[col].apply(mask_vowels)
-        elif "phone" in lower or "tel" in lower:
-            df_masked[col] = df_masked[col].apply(mask_phone)
-        elif any(s in lower for s in ["facebook", "instagram", "linkedin", "x", "twitter"]):
-            df_masked[col] = df_masked[col].apply(mask_social)
+    plan = build_column_plan(list(df.columns))
+    return apply_masking_plan(df, plan)
+
+def _mask_rows(rows: List[Any], plan: Dict[str, Any]) -> pd.DataFrame:
+    """
+    Enmascara un lote de filas de la hoja 'data' de Excel.
+    
+    Args:
+        rows: Lista de filas (tuplas/listas de valores)
+        plan: Plan de columnas generado por build_column_plan
+        
+    Returns:
+        DataFrame (dtype object) con las filas enmascaradas
+    """
+    width = max(len(row) for row in rows)
+    padded = [list(row) + [None] * (width - len(row)) for row in rows]
+    df = pd.DataFrame(padded, dtype=object)
+    return apply_masking_plan(df, plan, strict=True, scan_unlabelled=True)
+
+def _mask_csv_chunk(chunk: pd.DataFrame) -> str:
+    """
+    Enmascara un bloque de filas de un CSV y lo devuelve serializado (sin cabecera).
+    Se ejecuta en los procesos del pool, por eso devuelve texto en lugar del DataFrame.
+    """
+    return mask_dataframe(chunk).to_csv(index=False, header=False)
+
+def read_csv_text(file_path: str, **kwargs):
+    """
+    Lee un CSV con todos los valores como texto (las celdas vacías quedan como
+    cadena vacía), para que los teléfonos numéricos se enmascaren igual en
+    todos los modos.
+    
+    Args:
+        file_path: Ruta al archivo CSV
+        **kwargs: Argumentos adicionales de pd.read_csv (nrows, chunksize...)
+        
+    Returns:
+        DataFrame, o un lector por bloques si se pasa chunksize
+    """
+    return pd.read_csv(file_path, dtype=str, keep_default_na=False, **kwargs)
+
+def process_csv_chunked(file_path: str, output_path: str,
+                        chunk_rows: int = MASKING_CHUNK_ROWS,
+                        workers: int = MASKING_WORKERS) -> None:
+    """
+    Procesa un CSV grande por bloques de filas enmascarados en un pool de procesos.
+    
+    El archivo se lee en bloques de chunk_rows filas, cada bloque se enmascara en
+    un proceso del pool y los resultados se añaden al archivo de salida en el
+    orden original. Solo hay en memoria unos pocos bloques a la vez. Los valores
+    se leen como texto para que todos los bloques se serialicen igual.
+    
+    Args:
+        file_path: Ruta al archivo CSV de entrada
+        output_path: Ruta donde guardar el archivo CSV enmascarado
+        chunk_rows: Número de filas por bloque
+        workers: Número de procesos para enmascarar
+    """
+    inicio = time.time()
+    total_filas = 0
+    max_en_vuelo = max(1, workers) * 2
+    
+    reader = read_csv_text(file_path, chunksize=chunk_rows)
+    with open(output_path, 'w', encoding='utf-8', newline='') as salida, \
+            ProcessPoolExecutor(max_workers=max(1, workers)) as executor:
+        pendientes = deque()
+        
+        def escribir_siguiente():
+            nonlocal total_filas
+            futuro, filas = pendientes.popleft()
+            salida.write(futuro.result())
+            total_filas += filas
+            duracion = time.time() - inicio
+            velocidad = total_filas / duracion if duracion > 0 else 0
+            print(f"📊 {total_filas} filas enmascaradas ({velocidad:.0f} filas/s)")
+        
+        for i, chunk in enumerate(reader):
+            # La cabecera se escribe una sola vez, desde el primer bloque
+            if i == 0:
+                salida.write(chunk.head(0).to_csv(index=False))
+            pendientes.append((executor.submit(_mask_csv_chunk, chunk), len(chunk)))
             
-    return df_masked
+            # Limitar los bloques en vuelo para mantener la memoria acotada
+            if len(pendientes) >= max_en_vuelo:
+                escribir_siguiente()
+                
+        while pendientes:
+            escribir_siguiente()
+            
+    duracion = time.time() - inicio
+    velocidad = total_filas / duracion if duracion > 0 else 0
+    print(f"✅ CSV procesado por bloques: {os.path.basename(file_path)} "
+          f"({total_filas} filas en {duracion:.2f}s, {velocidad:.0f} filas/s)")
 
-def process_csv(file_path: str, output_path: str, modo_prueba: bool = False) -> None:
+def process_csv(file_path: str, output_path: str, modo_prueba: bool = False,
+                chunked: Optional[bool] = None) -> None:
     """
     Procesa un archivo CSV para enmascarar datos sensibles.
     
     Args:
         file_path: Ruta al archivo CSV de entrada
         output_path: Ruta donde guardar el archivo CSV enmascarado
+        modo_prueba: Si se debe procesar solo una muestra de 20 filas
+        chunked: Forzar (True) o desactivar (False) el modo por bloques. Si es None,
+            se usa para archivos de al menos MASKING_CSV_CHUNKED_MIN_MB
     """
-    df = pd.read_csv(file_path)
-    
-    # Limitar filas en modo prueba
+    # Los valores se leen como texto en todos los modos para que la salida no
+    # dependa del tamaño del archivo (ej. teléfonos leídos como números)
+    # Limitar filas en modo prueba (sin leer el archivo completo)
     if modo_prueba:
-        df = df.head(20)
+        df = read_csv_text(file_path, nrows=20)
         print(f"🧪 Modo prueba: procesando solo 20 filas")
+    else:
+        if chunked is None:
+            chunked = os.path.getsize(file_path) >= MASKING_CSV_CHUNKED_MIN_MB * 1024 * 1024
+        if chunked:
+            process_csv_chunked(file_path, output_path)
+            return
+        df = read_csv_text(file_path)
         
     df = mask_dataframe(df)
     df.to_csv(output_path, index=False)
     print(f"✅ CSV procesado: {os.path.basename(file_path)}")
 
-def process_xlsx(file_path: str, output_path: str, modo_prueba: bool = False) -> None:
+def _plan_with_detections(header: List[Any]) -> Dict[str, Any]:
+    """
+    Construye el plan de columnas de la hoja 'data' incorporando las detecciones
+    registradas para el mismo esquema (se revisan siempre, además de las que
+    decida la muestra del archivo).
+    """
+    plan = build_column_plan(header)
+    recorded = load_schema_detections(header)
+    if recorded:
+        plan["recorded"] = sorted(recorded)
+    return plan
+
+def mask_sheet_rows(header: List[Any], rows: List[Any]) -> List[List[Any]]:
+    """
+    Enmascara filas de una hoja 'data' con las mismas reglas que process_xlsx.
+    
+    Args:
+        header: Cabecera de la hoja
+        rows: Filas de datos (sin cabecera)
+        
+    Returns:
+        Lista de filas enmascaradas
+    """
+    if not rows:
+        return []
+    plan = _plan_with_detections(list(header))
+    masked = _mask_rows(rows, plan)
+    record_schema_detections(list(header), plan)
+    return [list(values) for values in masked.itertuples(index=False, name=None)]
+
+def _write_masked_batch(ws_out, rows: List[Any], plan: Dict[str, Any]) -> int:
+    """
+    Enmascara un lote de filas y lo añade a una hoja de solo escritura.
+    
+    Returns:
+        Número de filas escritas
+    """
+    masked = _mask_rows(rows, plan)
+    for values in masked.itertuples(index=False, name=None):
+        ws_out.append(list(values))
+    return len(masked)
+
+def process_xlsx_streaming(file_path: str, output_path: str, modo_prueba: bool = False) -> None:
+    """
+    Procesa un archivo Excel en modo streaming para enmascarar datos sensibles.
+    
+    Lee las filas con un workbook de solo lectura y las escribe a través de un
+    workbook de solo escritura, de modo que la memoria no crece con el número
+    de filas. El resto de hojas se copian tal cual (solo valores).
+    
+    Args:
+        file_path: Ruta al archivo Excel de entrada
+        output_path: Ruta donde guardar el archivo Excel enmascarado
+        modo_prueba: Si es True, solo se escriben 20 filas de la hoja 'data'
+    """
+    if not os.path.exists(file_path):
+        print(f"❌ No se encontró el archivo: {file_path}")
+        return
+        
+    wb_in = openpyxl.load_workbook(file_path, read_only=True)
+    try:
+        if 'data' not in wb_in.sheetnames:
+            print(f"❌ No se encontró la hoja 'data' en {file_path}")
+            return
+            
+        if modo_prueba:
+            print(f"🧪 Modo prueba: procesando solo 20 filas")
+            
+        wb_out = openpyxl.Workbook(write_only=True)
+        filas_data = 0
+        
+        for sheet_name in wb_in.sheetnames:
+            ws_in = wb_in[sheet_name]
+            ws_out = wb_out.create_sheet(title=sheet_name)
+            rows = ws_in.iter_rows(values_only=True)
+            
+            # Las hojas distintas de 'data' se copian sin modificar
+            if sheet_name != 'data':
+                for row in rows:
+                    ws_out.append(row)
+                continue
+                
+            header = next(rows, None)
+            if header is None:
+                continue
+            ws_out.append(header)
+            plan = _plan_with_detections(list(header))
+            limite = 20 if modo_prueba else None
+            
+            # Enmascarar por lotes para vectorizar sin cargar toda la hoja
+            lote = []
+            for row in rows:
+                # Salir si alcanzamos el límite en modo prueba
+                if limite is not None and filas_data + len(lote) >= limite:
+                    break
+                lote.append(row)
+                if len(lote) >= XLSX_BATCH_ROWS:
+                    filas_data += _write_masked_batch(ws_out, lote, plan)
+                    lote = []
+            if lote:
+                filas_data += _write_masked_batch(ws_out, lote, plan)
+            # Una muestra de 20 filas no es representativa del esquema
+            if not modo_prueba:
+                record_schema_detections(list(header), plan)
+                
+        wb_out.save(output_path)
+    finally:
+        wb_in.close()
+        
+    print(f"✅ Excel procesado (streaming, {filas_data} filas): {os.path.basename(file_path)}")
+
+def process_xlsx(file_path: str, output_path: str, modo_prueba: bool = False,
+                 streaming: Optional[bool] = None) -> None:
     """
     Procesa un archivo Excel para enmascarar datos sensibles.
     
     Args:
         file_path: Ruta al archivo Excel de entrada
         output_path: Ruta donde guardar el archivo Excel enmascarado
+        modo_prueba: Si se debe procesar solo una muestra de 20 filas
+        streaming: Forzar (True) o desactivar (False) el modo streaming. Si es None,
+            se usa streaming para archivos de al menos MASKING_STREAMING_MIN_MB
     """
     # Verificar si el archivo existe
     if not os.path.exists(file_path):
         print(f"❌ No se encontró el archivo: {file_path}")
         return
         
-    # Cargar el workbook
+    # Los archivos grandes se procesan en streaming para mantener la memoria constante
+    if streaming is None:
+        streaming = os.path.getsize(file_path) >= MASKING_STREAMING_MIN_MB * 1024 * 1024
+    if streaming:
+        process_xlsx_streaming(file_path, output_path, modo_prueba=modo_prueba)
+        return
+        
+    # Cargar el workbook completo (conserva formatos e imágenes)
     wb = openpyxl.load_workbook(file_path)
     
     # Procesar solo la hoja llamada "data"
@@ -136,18 +698,8 @@ def process_xlsx(file_path: str, output_path: str, modo_prueba: bool = False) ->
     ws = wb['data']
     
     # Leer cabecera para identificar las columnas
-    header = [cell.value.lower() if isinstance(cell.value, str) else '' for cell in ws[1]]
-    
-    # Identificar índices de columnas especiales
-    try:
-        address_idx = header.index('address')
-    except ValueError:
-        address_idx = None
-        
-    email_indices = [i for i, col in enumerate(header) if 'email' in col]
-    phone_indices = [i for i, col in enumerate(header) if 'phone' in col or 'tel' in col]
-    social_indices = [i for i, col in enumerate(header) 
-                     if any(s in col for s in ['facebook', 'instagram', 'linkedin', 'x', 'twitter'])]
+    header = [cell.value for cell in ws[1]]
+    plan = _plan_with_detections(header)
 
     # Limitar filas en modo prueba
     max_row = None
@@ -155,63 +707,33 @@ def process_xlsx(file_path: str, output_path: str, modo_prueba: bool = False) ->
         max_row = 21  # Fila 1 (cabecera) + 20 filas de datos
         print(f"🧪 Modo prueba: procesando solo 20 filas")
     
-    # Procesar cada fila
-    for i, row in enumerate(ws.iter_rows(min_row=2), start=2):
-        # Salir si alcanzamos el límite en modo prueba
-        if modo_prueba and i > max_row:
-            break
-        # Enmascarar vocales en la columna 'address'
-        if address_idx is not None:
-            cell = row[address_idx]
-            if isinstance(cell.value, str):
-                cell.value = mask_vowels(cell.value)
-                
-        # Enmascarar emails
-        for idx in email_indices:
-            cell = row[idx]
-            if isinstance(cell.value, str) and '@' in cell.value:
-                cell.value = mask_email(cell.value)
-                
-        # Enmascarar teléfonos
-        for idx in phone_indices:
-            cell = row[idx]
-            if isinstance(cell.value, str) and any(ch.isdigit() for ch in cell.value):
-                cell.value = mask_phone(cell.value)
-                
-        # Enmascarar redes sociales
-        for idx in social_indices:
-            cell = row[idx]
-            if isinstance(cell.value, str) and '/' in cell.value:
-                cell.value = mask_social(cell.value)
-                
-        # Verificar otras celdas que podrían contener datos sensibles
-        for cell in row:
-            if not isinstance(cell.value, str):
-                continue
-                
-            val = cell.value.lower()
-            
-            # Detectar emails no identificados por la columna
-            if '@' in val and '.' in val and not any(i == cell.column - 1 for i in email_indices):
-                cell.value = mask_email(cell.value)
-                
-            # Detectar teléfonos no identificados por la columna
-            elif (any(ch.isdigit() for ch in val) and len(val) >= 7 and 
-                  not any(i == cell.column - 1 for i in phone_indices)):
-                if sum(1 for ch in val if ch.isdigit()) >= 6:  # Al menos 6 dígitos para ser teléfono
-                    cell.value = mask_phone(cell.value)
+    # Enmascarar todas las filas de una vez y volcar solo las celdas modificadas
+    rows = list(ws.iter_rows(min_row=2, max_row=max_row))
+    if rows:
+        masked = _mask_rows([[cell.value for cell in row] for row in rows], plan)
+        for row, values in zip(rows, masked.itertuples(index=False, name=None)):
+            for cell, value in zip(row, values):
+                if value is not cell.value:
+                    cell.value = value
+        # Una muestra de 20 filas no es representativa del esquema
+        if not modo_prueba:
+            record_schema_detections(header, plan)
 
     # Guardar el archivo procesado
     wb.save(output_path)
     print(f"✅ Excel procesado: {os.path.basename(file_path)}")
 
-def mask_file(file_path: str, output_path: Optional[str] = None, modo_prueba: bool = False) -> None:
+def mask_file(file_path: str, output_path: Optional[str] = None, modo_prueba: bool = False,
+              streaming: Optional[bool] = None) -> None:
     """
     Enmascara datos sensibles en un archivo CSV o Excel.
     
     Args:
         file_path: Ruta al archivo a procesar
         output_path: Ruta opcional donde guardar el resultado
+        modo_prueba: Si se debe procesar solo una muestra de 20 filas
+        streaming: Modo streaming para Excel y por bloques en paralelo para CSV
+            (None = automático según tamaño)
     """
     # Verificar que el archivo existe
     if not os.path.exists(file_path):
@@ -233,9 +755,9 @@ def mask_file(file_path: str, output_path: Optional[str] = None, modo_prueba: bo
     
     # Procesar según tipo de archivo
     if file_ext == '.csv':
-        process_csv(file_path, output_path, modo_prueba=modo_prueba)
+        process_csv(file_path, output_path, modo_prueba=modo_prueba, chunked=streaming)
     elif file_ext in ['.xlsx', '.xls']:
-        process_xlsx(file_path, output_path, modo_prueba=modo_prueba)
+        process_xlsx(file_path, output_path, modo_prueba=modo_prueba, streaming=streaming)
     else:
         print(f"❌ Formato no soportado: {file_ext}")
         
@@ -0,0 +1,299 @@
+"""
+Módulo para generar archivos demo a partir de una muestra representativa.
+
+En lugar de enmascarar el archivo completo, se recorre una sola vez en modo
+streaming para seleccionar las filas con más reseñas de cada sector
+(main_category) y solo se enmascara esa muestra. Las hojas de estadísticas
+conservan los agregados del conjunto completo.
+"""
+
+import os
+import heapq
+import openpyxl
+import pandas as pd
+from typing import Optional, Dict, Any, List, Tuple, Iterable
+
+from src.core.config import DATA_SHEET, STATS_SHEET, DEMO_SAMPLE_ROWS
+from src.masking.data_masker import mask_dataframe, mask_sheet_rows, read_csv_text
+
+# Columnas usadas para estratificar y ordenar la muestra
+CATEGORY_COLUMN = "main_category"
+REVIEWS_COLUMN = "reviews"
+
+# Columnas de redes sociales contadas en las estadísticas
+SOCIAL_COLUMNS = ["facebook", "instagram", "linkedin", "x"]
+
+# Filas por bloque al recorrer archivos CSV
+CSV_SCAN_CHUNK_ROWS = 50_000
+
+
+def _to_reviews(value: Any) -> float:
+    """Convierte el valor de 'reviews' a número (las celdas no numéricas van al final)."""
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return float("-inf")
+    return number if number == number else float("-inf")  # NaN
+
+
+def _split_values(value: Any) -> List[str]:
+    """Separa una celda con varios valores separados por comas."""
+    if not isinstance(value, str):
+        return []
+    return [v.strip() for v in value.split(",") if v.strip()]
+
+
+def _is_filled(value: Any) -> bool:
+    """Indica si una celda tiene contenido."""
+    if value is None:
+        return False
+    if isinstance(value, float) and value != value:
+        return False
+    return str(value).strip() != ""
+
+
+def _allocate_quotas(counts: Dict[Any, int], sample_size: int) -> Dict[Any, int]:
+    """
+    Reparte el tamaño de muestra entre sectores de forma proporcional a su
+    número de filas (método del mayor resto, al menos una fila por sector
+    mientras haya cupo).
+
+    Args:
+        counts: Número de filas por sector
+        sample_size: Tamaño total de la muestra
+
+    Returns:
+        Diccionario con el número de filas a tomar de cada sector
+    """
+    total = sum(counts.values())
+    if total <= sample_size:
+        return dict(counts)
+
+    # Sectores ordenados de mayor a menor tamaño
+    ordered = sorted(counts.items(), key=lambda item: item[1], reverse=True)
+    quotas = {cat: 0 for cat, _ in ordered}
+
+    # Garantizar representación de los sectores más grandes
+    for cat, _ in ordered[:sample_size]:
+        quotas[cat] = 1
+    remaining = sample_size - sum(quotas.values())
+
+    if remaining > 0:
+        exact = {cat: count / total * remaining for cat, count in ordered}
+        for cat, _ in ordered:
+            extra = min(int(exact[cat]), counts[cat] - quotas[cat])
+            quotas[cat] += extra
+        remaining = sample_size - sum(quotas.values())
+
+        # Repartir el resto por mayor parte decimal
+        by_remainder = sorted(ordered, key=lambda item: exact[item[0]] - int(exact[item[0]]), reverse=True)
+        while remaining > 0:
+            assigned = False
+            for cat, count in by_remainder:
+                if remaining == 0:
+                    break
+                if quotas[cat] < count:
+                    quotas[cat] += 1
+                    remaining -= 1
+                    assigned = True
+            if not assigned:
+                break
+
+    return quotas
+
+
+def select_demo_sample(header: List[Any], rows: Iterable[Iterable[Any]],
+                       sample_size: int = DEMO_SAMPLE_ROWS) -> Tuple[List[List[Any]], Dict[str, Any]]:
+    """
+    Selecciona una muestra estratificada por sector con las filas de más reseñas
+    y calcula los agregados del conjunto completo en la misma pasada.
+
+    Solo se mantienen en memoria, como mucho, sample_size filas por sector.
+
+    Args:
+        header: Cabecera de los datos
+        rows: Iterable de filas (sin cabecera)
+        sample_size: Número de filas de la muestra
+
+    Returns:
+        Tupla (filas de la muestra ordenadas por reseñas, agregados del conjunto completo)
+    """
+    names = [col.lower() if isinstance(col, str) else '' for col in header]
+    category_idx = names.index(CATEGORY_COLUMN) if CATEGORY_COLUMN in names else None
+    reviews_idx = names.index(REVIEWS_COLUMN) if REVIEWS_COLUMN in names else None
+    email_idx = names.index("email") if "email" in names else None
+    phone_idx = names.index("phone") if "phone" in names else None
+    website_idx = names.index("website") if "website" in names else None
+    social_indices = [names.index(col) for col in SOCIAL_COLUMNS if col in names]
+
+    heaps: Dict[Any, List] = {}
+    counts: Dict[Any, int] = {}
+    emails, domains = set(), set()
+    aggregates = {"companies": 0, "phones": 0, "socials": 0}
+
+    for position, row in enumerate(rows):
+        row = list(row)
+        if not any(_is_filled(v) for v in row):
+            continue
+        row += [None] * (len(header) - len(row))
+
+        # Agregados del conjunto completo
+        aggregates["companies"] += 1
+        if email_idx is not None:
+            emails.update(_split_values(row[email_idx]))
+        if phone_idx is not None and _is_filled(row[phone_idx]):
+            aggregates["phones"] += 1
+        if website_idx is not None and _is_filled(row[website_idx]):
+            domains.add(row[website_idx])
+        aggregates["socials"] += sum(1 for i in social_indices if _is_filled(row[i]))
+
+        # Top-N por reseñas dentro de cada sector (min-heap acotado)
+        category = row[category_idx] if category_idx is not None else None
+        if not _is_filled(category):
+            category = None
+        counts[category] = counts.get(category, 0) + 1
+        reviews = _to_reviews(row[reviews_idx]) if reviews_idx is not None else 0.0
+        entry = (reviews, -position, row)
+        heap = heaps.setdefault(category, [])
+        if len(heap) < sample_size:
+            heapq.heappush(heap, entry)
+        elif entry[:2] > heap[0][:2]:
+            heapq.heapreplace(heap, entry)
+
+    # Tomar de cada sector su cupo proporcional
+    quotas = _allocate_quotas(counts, sample_size)
+    selected = []
+    for category, heap in heaps.items():
+        best = heapq.nlargest(quotas.get(category, 0), heap, key=lambda e: e[:2])
+        selected.extend(best)
+    selected.sort(key=lambda e: e[:2], reverse=True)
+
+    stats = {
+        "Number of companies": aggregates["companies"],
+        "Number of emails (unique)": len(emails),
+        "Number of phone numbers": aggregates["phones"],
+        "Number of domains": len(domains),
+        "Number of social networks": aggregates["socials"],
+        "sectors": {cat: n for cat, n in counts.items() if cat is not None},
+    }
+    return [entry[2] for entry in selected], stats
+
+
+def _stats_sheet_rows(stats: Dict[str, Any]) -> List[List[Any]]:
+    """Convierte los agregados en filas para la hoja de estadísticas."""
+    metrics = {k: v for k, v in stats.items() if k != "sectors"}
+    return [list(metrics.keys()), list(metrics.values())]
+
+
+def _sectors_sheet_rows(stats: Dict[str, Any]) -> List[List[Any]]:
+    """Convierte el recuento por sector en filas para la hoja de sectores."""
+    sectors = sorted(stats["sectors"].items(), key=lambda item: item[1], reverse=True)
+    return [["Sector", "Number of companies"]] + [[cat, n] for cat, n in sectors]
+
+
+def _generate_demo_xlsx(file_path: str, output_path: str, sample_size: int) -> int:
+    """
+    Genera el demo de un Excel: muestra enmascarada en 'data' y el resto de hojas
+    del original intactas, con sus formatos e imágenes (con agregados calculados
+    si faltan).
+
+    La muestra se selecciona en una pasada de solo lectura; después se carga el
+    original y solo se sustituyen las filas de 'data'.
+
+    Returns:
+        Número de filas de la muestra
+    """
+    wb_in = openpyxl.load_workbook(file_path, read_only=True)
+    try:
+        if DATA_SHEET not in wb_in.sheetnames:
+            print(f"❌ No se encontró la hoja '{DATA_SHEET}' en {file_path}")
+            return 0
+
+        rows = wb_in[DATA_SHEET].iter_rows(values_only=True)
+        header = list(next(rows, None) or [])
+        sample, stats = select_demo_sample(header, rows, sample_size)
+    finally:
+        wb_in.close()
+
+    # Las hojas del original ya reflejan el conjunto completo (incluidas las
+    # imágenes de estadísticas): solo se reemplazan las filas de datos
+    wb = openpyxl.load_workbook(file_path)
+    ws_data = wb[DATA_SHEET]
+    if ws_data.max_row > 1:
+        ws_data.delete_rows(2, ws_data.max_row - 1)
+    for row in mask_sheet_rows(header, sample):
+        ws_data.append(row)
+
+    # Agregados precalculados durante el recorrido si el original no los trae
+    if STATS_SHEET not in wb.sheetnames:
+        ws_stats = wb.create_sheet(title=STATS_SHEET)
+        for row in _stats_sheet_rows(stats):
+            ws_stats.append(row)
+    if "sectors" not in wb.sheetnames and stats["sectors"]:
+        ws_sectors = wb.create_sheet(title="sectors")
+        for row in _sectors_sheet_rows(stats):
+            ws_sectors.append(row)
+
+    wb.save(output_path)
+    return len(sample)
+
+
+def _generate_demo_csv(file_path: str, output_path: str, sample_size: int) -> int:
+    """
+    Genera el demo de un CSV con la muestra enmascarada.
+
+    Returns:
+        Número de filas de la muestra
+    """
+    def iter_rows():
+        # Como texto, igual que process_csv (los teléfonos numéricos también se enmascaran)
+        for chunk in read_csv_text(file_path, chunksize=CSV_SCAN_CHUNK_ROWS):
+            yield from chunk.itertuples(index=False, name=None)
+
+    header = list(read_csv_text(file_path, nrows=0).columns)
+    sample, _ = select_demo_sample(header, iter_rows(), sample_size)
+    df_sample = pd.DataFrame(sample, columns=header)
+    mask_dataframe(df_sample).to_csv(output_path, index=False)
+    return len(sample)
+
+
+def generate_demo_file(file_path: str, output_path: Optional[str] = None,
+                       sample_size: int = DEMO_SAMPLE_ROWS, modo_prueba: bool = False) -> Optional[str]:
+    """
+    Genera un archivo demo enmascarando solo una muestra representativa.
+
+    Args:
+        file_path: Ruta al archivo CSV o Excel de entrada
+        output_path: Ruta opcional donde guardar el demo
+        sample_size: Número de filas de la muestra
+        modo_prueba: Si es True, la muestra se limita a 20 filas
+
+    Returns:
+        Ruta al archivo generado, o None si no se pudo generar
+    """
+    if not os.path.exists(file_path):
+        print(f"❌ No se encontró el archivo: {file_path}")
+        return None
+
+    file_ext = os.path.splitext(file_path)[1].lower()
+
+    # Si no se especifica ruta de salida, crear una por defecto
+    if output_path is None:
+        name, ext = os.path.splitext(file_path)
+        output_path = f"{name}_demo{ext}"
+    os.makedirs(os.path.dirname(output_path), exist_ok=True)
+
+    if modo_prueba:
+        sample_size = min(sample_size, 20)
+        print(f"🧪 Modo prueba: muestra de {sample_size} filas")
+
+    if file_ext == '.csv':
+        filas = _generate_demo_csv(file_path, output_path, sample_size)
+    elif file_ext in ['.xlsx', '.xls']:
+        filas = _generate_demo_xlsx(file_path, output_path, sample_size)
+    else:
+        print(f"❌ Formato no soportado: {file_ext}")
+        return None
+
+    print(f"✅ Demo generado con una muestra de {filas} filas: {os.path.basename(file_path)}")
+    return output_path
@@ -3,23 +3,38 @@ Módulo para extracción de emails de sitios web.
 """
 
 import re
+from typing import Optional
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.common.by import By
 
-from src.utils.selenium_utils import setup_driver
+from src.utils.selenium_utils import setup_driver, apply_deadline
 from src.core.error_handler import ErrorHandler
+from src.core.memoize import cached, skip_cache
+from src.core.dead_hosts import get_dead_hosts
+from src.core.url_store import normalize_url
+from src.core.deadline import Deadline, remaining_or
+from src.core.config import MEMO_EXTRACTION_TTL
 
 # Inicializar manejador de errores
 error_handler = ErrorHandler()
 
-@error_handler.with_retry(max_retries=3, delay=2.0)
+@cached(
+    "emails",
+    ttl=MEMO_EXTRACTION_TTL,
+    key_fn=lambda url, modo_verificacion='avanzado', driver=None, wait_timeout=10, verify_emails=True, html=None,
+                  deadline=None:
+        f"{normalize_url(url) if isinstance(url, str) else url}|{modo_verificacion}|{verify_emails}"
+        f"|{'browser' if html is None else 'http'}"
+)
 def extract_emails_from_url(
     url: str,
     modo_verificacion: str = 'avanzado',
     driver=None,
     wait_timeout: int = 10,
-    verify_emails: bool = True
+    verify_emails: bool = True,
+    html: Optional[str] = None,
+    deadline: Optional[Deadline] = None
 ):
     """
     Extrae emails de la URL dada usando Selenium driver compartido.
@@ -28,25 +43,41 @@ def extract_emails_from_url(
     - driver: instancia de Selenium; si no se pasa, se crea y cierra internamente.
     - wait_timeout: segundos a esperar por carga de <body>.
     - verify_emails: si se debe verificar la validez de los emails
+    - html: HTML ya descargado (ej. snapshot de page_cache); si se pasa, no se usa Selenium.
+    - deadline: presupuesto de tiempo de la fila; las esperas se recortan a lo que
+      queda y, si se agota, se devuelve lo obtenido y la fila queda como parcial.
 
-    Retorna lista de emails válidos.
+    Retorna lista de emails válidos. Los errores temporales (timeouts, red) se
+    propagan para que el planificador reintente la fila.
     """
     if not url or not isinstance(url, str) or not url.lower().startswith(('http://', 'https://')):
         print(f"⚠️ URL inválida, saltando: {url}")
         return []
 
+    # Los hosts con errores permanentes recientes no se vuelven a cargar
+    dead_hosts = get_dead_hosts()
+    if dead_hosts.is_dead(url):
+        print(f"⛔ Host inaccesible, saltando: {url}")
+        return []
+
     driver_created = False
-    if driver is None:
+    if driver is None and html is None:
         driver = setup_driver()
         driver_created = True
 
     try:
-        driver.get(url)
-        # Espera explícita a que el <body> esté presente (carga completa)
-        WebDriverWait(driver, wait_timeout).until(
-            EC.presence_of_element_located((By.TAG_NAME, 'body'))
-        )
-        html = driver.page_source
+        if html is None:
+            if deadline is not None and deadline.expired():
+                deadline.mark_partial("emails")
+                skip_cache()
+                return []
+            apply_deadline(driver, deadline)
+            driver.get(url)
+            # Espera explícita a que el <body> esté presente (carga completa)
+            WebDriverWait(driver, remaining_or(deadline, wait_timeout)).until(
+                EC.presence_of_element_located((By.TAG_NAME, 'body'))
+            )
+            html = driver.page_source
 
         # Extraer con regex
         raw_emails = set(re.findall(
@@ -60,7 +91,12 @@ def extract_emails_from_url(
             from src.utils.email_verifier import verificar_existencia_email, determinar_estado
             
             for e in raw_emails:
-                resultados = verificar_existencia_email(e, modo=modo_verificacion)
+                # Sin tiempo para verificar el resto: devolver los ya verificados
+                if deadline is not None and deadline.expired():
+                    deadline.mark_partial("verify")
+                    skip_cache()
+                    break
+                resultados = verificar_existencia_email(e, modo=modo_verificacion, deadline=deadline)
                 estado = determinar_estado(resultados, modo=modo_verificacion)
                 if estado == 'Válido':
                     valid_emails.append(e)
@@ -74,6 +110,18 @@ def extract_emails_from_url(
         print(f"❌ Error en {url}: {e}")
         # Registrar error para análisis posterior
         error_handler.log_error(e, {"url": url, "operation": "extract_emails"})
+        reason = error_handler.permanent_error_reason(e)
+        if reason:
+            dead_hosts.mark_dead(url, reason, str(e))
+        elif deadline is not None and deadline.expired():
+            # El timeout se debe al presupuesto de la fila: no tiene sentido reintentar
+            deadline.mark_partial("emails")
+            skip_cache()
+        elif error_handler.is_retriable_error(e):
+            # El planificador reintenta la fila más tarde sin bloquear este hilo
+            raise
+        else:
+            skip_cache()
         return []
 
     finally:
@@ -0,0 +1,177 @@
+"""
+Descarga HTTP de páginas con caché de snapshots y revalidación condicional.
+
+Cada página descargada se guarda en la caché compartida (namespace "page",
+comprimido) junto con sus cabeceras ETag / Last-Modified y la URL final tras
+las redirecciones. En las siguientes ejecuciones se envía una petición
+condicional (If-None-Match / If-Modified-Since): si el servidor responde 304
+se reutiliza el snapshot sin volver a descargar ni renderizar la página.
+"""
+
+import time
+import logging
+import threading
+from email.utils import parsedate_to_datetime
+from typing import Dict, Any, Optional
+
+import requests
+
+from src.core.memoize import get_shared_cache
+from src.core.dead_hosts import get_dead_hosts
+from src.core.rate_limiter import get_rate_limiter, RateLimitedError
+from src.core.error_handler import ErrorHandler
+from src.core.url_store import normalize_url
+from src.core.config import (
+    DEFAULT_TIMEOUT, PAGE_SNAPSHOT_TTL_DAYS, PAGE_SNAPSHOT_MAX_SIZE_MB, PAGE_SNAPSHOT_MAX_PAGE_KB
+)
+
+logger = logging.getLogger("page_cache")
+
+error_handler = ErrorHandler()
+
+PAGE_NAMESPACE = "page"
+USER_AGENT = "Mozilla/5.0"
+
+# Sesión HTTP por hilo (reutiliza conexiones keep-alive)
+_local = threading.local()
+_namespace_lock = threading.Lock()
+_namespace_registered = False
+
+stats = {"fetched": 0, "not_modified": 0, "failed": 0, "dead": 0, "rate_limited": 0}
+
+
+def _session() -> requests.Session:
+    """Obtiene la sesión HTTP del hilo actual."""
+    session = getattr(_local, "session", None)
+    if session is None:
+        session = requests.Session()
+        session.headers["User-Agent"] = USER_AGENT
+        _local.session = session
+    return session
+
+
+def _page_cache():
+    """Obtiene la caché compartida con el namespace de páginas registrado."""
+    global _namespace_registered
+    cache = get_shared_cache()
+    with _namespace_lock:
+        if not _namespace_registered:
+            cache.register_namespace(
+                PAGE_NAMESPACE,
+                ttl=PAGE_SNAPSHOT_TTL_DAYS * 86400,
+                max_size_mb=PAGE_SNAPSHOT_MAX_SIZE_MB,
+                compression="zstd"
+            )
+            _namespace_registered = True
+    return cache
+
+
+def _retry_after(response) -> Optional[float]:
+    """Segundos de la cabecera Retry-After (numérica o fecha HTTP), o None si no hay."""
+    value = response.headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def get_snapshot(url: str) -> Optional[Dict[str, Any]]:
+    """
+    Obtiene el snapshot guardado de una URL sin hacer ninguna petición.
+
+    Args:
+        url: URL de la página
+
+    Returns:
+        Diccionario con url, final_url, html, etag, last_modified y fetched_at, o None
+    """
+    return _page_cache().get(f"{PAGE_NAMESPACE}:{normalize_url(url)}")
+
+
+def fetch_page(url: str, timeout: float = DEFAULT_TIMEOUT) -> Optional[Dict[str, Any]]:
+    """
+    Descarga una página HTML, revalidando el snapshot guardado si existe.
+
+    Args:
+        url: URL de la página
+        timeout: Timeout de la petición (segundos)
+
+    Returns:
+        Snapshot de la página (ver get_snapshot), o None si no se pudo obtener
+        HTML por HTTP (el llamador puede recurrir a Selenium)
+        
+    Raises:
+        RateLimitedError: Si el servidor pide bajar el ritmo; el host queda en
+            pausa en el limitador y la fila debe reintentarse más tarde (no con
+            Selenium contra el mismo host)
+    """
+    dead_hosts = get_dead_hosts()
+    if dead_hosts.is_dead(url):
+        stats["dead"] += 1
+        return None
+
+    cache = _page_cache()
+    key = f"{PAGE_NAMESPACE}:{normalize_url(url)}"
+    snapshot = cache.get(key)
+
+    # Petición condicional si hay un snapshot con validadores
+    headers = {}
+    if snapshot:
+        if snapshot.get("etag"):
+            headers["If-None-Match"] = snapshot["etag"]
+        if snapshot.get("last_modified"):
+            headers["If-Modified-Since"] = snapshot["last_modified"]
+
+    try:
+        response = _session().get(url, headers=headers, timeout=timeout, allow_redirects=True)
+    except requests.RequestException as e:
+        logger.debug(f"No se pudo descargar {url}: {e}")
+        stats["failed"] += 1
+        # Solo DNS y conexión rechazada: los fallos TLS de requests (ej. cadena de
+        # certificados incompleta) pueden no reproducirse en el navegador
+        reason = error_handler.permanent_error_reason(e)
+        if reason in ("dns", "refused"):
+            dead_hosts.mark_dead(url, reason, str(e))
+        return None
+
+    try:
+        retry_after = _retry_after(response)
+        if response.status_code == 429 or (response.status_code == 503 and retry_after is not None):
+            stats["rate_limited"] += 1
+            get_rate_limiter().penalize(url, retry_after)
+            raise RateLimitedError(f"HTTP {response.status_code} en {url}")
+
+        if response.status_code == 304 and snapshot:
+            stats["not_modified"] += 1
+            snapshot["fetched_at"] = time.time()
+            cache.set(key, snapshot)
+            return snapshot
+
+        content_type = response.headers.get("Content-Type", "")
+        if response.status_code != 200 or "html" not in content_type.lower():
+            stats["failed"] += 1
+            return None
+
+        html = response.text
+        snapshot = {
+            "url": url,
+            "final_url": response.url,
+            "html": html,
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+            "fetched_at": time.time()
+        }
+        stats["fetched"] += 1
+
+        # Las páginas enormes no compensan el espacio que ocuparían
+        if len(html) <= PAGE_SNAPSHOT_MAX_PAGE_KB * 1024:
+            cache.set(key, snapshot)
+        return snapshot
+    finally:
+        response.close()
@@ -0,0 +1,216 @@
+"""
+Planificador de filas de scraping con reintentos diferidos.
+
+En lugar de esperar dentro del hilo de trabajo (con su navegador ocupado)
+antes de reintentar, las filas que fallan con un error temporal vuelven a la
+cola con una marca de tiempo de backoff exponencial. Mientras tanto los hilos
+siguen procesando filas nuevas; cada fila tiene un presupuesto de intentos.
+Las filas de un host con el circuito abierto (ver circuit_breaker) se aplazan
+sin consumir intentos, hasta un máximo de aplazamientos.
+
+Las filas listas se agrupan por host y los hosts se recorren por turnos, de
+modo que las filas de un mismo sitio se intercalan con las de otros. Si el
+limitador de ritmo (ver rate_limiter) no admite ahora la fila de un host, se
+pasa al siguiente en lugar de bloquear un hilo detrás de él.
+"""
+
+import time
+import heapq
+import threading
+from collections import deque
+from typing import Dict, Any, Callable, Iterable, List, Optional, Tuple
+
+from src.core.config import (
+    SCRAPE_MAX_ATTEMPTS, RETRY_BASE_DELAY, RETRY_BACKOFF_FACTOR, RETRY_MAX_DELAY, CIRCUIT_MAX_DEFERRALS
+)
+
+
+class RetryScheduler:
+    """
+    Cola de filas pendientes con una cola de reintentos ordenada por el
+    momento en que cada fila vuelve a estar disponible. Es segura entre hilos.
+    """
+
+    def __init__(
+        self,
+        row_ids: Iterable[int],
+        max_attempts: int = SCRAPE_MAX_ATTEMPTS,
+        base_delay: float = RETRY_BASE_DELAY,
+        backoff_factor: float = RETRY_BACKOFF_FACTOR,
+        max_delay: float = RETRY_MAX_DELAY,
+        max_deferrals: int = CIRCUIT_MAX_DEFERRALS,
+        key_fn: Optional[Callable[[int], str]] = None
+    ):
+        """
+        Inicializa el planificador.
+
+        Args:
+            row_ids: Filas a procesar, en orden
+            max_attempts: Intentos máximos por fila
+            base_delay: Espera antes del primer reintento (segundos)
+            backoff_factor: Factor de incremento de la espera entre reintentos
+            max_delay: Espera máxima entre reintentos (segundos)
+            max_deferrals: Aplazamientos máximos de una fila antes de descartarla
+            key_fn: Función fila -> host con la que se reparten los turnos (sin
+                ella todas las filas comparten una única cola)
+        """
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.backoff_factor = backoff_factor
+        self.max_delay = max_delay
+        self.max_deferrals = max_deferrals
+
+        self.key_fn = key_fn
+
+        self._lock = threading.Lock()
+        self._queues: Dict[str, deque] = {}  # Host -> filas listas (solo hosts con filas)
+        self._turns = deque()  # Hosts con filas listas, en orden de turno
+        self._delayed: List[Tuple[float, int]] = []  # Heap de (disponible_en, row_id)
+        self._throttled_until = 0.0  # Próximo momento en que el limitador admitirá una fila
+        self.attempts: Dict[int, int] = {}
+        self.deferrals: Dict[int, int] = {}
+        self.stats = {"dispatched": 0, "retries": 0, "exhausted": 0, "deferred": 0, "shed": 0, "throttled": 0}
+
+        for row_id in row_ids:
+            self._push_ready(row_id)
+
+    def _push_ready(self, row_id: int, front: bool = False) -> None:
+        """Pone una fila en la cola de su host (llamar con el lock tomado o en __init__)."""
+        key = self.key_fn(row_id) if self.key_fn else ""
+        queue = self._queues.get(key)
+        if queue is None:
+            queue = self._queues[key] = deque()
+            self._turns.append(key)
+        if front:
+            queue.appendleft(row_id)
+        else:
+            queue.append(row_id)
+
+    def pop_ready(self, admit: Optional[Callable[[int], Tuple[bool, float]]] = None) -> Optional[int]:
+        """
+        Obtiene la siguiente fila lista para procesar, turnando los hosts
+        (dentro de cada host, primero los reintentos vencidos), y cuenta el
+        intento.
+
+        Args:
+            admit: Función fila -> (admitida, segundos de espera) que consulta el
+                limitador de ritmo; los hosts cuya fila no se admite ceden el turno.
+                Se llama con el lock del planificador tomado, así que no debe
+                bloquear (ej. resolver DNS)
+
+        Returns:
+            Identificador de la fila, o None si no hay ninguna lista (o admitida) ahora
+        """
+        with self._lock:
+            now = time.time()
+            while self._delayed and self._delayed[0][0] <= now:
+                _, row_id = heapq.heappop(self._delayed)
+                self._push_ready(row_id, front=True)
+
+            self._throttled_until = 0.0
+            wait = None
+            for _ in range(len(self._turns)):
+                key = self._turns.popleft()
+                queue = self._queues[key]
+                row_id = queue[0]
+
+                if admit is not None:
+                    allowed, delay = admit(row_id)
+                    if not allowed:
+                        # El host cede el turno sin perder su posición en su cola
+                        self._turns.append(key)
+                        wait = delay if wait is None else min(wait, delay)
+                        continue
+
+                queue.popleft()
+                if queue:
+                    self._turns.append(key)
+                else:
+                    del self._queues[key]
+
+                self.attempts[row_id] = self.attempts.get(row_id, 0) + 1
+                self.stats["dispatched"] += 1
+                return row_id
+
+            if wait is not None:
+                self._throttled_until = now + wait
+                self.stats["throttled"] += 1
+            return None
+
+    def retry(self, row_id: int) -> Optional[float]:
+        """
+        Devuelve una fila fallida a la cola con backoff exponencial.
+
+        Args:
+            row_id: Fila que falló con un error temporal
+
+        Returns:
+            Segundos hasta el reintento, o None si la fila agotó sus intentos
+        """
+        with self._lock:
+            attempts = self.attempts.get(row_id, 1)
+            if attempts >= self.max_attempts:
+                self.stats["exhausted"] += 1
+                return None
+
+            delay = min(self.base_delay * self.backoff_factor ** (attempts - 1), self.max_delay)
+            heapq.heappush(self._delayed, (time.time() + delay, row_id))
+            self.stats["retries"] += 1
+            return delay
+
+    def defer(self, row_id: int, delay: float) -> bool:
+        """
+        Aplaza una fila obtenida con pop_ready sin llegar a procesarla (ej. su
+        host tiene el circuito abierto); no consume un intento.
+
+        Args:
+            row_id: Fila a aplazar
+            delay: Segundos hasta que vuelva a estar disponible
+
+        Returns:
+            False si la fila agotó sus aplazamientos y debe descartarse
+        """
+        with self._lock:
+            self.attempts[row_id] -= 1
+            self.stats["dispatched"] -= 1
+
+            self.deferrals[row_id] = self.deferrals.get(row_id, 0) + 1
+            if self.deferrals[row_id] > self.max_deferrals:
+                self.stats["shed"] += 1
+                return False
+
+            heapq.heappush(self._delayed, (time.time() + delay, row_id))
+            self.stats["deferred"] += 1
+            return True
+
+    def seconds_until_next(self) -> Optional[float]:
+        """
+        Tiempo hasta que haya una fila disponible.
+
+        Returns:
+            0 si hay filas listas, los segundos hasta que el limitador admita
+            alguna o hasta el próximo reintento, o None si no queda nada en cola
+        """
+        with self._lock:
+            now = time.time()
+            waits = []
+            if self._queues:
+                waits.append(max(0.0, self._throttled_until - now))
+            if self._delayed:
+                waits.append(max(0.0, self._delayed[0][0] - now))
+            return min(waits) if waits else None
+
+    def has_pending(self) -> bool:
+        """Indica si quedan filas en cola (listas o esperando reintento)."""
+        with self._lock:
+            return bool(self._queues or self._delayed)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Estadísticas del planificador."""
+        with self._lock:
+            return {
+                **self.stats,
+                "ready": sum(len(queue) for queue in self._queues.values()),
+                "hosts": len(self._queues),
+                "delayed": len(self._delayed)
+            }
@@ -12,11 +12,25 @@ from typing import List, Dict, Any, Optional
 from concurrent.futures import ThreadPoolExecutor, as_completed
 import concurrent.futures
 
-from src.core.config import MAX_WORKERS
-from src.core.checkpoint_manager import CheckpointManager
+from src.core.config import (
+    MAX_WORKERS, URL_STORE_ENABLED, PAGE_SNAPSHOT_ENABLED, DEFAULT_TIMEOUT, ADAPTIVE_CONCURRENCY_ENABLED,
+    RATE_LIMIT_ENABLED, CHECKPOINT_FLUSH_INTERVAL
+)
+from src.core.error_handler import ErrorHandler
+from src.core.circuit_breaker import get_circuit_breaker
+from src.core.deadline import Deadline
+from src.core.concurrency import ConcurrencyController
+from src.core.checkpoint_manager import get_checkpoint_manager
+from src.core.url_store import get_url_store
+from src.core.dead_hosts import get_dead_hosts, url_host
+from src.core.rate_limiter import get_rate_limiter
+from src.core.memoize import reset_skip, cache_skipped
 from src.scraping.email_scraper import extract_emails_from_url
 from src.scraping.social_scraper import extract_social_links_from_url
+from src.scraping.page_cache import fetch_page
+from src.scraping.scheduler import RetryScheduler
 from src.utils.selenium_utils import setup_driver
+from src.utils.driver_pool import get_driver_pool
 
 # Configuración de logging
 logger = logging.getLogger("scraper")
@@ -24,20 +38,65 @@ logger = logging.getLogger("scraper")
 # Thread-local para los drivers
 thread_local = threading.local()
 
-def _init_thread_driver():
-    """Inicializa un driver por hilo."""
-    thread_local.driver = setup_driver()
+# Drivers abiertos por los hilos (para limitar, reciclar y cerrar los navegadores)
+driver_pool = get_driver_pool()
 
-def procesar_sitio(row: Dict[str, Any]) -> Dict[str, Any]:
+# Clasificación de errores para decidir si una fila se reintenta
+error_handler = ErrorHandler()
+
+# Circuitos por host / IP: aplazan las filas de hostings caídos
+circuit_breaker = get_circuit_breaker()
+
+# Columnas que añade el scraping a cada fila
+SCRAPED_COLUMNS = ['email', 'facebook', 'instagram', 'linkedin', 'x']
+
+def _get_thread_driver():
+    """Obtiene el driver del hilo, creándolo la primera vez que se necesita."""
+    driver = getattr(thread_local, 'driver', None)
+    if driver is None:
+        driver = setup_driver()
+        thread_local.driver = driver
+        driver_pool.register(driver)
+    return driver
+
+def _release_thread_driver(max_drivers: Optional[int] = None) -> None:
+    """
+    Cierra el driver del hilo si está marcado para reciclar (consumo de
+    memoria, chromedriver muerto) o si hay más navegadores abiertos que el
+    límite de concurrencia (tras una reducción).
+    
+    Args:
+        max_drivers: Navegadores que pueden seguir abiertos (None = sin límite)
+    """
+    driver = getattr(thread_local, 'driver', None)
+    if driver is None:
+        return
+    driver_pool.note_row(driver)
+    reason = driver_pool.release(driver, max_drivers)
+    if reason is None:
+        return
+    thread_local.driver = None
+    logger.info(f"Cerrando driver del hilo: {reason}")
+    try:
+        driver.quit()
+    except Exception:
+        pass
+
+def procesar_sitio(row: Dict[str, Any], deadline: Optional[Deadline] = None) -> Dict[str, Any]:
     """
     Procesa un sitio web extrayendo emails y redes sociales.
     
     Args:
         row: Diccionario con datos de la fila, debe contener 'website'
+        deadline: Presupuesto de tiempo de la fila, compartido por la descarga,
+            los extractores y la verificación (si se agota, deadline.partial)
         
     Returns:
-        Diccionario con datos originales más resultados del scraping
+        Diccionario con datos originales más resultados del scraping.
+        thread_local.fetched indica después si se descargó o renderizó alguna
+        página (las filas resueltas sin red no cuentan para la latencia)
     """
+    thread_local.fetched = False
     raw = row.get('website', '')
     if pd.isna(raw) or not isinstance(raw, str):
         return {**row, 'email':'', 'facebook':'', 'instagram':'', 'linkedin':'', 'x':''}
@@ -46,25 +105,72 @@ def procesar_sitio(row: Dict[str, Any]) -> Dict[str, Any]:
     if not url.lower().startswith(('http://', 'https://')):
         return {**row, 'email':'', 'facebook':'', 'instagram':'', 'linkedin':'', 'x':''}
     
-    # Usar el driver del thread local
-    driver = thread_local.driver
+    # Reutilizar el resultado si el sitio ya se scrapeó recientemente
+    store = get_url_store() if URL_STORE_ENABLED else None
+    stored = store.get(url) if store else None
+    if stored is not None:
+        emails, redes = stored['emails'], stored['social']
+        return _combine_result(row, emails, redes)
     
-    # Extraer emails
-    emails = extract_emails_from_url(
-        url,
-        modo_verificacion='avanzado',
-        driver=driver,
-        wait_timeout=10
-    )
+    # Los hosts con errores permanentes recientes se omiten sin cargar nada
+    dead_hosts = get_dead_hosts()
+    if dead_hosts.is_dead(url):
+        return _combine_result(row, [], {})
     
-    # Extraer redes sociales
-    redes = extract_social_links_from_url(
-        url,
-        driver=driver,
-        wait_timeout=10
-    )
+    # Descargar por HTTP (revalidando el snapshot guardado) antes de renderizar
+    emails, redes = [], {}
+    reset_skip()
+    snapshot = None
+    if PAGE_SNAPSHOT_ENABLED and (deadline is None or deadline.remaining() >= 1):
+        timeout = deadline.clip(DEFAULT_TIMEOUT) if deadline else DEFAULT_TIMEOUT
+        thread_local.fetched = True
+        snapshot = fetch_page(url, timeout=timeout)
+    if snapshot is not None:
+        emails = extract_emails_from_url(url, modo_verificacion='avanzado', html=snapshot['html'],
+                                         deadline=deadline)
+        redes = extract_social_links_from_url(url, html=snapshot['html'], deadline=deadline)
     
-    # Combinar resultados
+    # Las páginas sin resultados en el HTML (ej. contenido generado con
+    # JavaScript) se renderizan con Selenium
+    if snapshot is None or not (emails or any(redes.values())):
+        # La descarga HTTP puede haber detectado que el host no existe
+        if dead_hosts.is_dead(url):
+            return _combine_result(row, [], {})
+        
+        # Usar el driver del thread local (solo cuenta si esta extracción falla)
+        driver = _get_thread_driver()
+        reset_skip()
+        thread_local.fetched = True
+        
+        # Extraer emails
+        emails = extract_emails_from_url(
+            url,
+            modo_verificacion='avanzado',
+            driver=driver,
+            wait_timeout=10,
+            deadline=deadline
+        )
+        
+        # Extraer redes sociales
+        redes = extract_social_links_from_url(
+            url,
+            driver=driver,
+            wait_timeout=10,
+            deadline=deadline
+        )
+    
+    # Guardar para otros archivos y futuras actualizaciones (un host caído
+    # se vuelve a intentar cuando caduca su anotación, no tras URL_STORE_MAX_AGE_DAYS;
+    # un resultado parcial no se reutiliza, ni uno vacío porque un extractor falló)
+    partial = deadline is not None and deadline.partial
+    if store and not partial and not cache_skipped() and not dead_hosts.is_dead(url):
+        status = 'ok' if emails or any(redes.values()) else 'empty'
+        store.put(url, emails, redes, status=status)
+    
+    return _combine_result(row, emails, redes)
+
+def _combine_result(row: Dict[str, Any], emails: List[str], redes: Dict[str, List[str]]) -> Dict[str, Any]:
+    """Combina la fila original con los emails y redes sociales encontrados."""
     return {
         **row,
         'email':      ', '.join(emails),
@@ -74,6 +180,50 @@ def procesar_sitio(row: Dict[str, Any]) -> Dict[str, Any]:
         'x':          ', '.join(redes.get('x', [])),
     }
 
+def _rehydrate_completed_rows(checkpoint_manager, rows: List[Dict[str, Any]],
+                              resultados: List[Optional[Dict[str, Any]]]) -> List[int]:
+    """
+    Rellena los resultados de las filas ya completadas con lo guardado en el
+    checkpoint, conservando los índices originales. Las filas completadas con
+    un resultado parcial (se agotó su tiempo) se rellenan igualmente, pero
+    vuelven a quedar pendientes para completarlas.
+    
+    Args:
+        checkpoint_manager: Gestor de checkpoints del trabajo
+        rows: Filas originales del archivo
+        resultados: Lista de resultados (se modifica en el sitio)
+        
+    Returns:
+        Lista de índices que siguen pendientes de procesar
+    """
+    all_row_ids = list(range(len(rows)))
+    completed_ids = set(all_row_ids) - set(checkpoint_manager.get_pending_rows(all_row_ids))
+    partial_ids = set(checkpoint_manager.get_partial_rows()) if completed_ids else set()
+    completed_results = checkpoint_manager.get_completed_results() if completed_ids else {}
+    pending_ids = []
+    
+    for index, row in enumerate(rows):
+        if index not in completed_ids:
+            pending_ids.append(index)
+            continue
+        
+        stored = completed_results.get(index)
+        if stored is None:
+            # Varias filas con la misma URL comparten un único registro
+            url = row.get('website', '')
+            stored = checkpoint_manager.get_url_result(url) if isinstance(url, str) else None
+        
+        if stored is None:
+            pending_ids.append(index)
+            continue
+        
+        # Aplicar solo las columnas del scraping sobre la fila original
+        resultados[index] = {**row, **{col: stored.get(col, '') for col in SCRAPED_COLUMNS}}
+        if index in partial_ids:
+            pending_ids.append(index)
+    
+    return pending_ids
+
 def procesar_archivo_csv(
     archivo: str, 
     carpeta_entrada: str, 
@@ -124,63 +274,98 @@ def procesar_archivo_csv(
         rows = df.to_dict(orient='records')
         
         # Crear checkpoint manager
-        checkpoint_manager = CheckpointManager(
+        checkpoint_manager = get_checkpoint_manager(
             job_name=f"scrape_{archivo}"
         )
         
+        # Límite de filas en curso: adaptativo (AIMD) partiendo de max_workers, o fijo
+        controller = ConcurrencyController(initial=max_workers) if ADAPTIVE_CONCURRENCY_ENABLED else None
+        pool_size = max(max_workers, controller.max_workers) if controller else max_workers
+        
         print(f"\n▶️ Iniciando procesamiento de {archivo} con {len(rows)} filas")
-        print(f"🧵 Utilizando {max_workers} hilos en paralelo")
+        if controller:
+            print(f"🧵 Concurrencia adaptativa: {controller.limit} hilos iniciales "
+                  f"(entre {controller.min_workers} y {pool_size})")
+        else:
+            print(f"🧵 Utilizando {max_workers} hilos en paralelo")
         
         # Configurar checkpoint
         checkpoint_manager.set_total_rows(len(rows))
         
-        # Si reanudar=True, filtrar elementos ya procesados
-        if reanudar and not checkpoint_manager.is_completed():
-            all_row_ids = list(range(len(rows)))
-            pending_ids = checkpoint_manager.get_pending_rows(all_row_ids)
-            
+        # Lista para almacenar resultados
+        resultados = [None] * len(rows)
+        pending_ids = list(range(len(rows)))
+        
+        # Si reanudar=True, recuperar del checkpoint las filas ya procesadas
+        if reanudar:
+            pending_ids = _rehydrate_completed_rows(checkpoint_manager, rows, resultados)
             if len(pending_ids) < len(rows):
                 print(f"🔄 Reanudando desde checkpoint: {len(pending_ids)}/{len(rows)} elementos pendientes")
-                # Filtrar solo elementos pendientes para procesar
-                rows_to_process = [rows[i] for i in pending_ids]
-            else:
-                rows_to_process = rows
-        else:
-            rows_to_process = rows
         
-        # Lista para almacenar resultados
-        resultados = [None] * len(rows)
+        # Planificador con reintentos diferidos para errores temporales; con el
+        # límite de ritmo, las filas se turnan por host y cada host / IP tiene su ritmo
+        def _row_url(index: int) -> str:
+            url = rows[index].get('website', '')
+            return url if isinstance(url, str) else ''
+        
+        rate_limiter = get_rate_limiter() if RATE_LIMIT_ENABLED else None
+        scheduler = RetryScheduler(
+            pending_ids,
+            key_fn=(lambda index: url_host(_row_url(index))) if rate_limiter else None
+        )
+        admit = (lambda index: rate_limiter.acquire(_row_url(index))) if rate_limiter else None
         
         # Función de procesamiento con gestión de errores y checkpoints
         def process_item_with_tracking(index_item):
             index, item = index_item
             url = item.get('website', '')
             
-            # Verificar si ya está procesado en el checkpoint
-            if checkpoint_manager.is_row_completed(index):
-                print(f"⏩ Elemento {index}: ya procesado")
-                return index, item
-            
             try:
-                # Procesar el elemento
+                # Procesar el elemento con un presupuesto de tiempo por intento
                 start_time = time.time()
-                result = procesar_sitio(item)
+                deadline = Deadline()
+                result = procesar_sitio(item, deadline=deadline)
                 duration = time.time() - start_time
+                # Solo una fila que cargó alguna página dice algo de la salud del
+                # host (y de la latencia); los aciertos de caché no resuelven DNS
+                if thread_local.fetched:
+                    if isinstance(url, str):
+                        circuit_breaker.record_success(url)
+                    if controller:
+                        controller.record(duration)
                 
                 # Registrar en checkpoint
                 checkpoint_manager.mark_url_processed(
                     row_id=index,
                     url=url,
                     success=True,
-                    result=result
+                    result=result,
+                    partial=deadline.partial
                 )
                 
-                print(f"✅ Procesado {url} en {duration:.2f}s")
+                if deadline.partial:
+                    print(f"⏱️ Procesado parcialmente {url} en {duration:.2f}s "
+                          f"(sin tiempo para: {', '.join(deadline.skipped_stages)})")
+                else:
+                    print(f"✅ Procesado {url} en {duration:.2f}s")
                 return index, result
             
             except Exception as e:
                 # Registrar error
                 error_msg = f"{type(e).__name__}: {str(e)}"
+                if isinstance(url, str) and getattr(thread_local, 'fetched', False):
+                    circuit_breaker.record_failure(url, e)
+                if controller and error_handler.classify_error(e) == "transient":
+                    controller.record(time.time() - start_time, transient_error=True)
+                
+                # Errores temporales: la fila vuelve a la cola y el hilo sigue con otra
+                if error_handler.is_retriable_error(e):
+                    delay = scheduler.retry(index)
+                    if delay is not None:
+                        print(f"🔁 Reintento {scheduler.attempts[index]}/{scheduler.max_attempts} "
+                              f"de {url} en {delay:.0f}s: {error_msg}")
+                        return index, None
+                
                 print(f"❌ Error procesando {url}: {error_msg}")
                 
                 # Registrar en checkpoint
@@ -191,46 +376,114 @@ def procesar_archivo_csv(
                     error=error_msg
                 )
                 
-                # Devolver el elemento original con campos vacíos
-                return index, item
-        
-        # Lista para almacenar drivers creados
-        drivers = []
+                # Devolver el resultado parcial de una ejecución anterior, si lo hay,
+                # o el elemento original con campos vacíos
+                return index, resultados[index] or item
+            
+            finally:
+                # Cerrar el navegador si hay que reciclarlo o sobra tras reducir la concurrencia
+                _release_thread_driver(controller.limit if controller else None)
         
         try:
-            # Procesar en paralelo
-            with ThreadPoolExecutor(
-                max_workers=max_workers,
-                initializer=_init_thread_driver
-            ) as executor:
-                # Crear trabajos
-                future_to_index = {
-                    executor.submit(process_item_with_tracking, (i, item)): i 
-                    for i, item in enumerate(rows_to_process)
-                }
-                
-                # Procesar resultados a medida que se completan
+            # Procesar en paralelo (los hilos crean su driver al necesitarlo)
+            with ThreadPoolExecutor(max_workers=pool_size) as executor:
+                in_flight = {}
                 completed = 0
-                total = len(future_to_index)
+                total = len(pending_ids)
+                last_flush = time.time()
                 
-                for future in concurrent.futures.as_completed(future_to_index):
-                    try:
-                        index, result = future.result()
+                while in_flight or scheduler.has_pending():
+                    # Ocupar los hilos libres con las filas listas (nuevas o reintentos vencidos)
+                    limit = controller.limit if controller else max_workers
+                    while len(in_flight) < limit:
+                        index = scheduler.pop_ready(admit)
+                        if index is None:
+                            break
                         
-                        # Almacenar resultado
-                        if index < len(resultados):
-                            resultados[index] = result
+                        # Aplazar (o descartar) las filas de hosts / IPs con el circuito abierto
+                        url = rows[index].get('website', '')
+                        allowed, wait = circuit_breaker.allow(url) if isinstance(url, str) else (True, 0.0)
+                        if not allowed:
+                            # La fila no se lanza: sus tokens vuelven al host / IP
+                            if rate_limiter:
+                                rate_limiter.refund(_row_url(index))
+                            if not scheduler.defer(index, wait):
+                                print(f"⛔ Descartado {url}: circuito abierto tras "
+                                      f"{scheduler.max_deferrals} aplazamientos")
+                                checkpoint_manager.mark_url_processed(
+                                    row_id=index, url=url, success=False,
+                                    error="CircuitOpen: host o IP sin respuesta"
+                                )
+                                resultados[index] = rows[index]
+                                completed += 1
+                            continue
                         
-                        # Actualizar progreso
-                        completed += 1
-                        if completed % 5 == 0 or completed == total:
-                            print(f"📊 Progreso: {completed}/{total} ({completed/total*100:.1f}%)")
+                        future = executor.submit(process_item_with_tracking, (index, rows[index]))
+                        in_flight[future] = index
+                    
+                    # Esperar a que termine una fila o venza el próximo reintento
+                    wait_for = scheduler.seconds_until_next()
+                    pool_full = len(in_flight) >= limit
+                    if controller:
+                        if pool_full and wait_for == 0:
+                            controller.mark_saturated()
+                        change = controller.adjust(drivers=driver_pool.count())
+                        if change:
+                            print(f"🎚️ Concurrencia: {change}")
+                    for description in driver_pool.check():
+                        print(f"♻️ Reciclando {description}")
+                    if not in_flight:
+                        time.sleep(wait_for or 0)
+                        continue
+                    # Con el pool lleno no se puede lanzar nada hasta que termine una fila
+                    done, _ = concurrent.futures.wait(
+                        in_flight, timeout=None if pool_full else wait_for,
+                        return_when=concurrent.futures.FIRST_COMPLETED
+                    )
+                    
+                    # Procesar resultados a medida que se completan
+                    for future in done:
+                        del in_flight[future]
+                        try:
+                            index, result = future.result()
+                            
+                            # Fila reprogramada para un reintento
+                            if result is None:
+                                continue
                             
-                            # Guardar checkpoint periódicamente
-                            checkpoint_manager.save()
+                            # Almacenar resultado
+                            if index < len(resultados):
+                                resultados[index] = result
+                            
+                            # Actualizar progreso
+                            completed += 1
+                            if completed % 5 == 0 or completed == total:
+                                print(f"📊 Progreso: {completed}/{total} ({completed/total*100:.1f}%)")
+                        
+                        except Exception as e:
+                            print(f"❌ Error inesperado en worker: {e}")
                     
-                    except Exception as e:
-                        print(f"❌ Error inesperado en worker: {e}")
+                    # Persistir el checkpoint cada cierto tiempo (el journal ya se
+                    # escribe por lotes; esto solo acota lo que se pierde en un corte)
+                    if time.time() - last_flush >= CHECKPOINT_FLUSH_INTERVAL:
+                        checkpoint_manager.flush()
+                        last_flush = time.time()
+                
+                retry_stats = scheduler.get_stats()
+                if retry_stats["retries"]:
+                    print(f"🔁 Reintentos: {retry_stats['retries']} "
+                          f"(filas sin éxito tras {scheduler.max_attempts} intentos: {retry_stats['exhausted']})")
+                if controller:
+                    concurrency_stats = controller.get_stats()
+                    print(f"🎚️ Concurrencia final: {concurrency_stats['limit']} hilos "
+                          f"(máximo alcanzado: {concurrency_stats['peak_limit']})")
+                if retry_stats["throttled"]:
+                    limiter_stats = rate_limiter.get_stats()
+                    print(f"🚦 Límite de ritmo por host / IP: {limiter_stats['throttled']} turnos cedidos "
+                          f"({limiter_stats['penalties']} pausas por 429/503)")
+                if retry_stats["deferred"]:
+                    print(f"⏸️ Filas aplazadas por circuitos abiertos: {retry_stats['deferred']} "
+                          f"(descartadas: {retry_stats['shed']})")
             
             # Marcar como completado si todo salió bien
             checkpoint_manager.mark_completed()
@@ -253,12 +506,10 @@ def procesar_archivo_csv(
             return True
             
         finally:
+            # Persistir lo pendiente del checkpoint aunque el proceso se interrumpa
+            checkpoint_manager.flush()
             # Cerrar todos los drivers
-            for driver in drivers:
-                try:
-                    driver.quit()
-                except:
-                    pass
+            driver_pool.quit_all()
     
     except Exception as e:
         logger.error(f"Error procesando archivo {archivo}: {e}")
@@ -2,58 +2,98 @@
 Módulo para extracción de enlaces a redes sociales de sitios web.
 """
 
+import re
 import time
+from html import unescape
+from typing import Optional
+from urllib.parse import urljoin
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.common.by import By
 from selenium.common.exceptions import TimeoutException
 
-from src.utils.selenium_utils import setup_driver
+from src.utils.selenium_utils import setup_driver, apply_deadline
 from src.core.error_handler import ErrorHandler
+from src.core.memoize import cached, skip_cache
+from src.core.dead_hosts import get_dead_hosts
+from src.core.url_store import normalize_url
+from src.core.deadline import Deadline, remaining_or
+from src.core.config import MEMO_EXTRACTION_TTL
 
 # Inicializar manejador de errores
 error_handler = ErrorHandler()
 
-@error_handler.with_retry(max_retries=3, delay=2.0)
+# Atributo href de los enlaces <a> en HTML sin renderizar
+_HREF_RE = re.compile(r"""<a\s[^>]*?href\s*=\s*["']([^"']+)["']""", re.IGNORECASE)
+
+@cached(
+    "social",
+    ttl=MEMO_EXTRACTION_TTL,
+    key_fn=lambda url, driver=None, wait_timeout=10, html=None, deadline=None:
+        f"{normalize_url(url) if isinstance(url, str) else url}|{'browser' if html is None else 'http'}"
+)
 def extract_social_links_from_url(
     url: str,
     driver=None,
-    wait_timeout: int = 10
+    wait_timeout: int = 10,
+    html: Optional[str] = None,
+    deadline: Optional[Deadline] = None
 ):
     """
     Extrae enlaces esenciales a redes sociales desde la URL dada.
     - url: dirección HTTP/HTTPS.
     - driver: instancia Selenium opcional (reutilizable).
     - wait_timeout: tiempo máximo a esperar por <a>.
+    - html: HTML ya descargado (ej. snapshot de page_cache); si se pasa, no se usa Selenium.
+    - deadline: presupuesto de tiempo de la fila; las esperas se recortan a lo que
+      queda y, si se agota, se devuelve un resultado vacío y la fila queda como parcial.
 
     Retorna dict con claves 'facebook','instagram','linkedin','x' y listas de URLs.
+    Los errores temporales (timeouts, red) se propagan para que el planificador
+    reintente la fila.
     """
     if not url or not isinstance(url, str) or not url.lower().startswith(('http://', 'https://')):
         print(f"⚠️ URL inválida, saltando: {url}")
         return {}
 
+    # Los hosts con errores permanentes recientes no se vuelven a cargar
+    dead_hosts = get_dead_hosts()
+    if dead_hosts.is_dead(url):
+        print(f"⛔ Host inaccesible, saltando: {url}")
+        return {}
+
     driver_created = False
-    if driver is None:
+    if driver is None and html is None:
         driver = setup_driver()
         driver_created = True
 
     try:
         print(f"\n🌐 Procesando URL: {url}")
-        print("⏳ Cargando página...")
-        driver.get(url)
-        # Espera explícita a que al menos un enlace <a> esté presente
-        WebDriverWait(driver, wait_timeout).until(
-            EC.presence_of_all_elements_located((By.TAG_NAME, 'a'))
-        )
-        # Opcional: desplazar hasta el final para cargar contenido dinámico
-        driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-        time.sleep(1)
-        print("✅ Página cargada y enlaces listos.")
-
-        links = driver.find_elements(By.TAG_NAME, 'a')
-        print(f"🔍 {len(links)} enlaces encontrados. Filtrando redes sociales...")
-
-        urls = [link.get_attribute('href') for link in links if link.get_attribute('href')]
+        if html is not None:
+            # Enlaces del HTML ya descargado, resueltos respecto a la URL
+            urls = [urljoin(url, unescape(href)) for href in _HREF_RE.findall(html)]
+            print(f"🔍 {len(urls)} enlaces encontrados. Filtrando redes sociales...")
+        else:
+            if deadline is not None and deadline.expired():
+                deadline.mark_partial("social")
+                skip_cache()
+                return {}
+            print("⏳ Cargando página...")
+            apply_deadline(driver, deadline)
+            driver.get(url)
+            # Espera explícita a que al menos un enlace <a> esté presente
+            WebDriverWait(driver, remaining_or(deadline, wait_timeout)).until(
+                EC.presence_of_all_elements_located((By.TAG_NAME, 'a'))
+            )
+            # Opcional: desplazar hasta el final para cargar contenido dinámico
+            driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
+            time.sleep(remaining_or(deadline, 1))
+            print("✅ Página cargada y enlaces listos.")
+
+            links = driver.find_elements(By.TAG_NAME, 'a')
+            print(f"🔍 {len(links)} enlaces encontrados. Filtrando redes sociales...")
+
+            urls = [link.get_attribute('href') for link in links if link.get_attribute('href')]
         found = {"facebook": [], "instagram": [], "linkedin": [], "x": []}
 
         for u in urls:
@@ -95,11 +135,27 @@ def extract_social_links_from_url(
 
     except TimeoutException:
         print(f"⏱️ Timeout al cargar {url}")
-        return {}
+        if deadline is not None and deadline.expired():
+            # El timeout se debe al presupuesto de la fila: no tiene sentido reintentar
+            deadline.mark_partial("social")
+            skip_cache()
+            return {}
+        # El planificador reintenta la fila más tarde sin bloquear este hilo
+        raise
     except Exception as e:
         print(f"❌ Error al extraer redes sociales de {url}: {e}")
         # Registrar error para análisis posterior
         error_handler.log_error(e, {"url": url, "operation": "extract_social_links"})
+        reason = error_handler.permanent_error_reason(e)
+        if reason:
+            dead_hosts.mark_dead(url, reason, str(e))
+        elif deadline is not None and deadline.expired():
+            deadline.mark_partial("social")
+            skip_cache()
+        elif error_handler.is_retriable_error(e):
+            raise
+        else:
+            skip_cache()
         return {}
     finally:
         if driver_created:
@@ -0,0 +1,240 @@
+"""
+Registro de los drivers de Selenium abiertos por los hilos de scraping.
+
+Cada driver se asocia al PID de su chromedriver, de modo que el muestreo de
+recursos en segundo plano (ver resource_sampler) mide la memoria y el CPU de
+cada driver con todos sus procesos de Chrome. Periódicamente se marcan para
+reciclar los drivers que superan DRIVER_MAX_MEMORY_MB (y el que más consume si
+el sistema se queda sin memoria) o cuyo chromedriver ha muerto (ej. por el
+OOM killer); el hilo propietario lo cierra al terminar su fila y abre uno
+nuevo cuando lo necesita.
+"""
+
+import time
+import logging
+import threading
+from typing import Dict, Any, List, Optional
+
+from src.core.resource_sampler import get_resource_sampler
+from src.core.config import DRIVER_MAX_MEMORY_MB, DRIVER_CHECK_INTERVAL, CONCURRENCY_MAX_SYSTEM_MEMORY_PERCENT
+
+logger = logging.getLogger("driver_pool")
+
+
+def driver_pid(driver) -> Optional[int]:
+    """PID del chromedriver de un driver de Selenium, o None si no se conoce."""
+    process = getattr(getattr(driver, "service", None), "process", None)
+    return getattr(process, "pid", None)
+
+
+class _DriverEntry:
+    """Estado de un driver registrado."""
+
+    def __init__(self, driver):
+        self.driver = driver
+        self.pid = driver_pid(driver)
+        self.created_at = time.time()
+        self.rows = 0
+        self.recycle_reason: Optional[str] = None
+        self.usage: Dict[str, Any] = {}
+
+
+class DriverPool:
+    """
+    Drivers abiertos, con su consumo de recursos y las marcas de reciclaje.
+    Es seguro entre hilos; cada driver solo lo cierra el hilo que lo usa.
+    """
+
+    def __init__(
+        self,
+        max_driver_mb: float = DRIVER_MAX_MEMORY_MB,
+        check_interval: float = DRIVER_CHECK_INTERVAL,
+        max_system_memory_percent: float = CONCURRENCY_MAX_SYSTEM_MEMORY_PERCENT
+    ):
+        """
+        Inicializa el registro.
+
+        Args:
+            max_driver_mb: Memoria (PSS) de un driver a partir de la que se recicla
+            check_interval: Segundos mínimos entre comprobaciones en check()
+            max_system_memory_percent: Memoria del sistema (%) a partir de la que
+                se recicla el driver que más consume
+        """
+        self.max_driver_mb = max_driver_mb
+        self.check_interval = check_interval
+        self.max_system_memory_percent = max_system_memory_percent
+
+        self._lock = threading.Lock()
+        self._drivers: Dict[int, _DriverEntry] = {}  # id(driver) -> estado
+        self._last_check = 0.0
+        self._last_sample: Dict[str, Any] = {}
+        self.stats = {"started": 0, "closed": 0, "recycled": 0, "lost": 0}
+        
+        # El muestreador agrupa el árbol de procesos por driver en cada muestra
+        self.sampler = get_resource_sampler()
+        self.sampler.set_group_provider(self.groups)
+
+    # Registro ------------------------------------------------------------
+
+    def register(self, driver) -> None:
+        """Registra un driver recién creado."""
+        with self._lock:
+            self._drivers[id(driver)] = _DriverEntry(driver)
+            self.stats["started"] += 1
+
+    def count(self) -> int:
+        """Número de drivers abiertos."""
+        with self._lock:
+            return len(self._drivers)
+
+    def note_row(self, driver) -> None:
+        """Cuenta una fila procesada con un driver."""
+        with self._lock:
+            entry = self._drivers.get(id(driver))
+            if entry:
+                entry.rows += 1
+
+    def release(self, driver, max_drivers: Optional[int] = None) -> Optional[str]:
+        """
+        Saca un driver del registro si debe cerrarse: está marcado para
+        reciclar o hay más drivers abiertos que max_drivers. Lo llama el hilo
+        propietario entre filas; si devuelve un motivo, debe cerrar el driver.
+
+        Args:
+            driver: Driver del hilo
+            max_drivers: Drivers que pueden seguir abiertos (None = sin límite)
+
+        Returns:
+            Motivo del cierre, o None si el driver sigue en uso
+        """
+        with self._lock:
+            entry = self._drivers.get(id(driver))
+            if entry is None:
+                return None
+            if entry.recycle_reason:
+                reason = entry.recycle_reason
+                self.stats["recycled"] += 1
+            elif max_drivers is not None and len(self._drivers) > max_drivers:
+                reason = "exceso sobre el límite de concurrencia"
+            else:
+                return None
+            del self._drivers[id(driver)]
+            self.stats["closed"] += 1
+            return reason
+
+    def quit_all(self) -> None:
+        """Cierra y olvida todos los drivers registrados."""
+        with self._lock:
+            entries = list(self._drivers.values())
+            self._drivers.clear()
+            self.stats["closed"] += len(entries)
+        for entry in entries:
+            try:
+                entry.driver.quit()
+            except Exception:
+                pass
+
+    # Recursos ------------------------------------------------------------
+
+    def groups(self) -> Dict[str, int]:
+        """Grupos del árbol de procesos: driver-<pid> -> PID del chromedriver."""
+        with self._lock:
+            return {f"driver-{entry.pid}": entry.pid for entry in self._drivers.values() if entry.pid}
+
+    def sample(self) -> Dict[str, Any]:
+        """
+        Actualiza el consumo de cada driver con el último snapshot del
+        muestreador (sin medir).
+
+        Returns:
+            Árbol de procesos del snapshot (ver ProcessTreeSampler.sample)
+        """
+        sample = self.sampler.snapshot()["tree"]
+
+        with self._lock:
+            for entry in self._drivers.values():
+                usage = sample["groups"].get(f"driver-{entry.pid}")
+                if usage is not None:
+                    entry.usage = usage
+            self._last_sample = sample
+        return sample
+
+    def check(self, force: bool = False) -> List[str]:
+        """
+        Revisa los drivers (como mucho cada check_interval segundos) y marca
+        para reciclar los que consumen demasiado o han perdido su chromedriver.
+
+        Args:
+            force: Revisar aunque no haya pasado el intervalo
+
+        Returns:
+            Descripciones de los drivers marcados en esta comprobación
+        """
+        now = time.time()
+        with self._lock:
+            if not force and now - self._last_check < self.check_interval:
+                return []
+            self._last_check = now
+
+        self.sample()
+        system_percent = self.sampler.snapshot()["memory"]["percent"]
+
+        flagged = []
+        with self._lock:
+            candidates = [entry for entry in self._drivers.values()
+                          if entry.usage and not entry.recycle_reason]
+            for entry in candidates:
+                if not entry.usage["alive"]:
+                    entry.recycle_reason = "chromedriver terminado (posible OOM)"
+                    self.stats["lost"] += 1
+                elif entry.usage["pss_mb"] > self.max_driver_mb:
+                    entry.recycle_reason = (f"{entry.usage['pss_mb']:.0f} MB "
+                                            f"(límite {self.max_driver_mb:.0f} MB)")
+
+            # Con el sistema sin memoria, reciclar además el que más consume
+            alive = [entry for entry in candidates if not entry.recycle_reason]
+            if system_percent > self.max_system_memory_percent and alive:
+                worst = max(alive, key=lambda entry: entry.usage["pss_mb"])
+                worst.recycle_reason = (f"{worst.usage['pss_mb']:.0f} MB con la memoria "
+                                        f"del sistema al {system_percent:.0f}%")
+
+            for entry in candidates:
+                if entry.recycle_reason:
+                    flagged.append(f"driver {entry.pid} tras {entry.rows} filas: {entry.recycle_reason}")
+
+        for description in flagged:
+            logger.warning(f"Reciclando {description}")
+        return flagged
+
+    def get_usage(self) -> List[Dict[str, Any]]:
+        """Consumo de cada driver según la última medición."""
+        with self._lock:
+            return [
+                {"pid": entry.pid, "rows": entry.rows, "age_seconds": time.time() - entry.created_at,
+                 "recycle_reason": entry.recycle_reason, **entry.usage}
+                for entry in self._drivers.values()
+            ]
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Estadísticas del registro de drivers."""
+        with self._lock:
+            total = self._last_sample.get("total", {})
+            return {
+                **self.stats,
+                "open": len(self._drivers),
+                "tree_rss_mb": total.get("rss_mb", 0.0),
+                "tree_pss_mb": total.get("pss_mb", 0.0)
+            }
+
+
+_pool: Optional[DriverPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_driver_pool() -> DriverPool:
+    """Obtiene el registro compartido de drivers."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = DriverPool()
+        return _pool
@@ -3,21 +3,85 @@ Módulo para verificación de existencia y validez de emails.
 """
 
 import re
-import socket
 import logging
 import dns.resolver
 from typing import Dict, List, Any, Optional, Tuple
 
+from src.core.memoize import cached, skip_cache
+from src.core.deadline import Deadline, remaining_or
+from src.core.config import MEMO_VERIFICATION_TTL
+
+# Tiempo máximo (segundos) de una consulta DNS
+DNS_TIMEOUT = 5.0
+
 # Configuración de logging
 logger = logging.getLogger("email_verifier")
 
-def verificar_existencia_email(email: str, modo: str = 'avanzado') -> Dict[str, Any]:
+@cached("dns", ttl=MEMO_VERIFICATION_TTL, key_fn=lambda dominio, deadline=None: dominio.lower())
+def verificar_dominio(dominio: str, deadline: Optional[Deadline] = None) -> Tuple[bool, bool]:
+    """
+    Comprueba si un dominio existe y tiene registros MX.
+    
+    Los fallos temporales (timeouts, servidor DNS caído, presupuesto agotado)
+    no se memorizan.
+    
+    Args:
+        dominio: Dominio a comprobar
+        deadline: Presupuesto de tiempo de la fila (recorta las consultas DNS)
+        
+    Returns:
+        Tupla (dominio_existe, mx_existe)
+    """
+    if deadline is not None and deadline.expired():
+        deadline.mark_partial("verify")
+        skip_cache()
+        return False, False
+    
+    # Registros A / AAAA por dnspython, recortados al presupuesto de la fila
+    # (gethostbyname esperaría el timeout del sistema)
+    dominio_existe = False
+    for rdtype in ('A', 'AAAA'):
+        try:
+            dns.resolver.resolve(dominio, rdtype, lifetime=remaining_or(deadline, DNS_TIMEOUT))
+            dominio_existe = True
+            break
+        except dns.resolver.NXDOMAIN:
+            break
+        except dns.resolver.NoAnswer:
+            continue
+        except Exception:
+            if deadline is not None and deadline.expired():
+                deadline.mark_partial("verify")
+            skip_cache()
+            return False, False
+    if not dominio_existe:
+        return False, False
+    
+    try:
+        mx_records = dns.resolver.resolve(dominio, 'MX', lifetime=remaining_or(deadline, DNS_TIMEOUT))
+        return True, len(mx_records) > 0
+    except (dns.resolver.NXDOMAIN, dns.resolver.NoAnswer):
+        return True, False
+    except Exception:
+        if deadline is not None and deadline.expired():
+            deadline.mark_partial("verify")
+        skip_cache()
+        return True, False
+
+@cached(
+    "verify",
+    ttl=MEMO_VERIFICATION_TTL,
+    key_fn=lambda email, modo='avanzado', deadline=None: f"{email.lower()}|{modo}"
+)
+def verificar_existencia_email(email: str, modo: str = 'avanzado',
+                               deadline: Optional[Deadline] = None) -> Dict[str, Any]:
     """
     Verifica la existencia y validez de un email.
     
     Args:
         email: Dirección de email a verificar
         modo: Nivel de verificación ('básico', 'avanzado', 'ultra-avanzado')
+        deadline: Presupuesto de tiempo de la fila (recorta las consultas DNS)
         
     Returns:
         Diccionario con resultados de verificación
@@ -44,18 +108,11 @@ def verificar_existencia_email(email: str, modo: str = 'avanzado') -> Dict[str,
     # Extraer dominio
     dominio = email.split('@')[1]
     
-    # Verificar existencia del dominio
-    try:
-        socket.gethostbyname(dominio)
-        resultados['dominio_existe'] = True
-    except:
-        return resultados
-    
-    # Verificar registros MX
-    try:
-        mx_records = dns.resolver.resolve(dominio, 'MX')
-        resultados['mx_existe'] = len(mx_records) > 0
-    except:
+    # Verificar existencia del dominio y registros MX (una vez por dominio)
+    dominio_existe, mx_existe = verificar_dominio(dominio, deadline=deadline)
+    resultados['dominio_existe'] = dominio_existe
+    resultados['mx_existe'] = mx_existe
+    if not mx_existe:
         return resultados
     
     # Si no se requiere verificación ultra-avanzada, terminar aquí
@@ -30,16 +30,20 @@ except ImportError:
 
 # Intentar importar componentes del proyecto
 try:
-    from src.core.config import LOGS_DIR
+    from src.core.config import LOG_DIR as LOGS_DIR
     from src.core.resource_manager import ResourceManager
     from src.core.checkpoint_manager import CheckpointManager
     from src.core.cache_manager import CacheManager
+    from src.core.resource_sampler import get_resource_sampler
+    from src.utils.driver_pool import get_driver_pool
 except ImportError:
     # Fallback si no se pueden importar
     LOGS_DIR = Path(__file__).resolve().parent.parent.parent / "logs"
     ResourceManager = None
     CheckpointManager = None
     CacheManager = None
+    get_resource_sampler = None
+    get_driver_pool = None
 
 class ProgressMonitor:
     """
@@ -259,10 +263,16 @@ class ProgressMonitor:
         
         if self.show_resources:
             try:
-                process = psutil.Process(os.getpid())
-                memory_info = process.memory_info()
-                memory_usage_mb = memory_info.rss / (1024 * 1024)
-                cpu_usage_percent = process.cpu_percent(interval=0.1)
+                if get_resource_sampler is not None:
+                    # Incluir chromedriver y los procesos de Chrome (último snapshot, sin medir)
+                    total = get_resource_sampler().snapshot()["tree"]["total"]
+                    memory_usage_mb = total["pss_mb"]
+                    cpu_usage_percent = total["cpu_percent"]
+                else:
+                    process = psutil.Process(os.getpid())
+                    memory_info = process.memory_info()
+                    memory_usage_mb = memory_info.rss / (1024 * 1024)
+                    cpu_usage_percent = process.cpu_percent(interval=None)
             except Exception:
                 pass
         
@@ -482,6 +492,8 @@ class SystemMonitor:
             "disk": {},
             "network": {},
             "process": {},
+            "process_tree": {},
+            "drivers": [],
             "alerts": []
         }
         
@@ -550,22 +562,51 @@ class SystemMonitor:
             time.sleep(self.check_interval)
     
     def _collect_stats(self):
-        """Recopila estadísticas del sistema."""
-        # Memoria
-        memory = psutil.virtual_memory()
-        self.stats["memory"] = {
-            "total_mb": memory.total / (1024 * 1024),
-            "available_mb": memory.available / (1024 * 1024),
-            "used_mb": memory.used / (1024 * 1024),
-            "percent": memory.percent
-        }
-        
-        # CPU
-        self.stats["cpu"] = {
-            "percent": psutil.cpu_percent(interval=0.1),
-            "count": psutil.cpu_count(),
-            "count_logical": psutil.cpu_count(logical=True)
-        }
+        """
+        Recopila estadísticas del sistema. Memoria, CPU y proceso salen del
+        último snapshot del muestreo en segundo plano (sin esperas).
+        """
+        if get_resource_sampler is not None:
+            snapshot = get_resource_sampler().snapshot()
+            
+            # Memoria
+            self.stats["memory"] = dict(snapshot["memory"])
+            
+            # CPU (variación desde la muestra anterior del muestreador)
+            self.stats["cpu"] = {
+                "percent": snapshot["cpu"]["percent"],
+                "count": snapshot["cpu"]["count"],
+                "count_logical": snapshot["cpu"]["count"]
+            }
+            
+            # Proceso actual
+            self.stats["process"] = {
+                "memory_mb": snapshot["process"]["rss_mb"],
+                "cpu_percent": snapshot["process"]["cpu_percent"],
+                "threads": snapshot["process"]["threads"],
+                "created_time": psutil.Process(os.getpid()).create_time()
+            }
+        else:
+            # Sin el muestreador: lecturas de intervalo 0 (no bloquean)
+            memory = psutil.virtual_memory()
+            self.stats["memory"] = {
+                "total_mb": memory.total / (1024 * 1024),
+                "available_mb": memory.available / (1024 * 1024),
+                "used_mb": memory.used / (1024 * 1024),
+                "percent": memory.percent
+            }
+            self.stats["cpu"] = {
+                "percent": psutil.cpu_percent(interval=None),
+                "count": psutil.cpu_count(),
+                "count_logical": psutil.cpu_count(logical=True)
+            }
+            process = psutil.Process(os.getpid())
+            self.stats["process"] = {
+                "memory_mb": process.memory_info().rss / (1024 * 1024),
+                "cpu_percent": process.cpu_percent(interval=None),
+                "threads": process.num_threads(),
+                "created_time": process.create_time()
+            }
         
         # Disco
         disk = psutil.disk_usage('/')
@@ -576,14 +617,19 @@ class SystemMonitor:
             "percent": disk.percent
         }
         
-        # Proceso actual
-        process = psutil.Process(os.getpid())
-        self.stats["process"] = {
-            "memory_mb": process.memory_info().rss / (1024 * 1024),
-            "cpu_percent": process.cpu_percent(interval=0.1),
-            "threads": process.num_threads(),
-            "created_time": process.create_time()
-        }
+        # Árbol de procesos (chromedriver y Chrome), agrupado por driver
+        if get_driver_pool is not None:
+            pool = get_driver_pool()
+            tree = pool.sample()
+            self.stats["process_tree"] = {
+                "total_rss_mb": tree["total"]["rss_mb"],
+                "total_pss_mb": tree["total"]["pss_mb"],
+                "children_pss_mb": tree["children"]["pss_mb"],
+                "children_cpu_percent": tree["children"]["cpu_percent"],
+                "processes": tree["total"]["processes"],
+                "percent": tree["total"]["pss_mb"] / self.stats["memory"]["total_mb"] * 100
+            }
+            self.stats["drivers"] = pool.get_usage()
         
         # Red (solo estadísticas básicas)
         try:
@@ -612,6 +658,44 @@ class SystemMonitor:
             alerts.append(alert)
             logger.warning(alert["message"])
         
+        # Alerta de memoria del árbol de procesos (scraper + navegadores)
+        tree = self.stats.get("process_tree")
+        if tree and tree["percent"] > self.alert_threshold_memory:
+            alert = {
+                "type": "process_tree",
+                "level": "warning",
+                "message": f"Memoria del scraper y sus navegadores alta: {tree['total_pss_mb']:.0f} MB "
+                           f"({tree['percent']:.1f}%)",
+                "timestamp": time.time()
+            }
+            alerts.append(alert)
+            logger.warning(alert["message"])
+        
+        # Alertas por driver: consumo excesivo o chromedriver terminado (ej. OOM killer)
+        max_driver_mb = get_driver_pool().max_driver_mb if get_driver_pool is not None else None
+        for driver in self.stats.get("drivers", []):
+            if "alive" not in driver:
+                continue
+            if not driver["alive"]:
+                alert = {
+                    "type": "driver_lost",
+                    "level": "error",
+                    "message": f"Chromedriver {driver['pid']} terminado inesperadamente (posible OOM)",
+                    "timestamp": time.time()
+                }
+            elif max_driver_mb and driver["pss_mb"] > max_driver_mb:
+                alert = {
+                    "type": "driver_memory",
+                    "level": "warning",
+                    "message": f"Driver {driver['pid']} con memoria alta: {driver['pss_mb']:.0f} MB "
+                               f"en {driver['processes']} procesos",
+                    "timestamp": time.time()
+                }
+            else:
+                continue
+            alerts.append(alert)
+            logger.warning(alert["message"])
+        
         # Alerta de CPU
         if self.stats["cpu"]["percent"] > self.alert_threshold_cpu:
             alert = {
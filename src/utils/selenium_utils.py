@@ -10,14 +10,18 @@ from selenium.webdriver.chrome.service import Service
 
 from src.core.config import BASE_DIR
 
+# Timeouts por defecto del driver (segundos)
+PAGE_LOAD_TIMEOUT = 15
+IMPLICIT_WAIT = 10
+
 def setup_driver(
     headless: bool = True,
     disable_gpu: bool = True,
     no_sandbox: bool = True,
     user_agent: str = "Mozilla/5.0",
     chromedriver_path: str = None,
-    page_load_timeout: int = 15,
-    implicit_wait: int = 10,
+    page_load_timeout: int = PAGE_LOAD_TIMEOUT,
+    implicit_wait: int = IMPLICIT_WAIT,
 ):
     """
     Configura y devuelve un driver de Selenium Chrome reutilizable.
@@ -64,3 +68,18 @@ def setup_driver(
     driver.implicitly_wait(implicit_wait)
 
     return driver
+
+def apply_deadline(driver, deadline=None):
+    """
+    Ajusta los timeouts del driver al tiempo restante de la fila.
+
+    Parámetros:
+      - driver: instancia de Selenium (compartida por el hilo).
+      - deadline: Deadline de la fila; si es None se restauran los timeouts por defecto.
+    """
+    if deadline is None:
+        driver.set_page_load_timeout(PAGE_LOAD_TIMEOUT)
+        driver.implicitly_wait(IMPLICIT_WAIT)
+    else:
+        driver.set_page_load_timeout(deadline.clip(PAGE_LOAD_TIMEOUT, minimum=1))
+        driver.implicitly_wait(deadline.clip(IMPLICIT_WAIT))
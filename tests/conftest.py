@@ -0,0 +1,15 @@
+"""
+Configuración común de las pruebas.
+"""
+
+import pytest
+
+from src.masking import data_masker
+
+
+@pytest.fixture(autouse=True)
+def schema_cache_dir(tmp_path):
+    """Guarda la caché de esquemas de enmascarado en un directorio temporal."""
+    data_masker.configure_schema_cache(str(tmp_path / "masking_cache"))
+    yield tmp_path / "masking_cache"
+    data_masker.configure_schema_cache(None)
@@ -0,0 +1,40 @@
+"""
+Pruebas de regresión del enmascarado vectorizado de data_masker.
+"""
+
+import pandas as pd
+
+from src.masking import data_masker
+from src.masking.data_masker import apply_masking_plan, build_column_plan, mask_dataframe
+
+
+def test_email_column_without_at_sign_is_left_unchanged():
+    df = pd.DataFrame({"email": ["none", None]})
+
+    masked = mask_dataframe(df)
+
+    assert masked["email"].tolist()[0] == "none"
+    assert pd.isna(masked["email"].tolist()[1])
+
+
+def test_unlabelled_column_with_only_phones_is_masked():
+    df = pd.DataFrame({"name": ["a", "b"], "notes": ["600123456", "sin datos"]}, dtype=object)
+    plan = build_column_plan(list(df.columns))
+
+    masked = apply_masking_plan(df, plan, strict=True, scan_unlabelled=True)
+
+    assert masked["notes"].tolist() == ["6001234**", "sin datos"]
+    assert masked["name"].tolist() == ["a", "b"]
+
+
+def test_recorded_schema_skips_sampling(monkeypatch):
+    header = ["name", "notes"]
+    data_masker.mask_sheet_rows(header, [["a", "juan@mail.com"], ["b", "texto"]])
+
+    def fail_sampling(df, plan):
+        raise AssertionError("un esquema registrado no debe muestrearse")
+
+    monkeypatch.setattr(data_masker, "_sample_clean_columns", fail_sampling)
+    masked = data_masker.mask_sheet_rows(header, [["c", "ana@mail.com"], ["d", "600123456"]])
+
+    assert masked == [["c", "a**@mail.com"], ["d", "6001234**"]]